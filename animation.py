@@ -0,0 +1,217 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Non-blocking, time based LED animations.
+#
+# An Animator renders an effect into a target at a fixed frame rate. tick()
+# returns immediately if no frame is due, so it can be called from the same
+# loop that scans keys. If the loop falls behind, late frames are dropped
+# instead of played back faster.
+#
+# Effects only depend on the time, not on how many frames were rendered.
+# render(target, now) writes target[index] = value for index in
+# range(target.count) and returns False if nothing changed since the last call.
+#
+# Targets have `count`, item assignment and show():
+# - KeyboardFrame: IS31FL3743 RGB modules, index i is channel i % 3
+# - LedState: IS31FL3743, only writes LEDs that changed
+# - MatrixFramebuffer: LED matrix, index x + y * WIDTH
+# - PwmTarget: PWM backlight, e.g. on GP25
+# - DigitalTarget: On/off LED, e.g. capslock on GP24
+#
+# Usage:
+#   animator = Animator(KeyboardFrame(is31_controllers), Cycle(1000), fps=30)
+#   while True:
+#       animator.tick()
+from supervisor import ticks_ms
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+
+def ticks_diff(end, start):
+    diff = (end - start) & TICKS_MASK
+    # Negative if end is before start
+    if diff > TICKS_MASK // 2:
+        diff -= TICKS_MASK + 1
+    return diff
+
+
+# Triangle wave from 0 up to maximum and back down over period
+def triangle(phase, period, maximum):
+    phase %= period
+    half = period // 2
+    if phase < half:
+        return phase * maximum // half
+    return (period - phase) * maximum // (period - half)
+
+
+class Cycle:
+    # Light one color channel after the other, then all of them, switching
+    # every period_ms. Like the RGB backlight examples: red, green, blue, white.
+    def __init__(self, period_ms=1000, channels=3, value=0xFF):
+        self.period_ms = period_ms
+        self.channels = channels
+        self.value = value
+        self.step = -1
+
+    def render(self, target, now):
+        step = now // self.period_ms % (self.channels + 1)
+        if step == self.step:
+            return False
+        self.step = step
+        channels = self.channels
+        value = self.value
+        for i in range(target.count):
+            # No tuple for `in`, it would be allocated for every LED
+            target[i] = value if step == channels or step == i % channels else 0
+        return True
+
+
+class Blink:
+    # All on for period_ms, then all off for period_ms
+    def __init__(self, period_ms=1000, value=0xFF):
+        self.period_ms = period_ms
+        self.value = value
+        self.on = None
+
+    def render(self, target, now):
+        on = now // self.period_ms % 2 == 0
+        if on == self.on:
+            return False
+        self.on = on
+        value = self.value if on else 0
+        for i in range(target.count):
+            target[i] = value
+        return True
+
+
+class Breathe:
+    # Fade all LEDs up to value and back down over period_ms
+    def __init__(self, period_ms=4000, value=0xFF):
+        self.period_ms = period_ms
+        self.value = value
+        self.level = -1
+
+    def render(self, target, now):
+        level = triangle(now, self.period_ms, self.value)
+        if level == self.level:
+            return False
+        self.level = level
+        for i in range(target.count):
+            target[i] = level
+        return True
+
+
+class Wave:
+    # Brightness wave travelling along the LED indices.
+    # wavelength: Number of LEDs from one peak to the next.
+    # step: LEDs with the same index // step have the same brightness, e.g.
+    # 3 for the channels of one RGB LED, or the width of the LED matrix.
+    def __init__(self, period_ms=2000, wavelength=24, step=1, value=0xFF):
+        self.period_ms = period_ms
+        self.wavelength = wavelength
+        self.step = step
+        self.value = value
+
+    def render(self, target, now):
+        period = self.period_ms
+        wavelength = self.wavelength
+        step = self.step
+        value = self.value
+        for i in range(target.count):
+            offset = (i // step) % wavelength * period // wavelength
+            target[i] = triangle(now + offset, period, value)
+        return True
+
+
+class PwmTarget:
+    # Single channel on a pwmio.PWMOut, 0-255 scaled to the 16 bit duty cycle
+    def __init__(self, pwm):
+        self.pwm = pwm
+        self.count = 1
+        self.value = 0
+        self.shown = -1
+
+    def __setitem__(self, index, value):
+        self.value = value
+
+    def __getitem__(self, index):
+        return self.value
+
+    def show(self):
+        if self.value != self.shown:
+            self.shown = self.value
+            self.pwm.duty_cycle = self.value * 257
+
+    # Output the last shown value again, e.g. after it was turned off
+    def restore(self):
+        if self.shown >= 0:
+            self.pwm.duty_cycle = self.shown * 257
+
+
+class DigitalTarget:
+    # Single on/off LED on a digitalio.DigitalInOut
+    def __init__(self, pin):
+        self.pin = pin
+        self.count = 1
+        self.value = 0
+        self.shown = -1
+
+    def __setitem__(self, index, value):
+        self.value = value
+
+    def __getitem__(self, index):
+        return self.value
+
+    def show(self):
+        if self.value != self.shown:
+            self.shown = self.value
+            self.pin.value = bool(self.value)
+
+    # Output the last shown value again, e.g. after it was turned off
+    def restore(self):
+        if self.shown >= 0:
+            self.pin.value = bool(self.shown)
+
+
+class Animator:
+    # show: False to only render, the caller flushes the target itself, e.g.
+    # one controller per scan pass with KeyboardFrame.show_part()
+    def __init__(self, target, effect, fps=30, show=True):
+        self.target = target
+        self.effect = effect
+        self.show = show
+        self.frame_ms = 1000 // fps
+        self.next_frame = ticks_ms()
+
+        # Frames rendered and frames skipped because tick() was called too late
+        self.frames = 0
+        self.dropped = 0
+
+    # Render and show a frame if one is due. Returns True if it did.
+    def tick(self):
+        now = ticks_ms()
+        late = ticks_diff(now, self.next_frame)
+        if late < 0:
+            return False
+
+        if late >= self.frame_ms:
+            # Behind by at least one frame, skip ahead instead of catching up
+            self.dropped += late // self.frame_ms
+            self.next_frame = now
+        self.next_frame = (self.next_frame + self.frame_ms) & TICKS_MASK
+
+        if self.effect.render(self.target, now) and self.show:
+            self.target.show()
+        self.frames += 1
+        return True
+
+    # Milliseconds until the next frame is due, 0 if it's due now
+    def wait_ms(self):
+        return max(ticks_diff(self.next_frame, ticks_ms()), 0)
+
+    # Start over with a different effect
+    def play(self, effect):
+        self.effect = effect
+        self.next_frame = ticks_ms()
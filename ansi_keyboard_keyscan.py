@@ -0,0 +1,384 @@
+# SPDX-FileCopyrightText: Daniel Schaefer 2023 for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Scan the full 16x8 matrix of the ANSI keyboard and send the keys over HID.
+# RGB keyboard: Both LED controllers cycle through RGB every second, like
+# ansi_keyboard_backlight.py. White keyboard: Backlight 50% on.
+#
+# NOT VERIFIED ON A KEYBOARD: the strobe/sense wiring of the matrix isn't
+# known here. ANSI_MATRIX is a placeholder, key x of physical row y is at
+# column x, row y, so most keys will send the wrong keycode. Before using it
+# as a keyboard, press every key with DEBUG = True and put the printed
+# (col, row) into ANSI_MATRIX, or take the positions from the keyboard's QMK
+# matrix layout.
+#
+# For a 1kHz scan rate a pass over all 128 keys should stay within
+# SCAN_BUDGET_US. keyscan_benchmark.py measures the 16x8 pass on the module.
+# With DEBUG and SCAN_TIMING on, slower passes are printed here. The LEDs are
+# flushed after the HID report, one controller per pass, so a backlight frame
+# never delays more than one pass by the I2C writes of one controller.
+#
+# Fast boot: keys and HID come up first. BOOT_DONE is signaled after the first
+# scan pass, the backlight is only set up after that.
+from startup import BootProfiler, probe_i2c
+import gc
+import board
+import digitalio
+import analogio
+import usb_hid
+import usb_cdc
+from adafruit_hid.keycode import Keycode
+from keyscan import KeyMatrix, FILTER_NONE
+from debounce import Debouncer, DEBOUNCE_ASYM
+from scan_scheduler import ScanScheduler
+from hid_report import KeyboardReport
+from stats import Stats, HID_REPORTS, I2C_TRANSACTIONS, WAKE_MS, BOOT_MS
+from power import PowerManager
+from keymap import Keymap
+
+profiler = BootProfiler()
+profiler.mark("imports")
+
+MATRIX_COLS = 16
+MATRIX_ROWS = 8
+
+ADC_THRESHOLD = 2.9
+# Report presses at once, releases after the key was up for 5ms
+DEBOUNCE_MODE = DEBOUNCE_ASYM
+DEBOUNCE_MS = 5
+# Rapid trigger distance in volts, e.g. 0.2. Keys release and re-press when they
+# move up/down this much, instead of only at ADC_THRESHOLD. 0 to turn it off.
+RAPID_TRIGGER = 0
+# ADC noise filtering, see keyscan.py. tools/keyscan_filters.py compares what
+# the settings cost against how well they filter.
+OVERSAMPLE = 1
+ADC_FILTER = FILTER_NONE
+# Time every pass for scan_max_us/scan_p99_us in the stats. Allocates two long
+# ints per pass, off to keep the loop free of allocations.
+SCAN_TIMING = False
+# One pass over the whole matrix, for a 1kHz scan rate
+SCAN_BUDGET_US = 1000
+# RGB keyboard with two IS31FL3743 or white keyboard with a PWM backlight
+BACKLIGHT_RGB = "rgb"
+BACKLIGHT_WHITE = "white"
+BACKLIGHT = BACKLIGHT_RGB
+DEBUG = False
+
+# Physical layout, row by row. Fn has no keycode.
+ANSI_KEYMAP = [
+    [
+        Keycode.ESCAPE,
+        Keycode.F1,
+        Keycode.F2,
+        Keycode.F3,
+        Keycode.F4,
+        Keycode.F5,
+        Keycode.F6,
+        Keycode.F7,
+        Keycode.F8,
+        Keycode.F9,
+        Keycode.F10,
+        Keycode.F11,
+        Keycode.F12,
+        Keycode.DELETE,
+    ],
+    [
+        Keycode.GRAVE_ACCENT,
+        Keycode.ONE,
+        Keycode.TWO,
+        Keycode.THREE,
+        Keycode.FOUR,
+        Keycode.FIVE,
+        Keycode.SIX,
+        Keycode.SEVEN,
+        Keycode.EIGHT,
+        Keycode.NINE,
+        Keycode.ZERO,
+        Keycode.MINUS,
+        Keycode.EQUALS,
+        Keycode.BACKSPACE,
+    ],
+    [
+        Keycode.TAB,
+        Keycode.Q,
+        Keycode.W,
+        Keycode.E,
+        Keycode.R,
+        Keycode.T,
+        Keycode.Y,
+        Keycode.U,
+        Keycode.I,
+        Keycode.O,
+        Keycode.P,
+        Keycode.LEFT_BRACKET,
+        Keycode.RIGHT_BRACKET,
+        Keycode.BACKSLASH,
+    ],
+    [
+        Keycode.CAPS_LOCK,
+        Keycode.A,
+        Keycode.S,
+        Keycode.D,
+        Keycode.F,
+        Keycode.G,
+        Keycode.H,
+        Keycode.J,
+        Keycode.K,
+        Keycode.L,
+        Keycode.SEMICOLON,
+        Keycode.QUOTE,
+        Keycode.ENTER,
+    ],
+    [
+        Keycode.LEFT_SHIFT,
+        Keycode.Z,
+        Keycode.X,
+        Keycode.C,
+        Keycode.V,
+        Keycode.B,
+        Keycode.N,
+        Keycode.M,
+        Keycode.COMMA,
+        Keycode.PERIOD,
+        Keycode.FORWARD_SLASH,
+        Keycode.RIGHT_SHIFT,
+    ],
+    [
+        Keycode.LEFT_CONTROL,
+        None,  # Fn
+        Keycode.LEFT_GUI,
+        Keycode.LEFT_ALT,
+        Keycode.SPACE,
+        Keycode.RIGHT_ALT,
+        Keycode.RIGHT_CONTROL,
+        Keycode.LEFT_ARROW,
+        Keycode.UP_ARROW,
+        Keycode.DOWN_ARROW,
+        Keycode.RIGHT_ARROW,
+    ],
+]
+# PLACEHOLDER, not the real wiring, see the top of the file
+ANSI_MATRIX = [
+    [
+        (col, row) if row < len(ANSI_KEYMAP) and col < len(ANSI_KEYMAP[row]) else None
+        for col in range(MATRIX_COLS)
+    ]
+    for row in range(MATRIX_ROWS)
+]
+report = KeyboardReport(usb_hid.devices)
+
+sdb = None
+if BACKLIGHT == BACKLIGHT_RGB:
+    # Enable LED controller via SDB pin. Early, so they're up once they're set up.
+    sdb = digitalio.DigitalInOut(board.GP29)
+    sdb.direction = digitalio.Direction.OUTPUT
+    sdb.value = True
+
+# Set unused pins to input to avoid interfering. They're hooked up to rows 5 and 6
+gp6 = digitalio.DigitalInOut(board.GP6)
+gp6.direction = digitalio.Direction.INPUT
+gp7 = digitalio.DigitalInOut(board.GP7)
+gp7.direction = digitalio.Direction.INPUT
+
+# Set up analog MUX pins
+mux_enable = digitalio.DigitalInOut(board.MUX_ENABLE)
+mux_enable.direction = digitalio.Direction.OUTPUT
+mux_enable.value = False  # Low to enable it
+mux_a = digitalio.DigitalInOut(board.MUX_A)
+mux_a.direction = digitalio.Direction.OUTPUT
+mux_b = digitalio.DigitalInOut(board.MUX_B)
+mux_b.direction = digitalio.Direction.OUTPUT
+mux_c = digitalio.DigitalInOut(board.MUX_C)
+mux_c.direction = digitalio.Direction.OUTPUT
+
+# Set up KSO pins, all 16 columns are used on the keyboards
+kso_pins = [
+    digitalio.DigitalInOut(x)
+    for x in [
+        board.KSO0,
+        board.KSO1,
+        board.KSO2,
+        board.KSO3,
+        board.KSO4,
+        board.KSO5,
+        board.KSO6,
+        board.KSO7,
+        board.KSO8,
+        board.KSO9,
+        board.KSO10,
+        board.KSO11,
+        board.KSO12,
+        board.KSO13,
+        board.KSO14,
+        board.KSO15,
+    ]
+]
+for kso in kso_pins:
+    kso.direction = digitalio.Direction.OUTPUT
+adc_in = analogio.AnalogIn(board.GP28)
+profiler.mark("pins")
+
+debouncer = Debouncer(MATRIX_COLS, MATRIX_ROWS, DEBOUNCE_MODE, DEBOUNCE_MS)
+keys = KeyMatrix(
+    kso_pins,
+    (mux_a, mux_b, mux_c),
+    adc_in,
+    MATRIX_COLS,
+    MATRIX_ROWS,
+    ADC_THRESHOLD,
+    debouncer,
+    rapid_trigger=RAPID_TRIGGER,
+    oversample=OVERSAMPLE,
+    filter=ADC_FILTER,
+)
+# Don't touch the keys while booting
+keys.calibrate()
+profiler.mark("keys")
+
+# Flat lookup tables by matrix position, the nested tables aren't needed anymore
+keymap = Keymap(ANSI_MATRIX, ANSI_KEYMAP, MATRIX_COLS, MATRIX_ROWS)
+del ANSI_MATRIX, ANSI_KEYMAP
+gc.collect()
+profiler.mark("keymap")
+
+# Backlight, set up after the first scan pass. frame is the KeyboardFrame on
+# the RGB keyboard, None otherwise. Stays None if the LED controllers don't
+# answer, the keys work without backlight.
+frame = None
+animator = None
+backlight = None
+backlight_target = None
+
+
+def start_backlight():
+    global frame, animator, backlight, backlight_target
+    from animation import Animator, Cycle, PwmTarget
+
+    if BACKLIGHT == BACKLIGHT_RGB:
+        import busio
+        from framework_is31fl3743 import IS31FL3743
+        from keyboard_frame import KeyboardFrame
+
+        i2c = busio.I2C(board.SCL, board.SDA)  # Or board.I2C()
+        # Only the controllers' addresses instead of scanning the whole bus.
+        # Creating IS31FL3743 fails if one doesn't answer.
+        if len(probe_i2c(i2c, (0x20, 0x23))) < 2:
+            i2c.deinit()
+            return False
+        is31_controllers = [
+            IS31FL3743(i2c, address=0x20),
+            IS31FL3743(i2c, address=0x23),
+        ]
+        # Both halves of the keyboard as one frame
+        frame = KeyboardFrame(is31_controllers)
+        frame.set_scaling(0xFF)  # Full brightness
+        for is31 in is31_controllers:
+            is31.global_current = 0xFF  # set current to max
+            is31.enable = True
+        # Only rendered here, the loop flushes one controller per pass
+        animator = Animator(frame, Cycle(1000), show=False)
+    else:
+        import pwmio
+
+        capslock = digitalio.DigitalInOut(board.GP24)
+        capslock.direction = digitalio.Direction.OUTPUT
+        backlight = pwmio.PWMOut(board.GP25, frequency=5000, duty_cycle=0)
+        backlight_target = PwmTarget(backlight)
+        backlight_target[0] = 0x80  # 50% brightness
+        backlight_target.show()
+    return True
+
+
+def suspend():
+    # Don't leave keys held down while the host sleeps
+    report.release_all()
+    report.send()
+    if backlight:
+        backlight.duty_cycle = 0
+
+
+def restore_backlight():
+    if frame:
+        frame.restore()
+    elif backlight_target:
+        backlight_target.restore()
+
+
+# Light sleep while SLEEP# is low, no scanning, LED controllers off via SDB
+power = PowerManager(board.GP0, sdb, on_sleep=suspend, on_wake=restore_backlight)
+
+scheduler = ScanScheduler()
+# Counters, read over usb_cdc.data if boot.py enabled it
+stats = Stats(usb_cdc.data, time_scans=SCAN_TIMING)
+# Controller of the KeyboardFrame flushed next
+part = 0
+booting = True
+while True:
+    if power.poll():
+        stats.set(WAKE_MS, power.wake_ms)
+        # Light sleep and wake-up allocate, clean up before scanning again
+        stats.collect()
+
+    # Only the keys that were pressed or released since the last pass are handled
+    stats.scan_start()
+    changed_keys = keys.scan()
+    stats.scan_end()
+    if changed_keys:
+        for col in range(MATRIX_COLS):
+            changed = keys.changed[col]
+            if not changed:
+                continue
+            key = col * MATRIX_ROWS
+            for row in range(MATRIX_ROWS):
+                if not changed & (1 << row):
+                    continue
+                code = keymap.keycodes[key + row]
+                pressed = keys.is_pressed(col, row)
+                if DEBUG:
+                    action = "Pressed" if pressed else "Released"
+                    print(f"{action} {code} ({col}, {row})")
+                if not code:
+                    continue
+                if pressed:
+                    report.press(code)
+                else:
+                    report.release(code)
+
+    # One report for all keys that changed in this pass, none if nothing changed
+    if report.send():
+        stats.add(HID_REPORTS)
+
+    # LEDs after the report, so they don't delay it
+    if frame:
+        animator.tick()
+        frame.transactions = 0
+        frame.show_part(part)
+        part = (part + 1) % frame.parts
+        stats.add(I2C_TRANSACTIONS, frame.transactions)
+    elif booting:
+        # First pass done, keys and HID work
+        booting = False
+        boot_done = digitalio.DigitalInOut(board.BOOT_DONE)
+        boot_done.direction = digitalio.Direction.OUTPUT
+        boot_done.value = False
+        profiler.boot_done()
+        if start_backlight():
+            profiler.mark("backlight")
+        elif DEBUG:
+            print("No LED controllers at 0x20 and 0x23, running without backlight")
+        stats.set(BOOT_MS, profiler.boot_done_ms)
+        stats.boot_report = profiler.report()
+        if DEBUG:
+            print(stats.boot_report)
+        stats.collect()
+    if SCAN_TIMING and DEBUG and stats.scan_max_us > SCAN_BUDGET_US:
+        print(f"Scan pass took {stats.scan_max_us}us")
+        stats.scan_max_us = 0
+    stats.poll()
+
+    # Scan fast while keys are in use, slow down when idle
+    scheduler.update(keys.active)
+    # Passes don't allocate, so collecting when the keys went idle is enough
+    if scheduler.idle_point:
+        stats.collect()
+    scheduler.wait()
@@ -0,0 +1,9 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Copy to CIRCUITPY as boot.py to enable the USB CDC data channel, a second
+# serial port next to the REPL. The keyscan scripts answer stats requests on it
+# (see stats.py). Takes effect after a hard reset.
+import usb_cdc
+
+usb_cdc.enable(console=True, data=True)
@@ -0,0 +1,77 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Per-key debouncing for KeyMatrix.
+#
+# Each matrix position (index col * rows + row) has its own timestamp in a
+# preallocated array, so a bouncing key never delays any of the other keys.
+#
+# Algorithms:
+# - DEBOUNCE_EAGER: Report a change immediately, then ignore the key for
+#   press_ms (lockout). Lowest latency.
+# - DEBOUNCE_DEFER: Report a change once the key was stable for press_ms
+#   (press) or release_ms (release). Symmetric if both are the same.
+# - DEBOUNCE_ASYM: Report a press immediately, report a release once the key
+#   was released for release_ms.
+from array import array
+
+DEBOUNCE_EAGER = 0
+DEBOUNCE_DEFER = 1
+DEBOUNCE_ASYM = 2
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+
+class Debouncer:
+    def __init__(self, cols, rows, mode=DEBOUNCE_DEFER, press_ms=5, release_ms=None):
+        self.rows = rows
+        self.mode = mode
+        self.press_ms = press_ms
+        self.release_ms = press_ms if release_ms is None else release_ms
+        # Eager: time of the last reported change
+        # Defer/Asym: time the raw state started to differ from the reported one
+        self.timestamps = array("L", [0] * (cols * rows))
+        # Bits of the keys per column whose raw state differs from the reported one
+        self.pending = bytearray(cols)
+
+    # Take the raw row bits of one column and the currently reported bits.
+    # Returns the new debounced bits for that column.
+    def update(self, col, raw, debounced, now):
+        mode = self.mode
+        diff = raw ^ debounced
+        if mode != DEBOUNCE_EAGER:
+            # Keys that went back to their reported state are stable again
+            self.pending[col] &= diff
+        if not diff:
+            return debounced
+
+        timestamps = self.timestamps
+        pending = self.pending[col]
+        key = col * self.rows
+        for row in range(self.rows):
+            bit = 1 << row
+            if not diff & bit:
+                continue
+            index = key + row
+
+            if mode == DEBOUNCE_EAGER:
+                if (now - timestamps[index]) & TICKS_MASK >= self.press_ms:
+                    debounced ^= bit
+                    timestamps[index] = now
+                continue
+
+            if mode == DEBOUNCE_ASYM and raw & bit:
+                debounced |= bit
+                continue
+
+            if not pending & bit:
+                pending |= bit
+                timestamps[index] = now
+            hold = self.press_ms if raw & bit else self.release_ms
+            if (now - timestamps[index]) & TICKS_MASK >= hold:
+                debounced ^= bit
+                pending &= ~bit
+
+        self.pending[col] = pending
+        return debounced
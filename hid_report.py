@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Boot keyboard HID report that's built up over a scan pass and sent once.
+#
+# press()/release() only change the report in RAM. send() sends it to the
+# host if it differs from the last report that was sent, so a scan pass with
+# several changed keys results in one USB report, and a pass without changes
+# in none. Held keys stay in the report, the host handles key repeat.
+#
+# Usage:
+#   report = KeyboardReport(usb_hid.devices)
+#   report.press(Keycode.A)
+#   report.send()
+from adafruit_hid import find_device
+from supervisor import ticks_ms
+
+# Modifier keycodes (Left Ctrl - Right GUI) are bits in the first report byte
+MODIFIER_FIRST = 0xE0
+MODIFIER_LAST = 0xE7
+# The remaining six keys go into bytes 2-7
+KEYS_START = 2
+REPORT_LENGTH = 8
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+
+class KeyboardReport:
+    def __init__(self, devices):
+        self.device = find_device(devices, usage_page=0x1, usage=0x06)
+        self.report = bytearray(REPORT_LENGTH)
+        self.sent = bytearray(REPORT_LENGTH)
+
+        # Reports sent in total and in the last full second
+        self.reports_sent = 0
+        self.reports_per_second = 0
+        self.window_reports = 0
+        self.window_start = ticks_ms()
+
+    def press(self, keycode):
+        report = self.report
+        if MODIFIER_FIRST <= keycode <= MODIFIER_LAST:
+            report[0] |= 1 << (keycode - MODIFIER_FIRST)
+            return
+
+        free = 0
+        for i in range(KEYS_START, REPORT_LENGTH):
+            if report[i] == keycode:
+                return
+            if not free and not report[i]:
+                free = i
+        # More than six keys held down, drop the new one
+        if free:
+            report[free] = keycode
+
+    def release(self, keycode):
+        report = self.report
+        if MODIFIER_FIRST <= keycode <= MODIFIER_LAST:
+            report[0] &= ~(1 << (keycode - MODIFIER_FIRST))
+            return
+
+        for i in range(KEYS_START, REPORT_LENGTH):
+            if report[i] == keycode:
+                report[i] = 0
+
+    def release_all(self):
+        for i in range(REPORT_LENGTH):
+            self.report[i] = 0
+
+    # Send the report if it changed since the last one that was sent.
+    # Returns True if a report was sent.
+    def send(self):
+        now = ticks_ms()
+        if (now - self.window_start) & TICKS_MASK >= 1000:
+            self.reports_per_second = self.window_reports
+            self.window_reports = 0
+            self.window_start = now
+
+        if self.report == self.sent:
+            return False
+
+        self.device.send_report(self.report)
+        for i in range(REPORT_LENGTH):
+            self.sent[i] = self.report[i]
+        self.reports_sent += 1
+        self.window_reports += 1
+        return True
@@ -0,0 +1,160 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# One frame across all IS31FL3743 controllers of a module, e.g. both halves of
+# the RGB keyboard (0x20 and 0x23).
+#
+# Draw the whole frame in RAM, then show() diffs it against the frame that was
+# last sent and writes only the changed spans, in auto-increment block writes.
+# Both controllers are flushed back to back, so the halves of the keyboard
+# change together instead of one after the other.
+#
+# Brightness goes through the global current register of each controller,
+# which is one write per controller instead of rewriting every PWM register.
+#
+# LED index N is LED N % 198 of controller N // 198.
+#
+# Usage:
+#   frame = KeyboardFrame(is31_controllers)
+#   frame.fill(0xFF)
+#   frame.show()
+
+LEDS_PER_CONTROLLER = 18 * 11
+# LED N is at PWM register N + 1 on page 0
+PWM_PAGE = 0
+PWM_REGISTER_OFFSET = 0x01
+# Unchanged registers between two changed ones that are still sent along
+# instead of starting a new transaction
+SPAN_GAP = 4
+
+
+class KeyboardFrame:
+    def __init__(self, controllers, leds_per_controller=LEDS_PER_CONTROLLER):
+        self.controllers = controllers
+        self.leds_per_controller = leds_per_controller
+        self.count = len(controllers) * leds_per_controller
+        # Number of show_part() calls a show() consists of, one per controller
+        self.parts = len(controllers)
+
+        # Per controller, LED N at offset N + 1. Byte 0 is room for the
+        # register address of a block write.
+        self.frames = [bytearray(1 + leds_per_controller) for _ in controllers]
+        # What the controllers currently show
+        self.sent = [bytearray(1 + leds_per_controller) for _ in controllers]
+        # Changed LED range per controller, start > end if clean
+        self.dirty_start = [leds_per_controller] * len(controllers)
+        self.dirty_end = [0] * len(controllers)
+
+        self._brightness = 0xFF
+        # LED scaling of all LEDs, None until set_scaling()
+        self.scaling = None
+
+        # Transactions and bytes written by the last show()
+        self.transactions = 0
+        self.bytes_written = 0
+
+    def __setitem__(self, index, value):
+        controller = index // self.leds_per_controller
+        led = index - controller * self.leds_per_controller
+        frame = self.frames[controller]
+        if frame[led + 1] == value:
+            return
+        frame[led + 1] = value
+        if led < self.dirty_start[controller]:
+            self.dirty_start[controller] = led
+        if led > self.dirty_end[controller]:
+            self.dirty_end[controller] = led
+
+    def __getitem__(self, index):
+        controller = index // self.leds_per_controller
+        led = index - controller * self.leds_per_controller
+        return self.frames[controller][led + 1]
+
+    def fill(self, value):
+        for index in range(self.count):
+            self[index] = value
+
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        if value == self._brightness:
+            return
+        self._brightness = value
+        for is31 in self.controllers:
+            is31.global_current = value
+
+    # Same scaling for all LEDs, one block write per controller
+    def set_scaling(self, value):
+        self.scaling = value
+        for is31 in self.controllers:
+            is31.set_led_scaling(value)
+
+    # Write everything again after the controllers were shut down, e.g. with
+    # SDB: scaling, brightness and the whole frame, one block write each
+    def restore(self):
+        for controller in range(self.parts):
+            is31 = self.controllers[controller]
+            if self.scaling is not None:
+                is31.set_led_scaling(self.scaling)
+            is31.global_current = self._brightness
+            self._write_span(controller, 0, self.leds_per_controller - 1)
+            self.dirty_start[controller] = self.leds_per_controller
+            self.dirty_end[controller] = 0
+            is31.enable = True
+
+    # Write the changed spans of all controllers
+    def show(self):
+        self.transactions = 0
+        self.bytes_written = 0
+        for controller in range(self.parts):
+            self.show_part(controller)
+
+    # Write the changed spans of one controller.
+    # Lets a caller flush a frame in steps and do other work in between.
+    def show_part(self, controller):
+        start = self.dirty_start[controller]
+        end = self.dirty_end[controller]
+        if start > end:
+            return
+        self._flush(controller, start, end)
+        self.dirty_start[controller] = self.leds_per_controller
+        self.dirty_end[controller] = 0
+
+    def _flush(self, controller, start, end):
+        frame = self.frames[controller]
+        sent = self.sent[controller]
+        span_start = -1
+        span_end = -1
+        for led in range(start, end + 1):
+            if frame[led + 1] == sent[led + 1]:
+                continue
+            if span_start >= 0 and led - span_end > SPAN_GAP:
+                self._write_span(controller, span_start, span_end)
+                span_start = -1
+            if span_start < 0:
+                span_start = led
+            span_end = led
+        if span_start >= 0:
+            self._write_span(controller, span_start, span_end)
+
+    def _write_span(self, controller, start, end):
+        is31 = self.controllers[controller]
+        frame = self.frames[controller]
+        sent = self.sent[controller]
+        is31.page(PWM_PAGE)
+
+        # Put the start register in front of the span. The byte belongs to
+        # LED start - 1 (or is unused), restore it after the write.
+        saved = frame[start]
+        frame[start] = start + PWM_REGISTER_OFFSET
+        with is31.i2c_device as i2c:
+            i2c.write(frame, start=start, end=end + 2)
+        frame[start] = saved
+
+        for i in range(start + 1, end + 2):
+            sent[i] = frame[i]
+        self.transactions += 1
+        self.bytes_written += end - start + 2
@@ -0,0 +1,52 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Compile the nested MATRIX/keymap/LED tables of the keyscan scripts into
+# flat arrays, indexed by matrix position col * rows + row, the same index
+# KeyMatrix and Debouncer use.
+#
+# Resolving a key is then a single array lookup instead of
+# MATRIX[row][col] -> (x, y) -> KEYMAP[y][x]. Once compiled, the nested lists
+# can be deleted to free their heap.
+#
+# Pure Python, so it also runs on the host.
+#
+# Usage:
+#   keymap = Keymap(MATRIX, MACROPAD_KEYMAP, MATRIX_COLS, MATRIX_ROWS, MATRIX_LED_MAP)
+#   code = keymap.keycodes[col * MATRIX_ROWS + row]
+from array import array
+
+# Flags per key
+KEY_MAPPED = 0x01
+KEY_LED = 0x02
+
+NO_LED = 0xFFFF
+
+
+class Keymap:
+    # matrix: MATRIX[row][col] -> (x, y) or None
+    # keymap: KEYMAP[y][x] -> keycode or None
+    # led_map: Optional LED_MAP[row][col] -> base LED index or None
+    def __init__(self, matrix, keymap, cols, rows, led_map=None):
+        self.cols = cols
+        self.rows = rows
+        self.keycodes = bytearray(cols * rows)
+        self.leds = array("H", [NO_LED] * (cols * rows))
+        self.flags = bytearray(cols * rows)
+
+        for row in range(rows):
+            for col in range(cols):
+                key = col * rows + row
+                if led_map and led_map[row][col] is not None:
+                    self.leds[key] = led_map[row][col]
+                    self.flags[key] |= KEY_LED
+
+                position = matrix[row][col]
+                if not position:
+                    continue
+                (x, y) = position
+                code = keymap[y][x]
+                if not code:
+                    continue
+                self.keycodes[key] = code
+                self.flags[key] |= KEY_MAPPED
@@ -0,0 +1,360 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Full-matrix keyscan for the analog key matrix of the input modules.
+#
+# Every pass reads all KSO/MUX positions instead of stopping at the first
+# pressed key, so chords and fast rolls don't drop keys.
+#
+# The key state is a bitmap with one byte per column, bit N is set if row N is
+# pressed. After each pass `changed` holds the XOR against the previous pass,
+# so callers only have to look at the keys that were pressed or released.
+# If a Debouncer is passed in, state and changed are the debounced values.
+#
+# Samples are compared against per-key thresholds in raw 16-bit ADC units, so
+# there's no float math in the scan. calibrate() measures every key's idle
+# level at boot and derives its press threshold from it. A key has to rise
+# above a slightly higher release threshold to count as released again.
+#
+# Rapid trigger (rapid_trigger > 0, in volts): after the first press at the
+# threshold, a held key is released as soon as it comes up by rapid_trigger
+# from the deepest point it reached, and pressed again as soon as it goes down
+# by rapid_trigger from the highest point since the release. Only a key that
+# comes all the way up (above its release threshold) needs the threshold
+# again. The deepest/highest reading per key is kept in `extremes`.
+#
+# Optional filtering against ADC noise, in integer math:
+# - oversample: Average this many readings per key. If the first reading is
+#   more than early_exit (volts) away from the key's threshold, the others
+#   are skipped, only keys near the threshold cost extra reads.
+# - filter: FILTER_EMA smooths each key over passes (new = old + diff / 4),
+#   FILTER_MEDIAN takes the median of the key's last three readings.
+# keyscan_benchmark.py reports what each setting costs per pass.
+#
+# The scan order is precomputed in `schedule`: per column the rows are visited
+# in Gray code order of their MUX index, and every other column in reverse, so
+# only one MUX select line changes per sample and none between columns. Each
+# entry is (row, MUX pins to flip), MUX pins that don't change aren't written.
+#
+# Usage:
+#   keys = KeyMatrix(kso_pins, (mux_a, mux_b, mux_c), adc_in, 8, 4)
+#   while True:
+#       if keys.scan():
+#           for col in range(keys.cols):
+#               changed = keys.changed[col]
+#               ...
+
+from array import array
+from supervisor import ticks_ms
+
+ADC_THRESHOLD = 2.9
+# A pressed key must rise this much above its press threshold to be released
+ADC_HYSTERESIS = 0.05
+# In extremes: The key came all the way up, the next press is at the threshold
+FULLY_UP = 0xFFFF
+
+FILTER_NONE = 0
+FILTER_EMA = 1
+FILTER_MEDIAN = 2
+# FILTER_EMA weight of a new reading, 1 / 2**EMA_SHIFT
+EMA_SHIFT = 2
+# Oversampling stops after the first reading if it's this far from the threshold
+EARLY_EXIT = 0.2
+
+# The MUX inputs aren't wired in row order
+MUX_ROW_MAP = bytes([2, 0, 1, 3, 4, 5, 6, 7])
+# 3-bit Gray code, consecutive entries differ in one bit
+MUX_GRAY_ORDER = bytes([0, 1, 3, 2, 6, 7, 5, 4])
+
+
+def to_voltage(adc_sample):
+    return (adc_sample * 3.3) / 65536
+
+
+def to_raw(voltage):
+    return min(int(voltage * 65536 / 3.3), 0xFFFF)
+
+
+# Build the scan order for a matrix.
+# Returns a bytearray of (row, MUX pins to flip) pairs, one per key, grouped by column.
+def build_schedule(cols, rows):
+    mux_rows = list(MUX_ROW_MAP[:rows])
+    order = [mux_rows.index(index) for index in MUX_GRAY_ORDER if index in mux_rows]
+
+    schedule = bytearray(cols * rows * 2)
+    for col in range(cols):
+        rows_in_order = order if col % 2 == 0 else order[::-1]
+        for i, row in enumerate(rows_in_order):
+            schedule[(col * rows + i) * 2] = row
+
+    # The first entry flips relative to the last one of the previous pass
+    prev = MUX_ROW_MAP[schedule[-2]]
+    for i in range(0, len(schedule), 2):
+        index = MUX_ROW_MAP[schedule[i]]
+        schedule[i + 1] = prev ^ index
+        prev = index
+    return schedule
+
+
+# GPIO writes needed for one pass over a schedule
+def schedule_writes(schedule, cols):
+    writes = cols * 2  # Every column is driven low and back high
+    for i in range(1, len(schedule), 2):
+        flip = schedule[i]
+        writes += (flip & 1) + (flip >> 1 & 1) + (flip >> 2 & 1)
+    return writes
+
+
+class KeyMatrix:
+    def __init__(
+        self,
+        kso_pins,
+        mux_pins,
+        adc_in,
+        cols,
+        rows,
+        threshold=ADC_THRESHOLD,
+        debouncer=None,
+        hysteresis=ADC_HYSTERESIS,
+        rapid_trigger=0,
+        oversample=1,
+        filter=FILTER_NONE,
+        early_exit=EARLY_EXIT,
+    ):
+        self.kso_pins = kso_pins
+        (self.mux_a, self.mux_b, self.mux_c) = mux_pins
+        self.adc_in = adc_in
+        self.cols = cols
+        self.rows = rows
+        self.debouncer = debouncer
+
+        # Thresholds in raw ADC units, indexed by col * rows + row
+        self.threshold = to_raw(threshold)
+        self.hysteresis = to_raw(hysteresis)
+        self.press_thresholds = array("H", [self.threshold] * (cols * rows))
+        self.release_thresholds = array(
+            "H", [min(self.threshold + self.hysteresis, 0xFFFF)] * (cols * rows)
+        )
+
+        # Rapid trigger distance in raw ADC units, 0 if off
+        self.rapid = to_raw(rapid_trigger)
+        # Per key, deepest reading while held, highest since the release
+        self.extremes = array("H", [FULLY_UP] * (cols * rows))
+
+        # Noise filtering, per key history for the filters
+        self.oversample = oversample
+        self.filter = filter
+        self.early_exit = to_raw(early_exit)
+        self.filtering = oversample > 1 or filter != FILTER_NONE
+        history = 2 if filter == FILTER_MEDIAN else 1
+        self.history = array("H", [FULLY_UP] * (cols * rows * history))
+
+        # One byte per column, bit N for row N
+        self.state = bytearray(cols)
+        self.changed = bytearray(cols)
+        # Undebounced state of the last pass, to pick the threshold per key
+        self.raw = bytearray(cols)
+        # Any key was down or bouncing in the last pass
+        self.active = False
+
+        # Columns are active low, keep all of them idle between passes
+        for col in range(cols):
+            kso_pins[col].value = True
+
+        self.schedule = build_schedule(cols, rows)
+        # MUX index selected at the end of a pass, so the first entry's flips apply
+        self.start_mux = MUX_ROW_MAP[self.schedule[-2]]
+        self.mux_index = 0
+        self.select_mux(self.start_mux)
+
+    def select_mux(self, index):
+        self.mux_index = index
+        self.mux_a.value = index & 0x01
+        self.mux_b.value = index & 0x02
+        self.mux_c.value = index & 0x04
+
+    def select_row(self, row):
+        self.select_mux(MUX_ROW_MAP[row])
+
+    # Scan the whole matrix once.
+    # Returns True if any key was pressed or released since the last pass.
+    def scan(self):
+        state = self.state
+        changed = self.changed
+        debouncer = self.debouncer
+        now = ticks_ms() if debouncer else 0
+        any_changed = False
+        active = False
+
+        adc_in = self.adc_in
+        press_thresholds = self.press_thresholds
+        release_thresholds = self.release_thresholds
+        rapid = self.rapid
+        filtering = self.filtering
+        rows = self.rows
+        schedule = self.schedule
+        mux_a = self.mux_a
+        mux_b = self.mux_b
+        mux_c = self.mux_c
+
+        # select_row() was used in between (e.g. by calibrate)
+        if self.mux_index != self.start_mux:
+            self.select_mux(self.start_mux)
+
+        for col in range(self.cols):
+            kso = self.kso_pins[col]
+            kso.value = False
+
+            raw = self.raw[col]
+            key = col * rows
+            bits = 0
+            mux = self.mux_index
+            for i in range(key * 2, (key + rows) * 2, 2):
+                row = schedule[i]
+                flip = schedule[i + 1]
+                if flip:
+                    mux ^= flip
+                    if flip & 0x01:
+                        mux_a.value = mux & 0x01
+                    if flip & 0x02:
+                        mux_b.value = mux & 0x02
+                    if flip & 0x04:
+                        mux_c.value = mux & 0x04
+                bit = 1 << row
+                value = adc_in.value
+                if filtering:
+                    value = self._filter(key + row, raw & bit, value)
+                if rapid:
+                    if self._rapid_trigger(key + row, raw & bit, value):
+                        bits |= bit
+                elif raw & bit:
+                    if value < release_thresholds[key + row]:
+                        bits |= bit
+                elif value < press_thresholds[key + row]:
+                    bits |= bit
+
+            kso.value = True
+            self.mux_index = mux
+            self.raw[col] = bits
+            if bits:
+                active = True
+
+            if debouncer:
+                bits = debouncer.update(col, bits, state[col], now)
+            diff = bits ^ state[col]
+            changed[col] = diff
+            state[col] = bits
+            if diff:
+                any_changed = True
+
+        self.active = active or any_changed
+        return any_changed
+
+    # Oversample and filter the reading of one key
+    def _filter(self, key, pressed, value):
+        oversample = self.oversample
+        if oversample > 1:
+            if pressed:
+                distance = value - self.release_thresholds[key]
+            else:
+                distance = value - self.press_thresholds[key]
+            if -self.early_exit < distance < self.early_exit:
+                total = value
+                adc_in = self.adc_in
+                for _ in range(oversample - 1):
+                    total += adc_in.value
+                value = total // oversample
+
+        history = self.history
+        if self.filter == FILTER_EMA:
+            previous = history[key]
+            value = previous + ((value - previous) >> EMA_SHIFT)
+            history[key] = value
+        elif self.filter == FILTER_MEDIAN:
+            # Last two readings of key N at 2N and 2N + 1
+            a = history[2 * key]
+            b = history[2 * key + 1]
+            history[2 * key + 1] = a
+            history[2 * key] = value
+            if a > b:
+                (a, b) = (b, a)
+            if value < a:
+                value = a
+            elif value > b:
+                value = b
+        return value
+
+    # Rapid trigger state of one key, returns True if it's pressed
+    def _rapid_trigger(self, key, pressed, value):
+        extremes = self.extremes
+        extreme = extremes[key]
+        if pressed:
+            # Follow the key down, release once it came up by rapid
+            if value < extreme:
+                extremes[key] = value
+                return True
+            if value - extreme < self.rapid:
+                return True
+            extremes[key] = value
+            return False
+
+        if extreme == FULLY_UP:
+            if value < self.press_thresholds[key]:
+                extremes[key] = value
+                return True
+            return False
+        if value >= self.release_thresholds[key]:
+            extremes[key] = FULLY_UP
+            return False
+        # Follow the key up, press again once it went down by rapid
+        if value > extreme:
+            extremes[key] = value
+            return False
+        if extreme - value >= self.rapid:
+            extremes[key] = value
+            return True
+        return False
+
+    # Change the rapid trigger distance in volts, 0 to turn it off
+    def set_rapid_trigger(self, rapid_trigger):
+        self.rapid = to_raw(rapid_trigger)
+        for key in range(self.cols * self.rows):
+            self.extremes[key] = FULLY_UP
+
+    def is_pressed(self, col, row):
+        return bool(self.state[col] & (1 << row))
+
+    # Number of keys currently held down
+    def pressed_count(self):
+        count = 0
+        for col in range(self.cols):
+            bits = self.state[col]
+            while bits:
+                bits &= bits - 1
+                count += 1
+        return count
+
+    # Measure the idle level of every key and set its thresholds relative to it.
+    # Keys must not be pressed while calibrating. Keys that read below the
+    # default threshold (held down or faulty) keep the default.
+    def calibrate(self, samples=16):
+        rows = self.rows
+        sums = array("L", [0] * (self.cols * rows))
+        for _ in range(samples):
+            for col in range(self.cols):
+                kso = self.kso_pins[col]
+                kso.value = False
+                for row in range(rows):
+                    self.select_row(row)
+                    sums[col * rows + row] += self.adc_in.value
+                kso.value = True
+
+        # Same ratio to the idle level as the default threshold has to 3.3V
+        ratio = self.threshold / 0xFFFF
+        for key, total in enumerate(sums):
+            baseline = total // samples
+            if baseline < self.threshold:
+                continue
+            threshold = int(baseline * ratio)
+            self.press_thresholds[key] = threshold
+            self.release_thresholds[key] = min(threshold + self.hysteresis, 0xFFFF)
@@ -0,0 +1,231 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Measure how long a scan pass takes on the macropad or numpad.
+# Compares the old single-key matrix_scan(), a full-matrix scan through the
+# old mux_select_row()/drive_col() path and KeyMatrix with its Gray code
+# scan schedule.
+#
+# Then the ADC noise filter settings of KeyMatrix, with the extra time per
+# pass each of them costs over KeyMatrix without filtering.
+#
+# Last, KeyMatrix with 8 rows and more and more columns, up to the 16x8
+# matrix of the keyboards. The time per column should stay the same. Every
+# pass of them is also timed on its own against SCAN_BUDGET_US, the slowest
+# pass and the passes over it are printed. The 16 column pass should stay
+# within it.
+#
+# Save as code.py and watch the serial console. Results are in microseconds
+# per pass, averaged over PASSES passes.
+import time
+import board
+import digitalio
+import analogio
+from keyscan import KeyMatrix, schedule_writes, to_raw, to_voltage
+from keyscan import FILTER_NONE, FILTER_EMA, FILTER_MEDIAN
+
+MATRIX_COLS = 8
+MATRIX_ROWS = 4
+
+ADC_THRESHOLD = 2.9
+PASSES = 500
+# Keyboards: 16x8 in 1ms for a 1kHz scan rate
+SCAN_BUDGET_US = 1000
+SCALING_ROWS = 8
+SCALING_COLS = (4, 8, 12, 16)
+
+# (name, oversample, filter)
+FILTER_SETTINGS = (
+    ("oversample 2", 2, FILTER_NONE),
+    ("oversample 4", 4, FILTER_NONE),
+    ("ema", 1, FILTER_EMA),
+    ("median", 1, FILTER_MEDIAN),
+    ("oversample 2 + median", 2, FILTER_MEDIAN),
+)
+
+# Set unused pins to input to avoid interfering. They're hooked up to rows 5 and 6
+gp6 = digitalio.DigitalInOut(board.GP6)
+gp6.direction = digitalio.Direction.INPUT
+gp7 = digitalio.DigitalInOut(board.GP7)
+gp7.direction = digitalio.Direction.INPUT
+
+# Set up analog MUX pins
+mux_enable = digitalio.DigitalInOut(board.MUX_ENABLE)
+mux_enable.direction = digitalio.Direction.OUTPUT
+mux_enable.value = False  # Low to enable it
+mux_a = digitalio.DigitalInOut(board.MUX_A)
+mux_a.direction = digitalio.Direction.OUTPUT
+mux_b = digitalio.DigitalInOut(board.MUX_B)
+mux_b.direction = digitalio.Direction.OUTPUT
+mux_c = digitalio.DigitalInOut(board.MUX_C)
+mux_c.direction = digitalio.Direction.OUTPUT
+
+# Set up KSO pins, KSO8 - KSO15 only for the column scaling
+kso_pins = [
+    digitalio.DigitalInOut(x)
+    for x in [
+        board.KSO0,
+        board.KSO1,
+        board.KSO2,
+        board.KSO3,
+        board.KSO4,
+        board.KSO5,
+        board.KSO6,
+        board.KSO7,
+        board.KSO8,
+        board.KSO9,
+        board.KSO10,
+        board.KSO11,
+        board.KSO12,
+        board.KSO13,
+        board.KSO14,
+        board.KSO15,
+    ]
+]
+for kso in kso_pins:
+    kso.direction = digitalio.Direction.OUTPUT
+adc_in = analogio.AnalogIn(board.GP28)
+
+
+# The scan path the keyscan scripts used before KeyMatrix.
+# Stops at the first pressed key.
+def mux_select_row(row):
+    index = 0
+    if row == 0:
+        index = 2
+    elif row == 1:
+        index = 0
+    elif row == 2:
+        index = 1
+    else:
+        index = row
+
+    mux_a.value = index & 0x01
+    mux_b.value = index & 0x02
+    mux_c.value = index & 0x04
+
+
+def drive_col(col, value):
+    kso_pins[col].value = value
+
+
+def matrix_scan():
+    matrix_pos = None
+    for col in range(MATRIX_COLS):
+        drive_col(col, True)
+
+    for col in range(MATRIX_COLS):
+        drive_col(col, False)
+
+        for row in range(MATRIX_ROWS):
+            mux_select_row(row)
+
+            voltage = to_voltage(adc_in.value)
+            if voltage < ADC_THRESHOLD:
+                matrix_pos = (col, row)
+                break
+
+        drive_col(col, True)
+    return matrix_pos
+
+
+# Full matrix through mux_select_row()/drive_col(), without the float math
+def select_scan():
+    threshold = to_raw(ADC_THRESHOLD)
+    pressed = 0
+    for col in range(MATRIX_COLS):
+        drive_col(col, True)
+
+    for col in range(MATRIX_COLS):
+        drive_col(col, False)
+        for row in range(MATRIX_ROWS):
+            mux_select_row(row)
+            if adc_in.value < threshold:
+                pressed += 1
+        drive_col(col, True)
+    return pressed
+
+
+def bench(name, scan, base_us=None):
+    start = time.monotonic_ns()
+    for _ in range(PASSES):
+        scan()
+    elapsed = time.monotonic_ns() - start
+    us = elapsed // PASSES // 1000
+    if base_us is None:
+        print(f"{name}: {us} us/pass")
+    else:
+        print(f"{name}: {us} us/pass, {us - base_us:+} us")
+    return us
+
+
+# Time every pass on its own, slowest pass in us and passes over the budget
+def budget_check(scan):
+    slowest = 0
+    over = 0
+    for _ in range(PASSES):
+        start = time.monotonic_ns()
+        scan()
+        us = (time.monotonic_ns() - start) // 1000
+        if us > slowest:
+            slowest = us
+        if us > SCAN_BUDGET_US:
+            over += 1
+    return slowest, over
+
+
+keys = KeyMatrix(
+    kso_pins, (mux_a, mux_b, mux_c), adc_in, MATRIX_COLS, MATRIX_ROWS, ADC_THRESHOLD
+)
+
+# GPIO writes per full pass
+select_writes = MATRIX_COLS + MATRIX_COLS * 2 + MATRIX_COLS * MATRIX_ROWS * 3
+print(f"mux_select_row()/drive_col(): {select_writes} GPIO writes/pass")
+keymatrix_writes = schedule_writes(keys.schedule, MATRIX_COLS)
+print(f"KeyMatrix schedule: {keymatrix_writes} GPIO writes/pass")
+
+filtered = [
+    (
+        name,
+        KeyMatrix(
+            kso_pins,
+            (mux_a, mux_b, mux_c),
+            adc_in,
+            MATRIX_COLS,
+            MATRIX_ROWS,
+            ADC_THRESHOLD,
+            oversample=oversample,
+            filter=filter,
+        ),
+    )
+    for (name, oversample, filter) in FILTER_SETTINGS
+]
+scaling = [
+    KeyMatrix(
+        kso_pins,
+        (mux_a, mux_b, mux_c),
+        adc_in,
+        cols,
+        SCALING_ROWS,
+        ADC_THRESHOLD,
+    )
+    for cols in SCALING_COLS
+]
+
+while True:
+    bench("single-key matrix_scan()", matrix_scan)
+    bench("full-matrix mux_select_row()/drive_col()", select_scan)
+    base_us = bench("full-matrix KeyMatrix.scan()", keys.scan)
+    for name, filtered_keys in filtered:
+        bench(f"KeyMatrix.scan() {name}", filtered_keys.scan, base_us)
+    for scaled in scaling:
+        us = bench(f"KeyMatrix.scan() {scaled.cols}x{scaled.rows}", scaled.scan)
+        print(f"  {us // scaled.cols} us/column")
+        slowest, over = budget_check(scaled.scan)
+        result = "OK" if over == 0 else "OVER"
+        print(
+            f"  slowest pass {slowest} us, {over}/{PASSES} passes over "
+            + f"{SCAN_BUDGET_US} us: {result}"
+        )
+    print()
+    time.sleep(2)
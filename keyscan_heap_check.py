@@ -0,0 +1,53 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Check that the keyscan loop of the macropad doesn't allocate.
+#
+# Imports macropad_keyscan.py, which sets everything up but doesn't loop when
+# it's not code.py, and runs its scan_pass() for PASSES passes with the
+# garbage collector disabled. That's the real loop: power.poll(), scan,
+# keymap lookup, HID report, LEDs, stats and the scheduler's wait.
+# gc.mem_free() is compared before and after every CHECK_PASSES passes. Any
+# allocation, also garbage that would be collected later, shows up as less
+# free memory.
+#
+# Passes that collect themselves (idle point, wake-up, see Stats.collect())
+# free memory, the passes measured together with them are skipped and
+# counted. Everything else they run is the same as in the other passes.
+#
+# Save as code.py on the macropad, with macropad_keyscan.py next to it, and
+# press some keys while it runs. The scheduler slows down while the keys are
+# idle, so it takes up to PASSES * 20ms. The result is printed on the serial
+# console. tools/heap_check.py runs it in the simulator.
+import gc
+from stats import GC_COLLECTIONS, HID_REPORTS
+from macropad_keyscan import scan_pass, stats
+
+# Passes before measuring, so everything that's allocated once already is,
+# including bringing up the LEDs after the first pass
+WARMUP_PASSES = 100
+PASSES = 2000
+CHECK_PASSES = 20
+
+for _ in range(WARMUP_PASSES):
+    scan_pass()
+
+gc.collect()
+gc.disable()
+allocated = 0
+skipped = 0
+for _ in range(PASSES // CHECK_PASSES):
+    collections = stats.counters[GC_COLLECTIONS]
+    free = gc.mem_free()
+    for _ in range(CHECK_PASSES):
+        scan_pass()
+    if stats.counters[GC_COLLECTIONS] == collections:
+        allocated += free - gc.mem_free()
+    else:
+        skipped += CHECK_PASSES
+gc.enable()
+
+print(f"{allocated} bytes allocated in {PASSES - skipped} passes")
+print(f"{skipped} passes skipped, gc.collect() ran in between")
+print(f"{stats.counters[HID_REPORTS]} HID reports")
+print("OK" if allocated <= 0 else "FAIL")
@@ -0,0 +1,46 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Play an animation file from the CIRCUITPY drive on the LED matrix, in a loop.
+# Create it with tools/matrix_anim_encode.py.
+#
+# Dependencies:
+# On the CIRCUITPY drive
+# - Save this file as code.py
+# - Copy the animation next to it as animation.fma
+# - Copy matrix_animation.py, matrix_framebuffer.py and matrix_mapping.py next to it
+# - In the lib folder, like for led_matrix.py:
+#   - adafruit_bus_device
+#   - adafruit_is31fl3741
+#   - adafruit_register
+import time
+import board
+import busio
+import digitalio
+from adafruit_is31fl3741 import IS31FL3741
+from matrix_framebuffer import MatrixFramebuffer
+from matrix_animation import AnimationPlayer
+
+ANIMATION = "animation.fma"
+
+# Enable LED Matrix via SDB pin
+sdb = digitalio.DigitalInOut(board.GP29)
+sdb.direction = digitalio.Direction.OUTPUT
+sdb.value = True
+
+i2c = busio.I2C(board.SCL, board.SDA)  # Or board.I2C()
+is31 = IS31FL3741(i2c, address=0x30)
+
+is31.set_led_scaling(int(0xFF / 4))  # Quarter brightness
+is31.global_current = 0xFF  # set current to max
+is31.enable = True
+
+player = AnimationPlayer(ANIMATION, MatrixFramebuffer(is31))
+print(
+    f"{ANIMATION}: {player.frame_count} frames, {player.file_size} bytes, "
+    + f"{player.saved_percent()}% smaller than raw frames"
+)
+
+while True:
+    player.tick()
+    time.sleep(player.wait_ms() / 1000)
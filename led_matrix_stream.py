@@ -0,0 +1,51 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Show frames streamed from the host on the LED matrix.
+# Send them with tools/matrix_stream_send.py, see matrix_stream.py for the format.
+#
+# Dependencies:
+# On the CIRCUITPY drive
+# - Save this file as code.py
+# - Copy boot.py next to it, it enables the USB CDC data channel
+# - Copy matrix_stream.py, matrix_framebuffer.py and matrix_mapping.py next to it
+# - In the lib folder, like for led_matrix.py:
+#   - adafruit_bus_device
+#   - adafruit_is31fl3741
+#   - adafruit_register
+import time
+import board
+import busio
+import digitalio
+import usb_cdc
+from adafruit_is31fl3741 import IS31FL3741
+from matrix_framebuffer import MatrixFramebuffer
+from matrix_stream import FrameReceiver
+
+DEBUG = False
+
+if usb_cdc.data is None:
+    raise RuntimeError("USB CDC data channel not enabled, copy boot.py and reset")
+
+# Enable LED Matrix via SDB pin
+sdb = digitalio.DigitalInOut(board.GP29)
+sdb.direction = digitalio.Direction.OUTPUT
+sdb.value = True
+
+i2c = busio.I2C(board.SCL, board.SDA)  # Or board.I2C()
+is31 = IS31FL3741(i2c, address=0x30)
+
+is31.set_led_scaling(int(0xFF / 4))  # Quarter brightness
+is31.global_current = 0xFF  # set current to max
+is31.enable = True
+
+fb = MatrixFramebuffer(is31)
+receiver = FrameReceiver(usb_cdc.data, fb)
+
+while True:
+    if receiver.poll():
+        if DEBUG:
+            print(f"Frame {receiver.frames}, {receiver.dropped} dropped")
+    else:
+        # Nothing complete yet, a frame at 30fps is due every 33ms
+        time.sleep(0.001)
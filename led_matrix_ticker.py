@@ -0,0 +1,49 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Scroll text up the LED matrix.
+#
+# Dependencies:
+# On the CIRCUITPY drive
+# - Save this file as code.py
+# - Copy matrix_text.py, matrix_framebuffer.py and matrix_mapping.py next to it
+# - In the lib folder, like for led_matrix.py:
+#   - adafruit_bus_device
+#   - adafruit_is31fl3741
+#   - adafruit_register
+#   - adafruit_bitmap_font, only with a FONT file
+import time
+import board
+import busio
+import digitalio
+from adafruit_is31fl3741 import IS31FL3741
+from matrix_framebuffer import MatrixFramebuffer
+from matrix_text import Ticker, Font3x5, BitmapFont
+
+TEXT = "FRAMEWORK 16"
+ROWS_PER_SECOND = 10
+# BDF/PCF font on the CIRCUITPY drive, None for the built-in 3x5 font
+FONT = None
+DEBUG = False
+
+# Enable LED Matrix via SDB pin
+sdb = digitalio.DigitalInOut(board.GP29)
+sdb.direction = digitalio.Direction.OUTPUT
+sdb.value = True
+
+i2c = busio.I2C(board.SCL, board.SDA)  # Or board.I2C()
+is31 = IS31FL3741(i2c, address=0x30)
+
+is31.set_led_scaling(int(0xFF / 4))  # Quarter brightness
+is31.global_current = 0xFF  # set current to max
+is31.enable = True
+
+font = BitmapFont(FONT) if FONT else Font3x5(scale=2)
+ticker = Ticker(MatrixFramebuffer(is31), font, TEXT, ROWS_PER_SECOND)
+
+while True:
+    ticker.tick()
+    if DEBUG and ticker.steps % 100 == 0:
+        cache = ticker.cache
+        print(f"{ticker.dropped} dropped, glyph cache {cache.hits}/{cache.misses}")
+    time.sleep(ticker.wait_ms() / 1000)
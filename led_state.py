@@ -0,0 +1,105 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Remember what's on an IS31FL3743 and only write the LEDs that change.
+#
+# set() and clear() only stage changes in RAM. show() writes the staged LEDs
+# whose value differs from what the controller has, so turning one key off and
+# another one on is two I2C writes instead of clearing all 198 LEDs.
+# Any number of set()/clear() calls can be batched into one show().
+#
+# Usage:
+#   leds = LedState(is31)
+#   leds.clear()
+#   leds.set(led, 0xFF)
+#   leds.show()
+from array import array
+
+LED_COUNT = 18 * 11
+
+
+class LedState:
+    def __init__(self, is31, count=LED_COUNT):
+        self.is31 = is31
+        self.count = count
+        # Staged values and what the controller currently has
+        self.frame = bytearray(count)
+        self.shadow = bytearray(count)
+
+        # Indices staged since the last show(), without duplicates
+        self.dirty = array("H", [0] * count)
+        self.dirty_count = 0
+        self.is_dirty = bytearray(count)
+
+        # Indices of the LEDs that are on
+        self.lit = array("H", [0] * count)
+        self.lit_count = 0
+
+        # LED writes done by the last show()
+        self.writes = 0
+
+    def set(self, index, value):
+        self.frame[index] = value
+        if not self.is_dirty[index]:
+            self.is_dirty[index] = 1
+            self.dirty[self.dirty_count] = index
+            self.dirty_count += 1
+
+    def get(self, index):
+        return self.frame[index]
+
+    def __setitem__(self, index, value):
+        self.set(index, value)
+
+    def __getitem__(self, index):
+        return self.frame[index]
+
+    # Set several LEDs to the same value
+    def set_many(self, indices, value):
+        for index in indices:
+            self.set(index, value)
+
+    # Turn off all LEDs
+    def clear(self):
+        for i in range(self.lit_count):
+            self.set(self.lit[i], 0)
+        for i in range(self.dirty_count):
+            self.frame[self.dirty[i]] = 0
+
+    # Write the staged LEDs that changed
+    def show(self):
+        self.writes = 0
+        for i in range(self.dirty_count):
+            index = self.dirty[i]
+            self.is_dirty[index] = 0
+            value = self.frame[index]
+            if value == self.shadow[index]:
+                continue
+
+            self.is31[index] = value
+            self.writes += 1
+            if not self.shadow[index]:
+                self.lit[self.lit_count] = index
+                self.lit_count += 1
+            elif not value:
+                self._unlit(index)
+            self.shadow[index] = value
+        self.dirty_count = 0
+
+    # Write all LEDs again after the controller was shut down, e.g. with SDB,
+    # in one block write. Staged changes are kept for the next show().
+    def restore(self):
+        buf = bytearray(1 + self.count)
+        # LED N is PWM register N + 1 on page 0
+        buf[0] = 0x01
+        buf[1:] = self.shadow
+        self.is31.page(0)
+        with self.is31.i2c_device as i2c:
+            i2c.write(buf)
+
+    def _unlit(self, index):
+        for i in range(self.lit_count):
+            if self.lit[i] == index:
+                self.lit_count -= 1
+                self.lit[i] = self.lit[self.lit_count]
+                return
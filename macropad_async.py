@@ -0,0 +1,238 @@
+# SPDX-FileCopyrightText: Daniel Schaefer 2023 for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Same as macropad_keyscan.py, but scanning, HID reports, LEDs and the
+# SLEEP# pin are separate tasks of the cooperative runtime in runtime.py.
+# Handle button pressed on the macropad
+# Send A-X key pressed
+# The pressed button will light up, cycling through RGB colors
+#
+# Set DEBUG = True to print the worst case latency of every task every 10s.
+import board
+import busio
+import digitalio
+import analogio
+import usb_hid
+from adafruit_hid.keycode import Keycode
+from keyscan import KeyMatrix
+from debounce import Debouncer, DEBOUNCE_ASYM
+from runtime import Runtime
+from hid_report import KeyboardReport
+from keymap import Keymap, KEY_LED
+from led_state import LedState
+from framework_is31fl3743 import IS31FL3743
+from startup import probe_i2c
+
+MATRIX_COLS = 8
+MATRIX_ROWS = 4
+
+ADC_THRESHOLD = 2.9
+# Report presses at once, releases after the key was up for 5ms
+DEBOUNCE_MODE = DEBOUNCE_ASYM
+DEBOUNCE_MS = 5
+DEBUG = False
+
+MATRIX = [
+    [(0, 1), (0, 2), (0, 3), (0, 4), (1, 1), (1, 2), (1, 3), (1, 4)],
+    [(0, 5), (2, 1), (2, 2), (2, 3), (2, 4), (2, 5), (3, 1), (3, 3)],
+    [(3, 5), (0, 0), (1, 0), None, (3, 0), (3, 2), (3, 4), (1, 5)],
+    [None, None, None, None, (2, 0), None, None, None],
+]
+MACROPAD_KEYMAP = [
+    [Keycode.A, Keycode.B, Keycode.C, Keycode.D],
+    [Keycode.E, Keycode.F, Keycode.G, Keycode.H],
+    [Keycode.I, Keycode.J, Keycode.K, Keycode.L],
+    [Keycode.M, Keycode.N, Keycode.O, Keycode.P],
+    [Keycode.Q, Keycode.R, Keycode.S, Keycode.T],
+    [Keycode.U, Keycode.V, Keycode.W, Keycode.X],
+]
+report = KeyboardReport(usb_hid.devices)
+
+# Set unused pins to input to avoid interfering. They're hooked up to rows 5 and 6
+gp6 = sleep_pin = digitalio.DigitalInOut(board.GP6)
+gp6.direction = digitalio.Direction.INPUT
+gp7 = sleep_pin = digitalio.DigitalInOut(board.GP7)
+gp7.direction = digitalio.Direction.INPUT
+
+# Set up analog MUX pins
+mux_enable = sleep_pin = digitalio.DigitalInOut(board.MUX_ENABLE)
+mux_enable.direction = digitalio.Direction.OUTPUT
+mux_enable.value = False  # Low to enable it
+mux_a = sleep_pin = digitalio.DigitalInOut(board.MUX_A)
+mux_a.direction = digitalio.Direction.OUTPUT
+mux_b = sleep_pin = digitalio.DigitalInOut(board.MUX_B)
+mux_b.direction = digitalio.Direction.OUTPUT
+mux_c = sleep_pin = digitalio.DigitalInOut(board.MUX_C)
+mux_c.direction = digitalio.Direction.OUTPUT
+
+# Set up KSO pins
+kso_pins = [
+    digitalio.DigitalInOut(x)
+    for x in [
+        # KSO0 - KSO7 for Keyboards and Numpad
+        board.KSO0,
+        board.KSO1,
+        board.KSO2,
+        board.KSO3,
+        board.KSO4,
+        board.KSO5,
+        board.KSO6,
+        board.KSO7,
+        # KSO8 - KSO15 for Keyboards only
+        board.KSO8,
+        board.KSO9,
+        board.KSO10,
+        board.KSO11,
+        board.KSO12,
+        board.KSO13,
+        board.KSO14,
+        board.KSO15,
+    ]
+]
+for kso in kso_pins:
+    kso.direction = digitalio.Direction.OUTPUT
+adc_in = analogio.AnalogIn(board.GP28)
+
+# Signal boot done
+boot_done = sleep_pin = digitalio.DigitalInOut(board.BOOT_DONE)
+boot_done.direction = digitalio.Direction.OUTPUT
+boot_done.value = False
+
+debouncer = Debouncer(MATRIX_COLS, MATRIX_ROWS, DEBOUNCE_MODE, DEBOUNCE_MS)
+keys = KeyMatrix(
+    kso_pins,
+    (mux_a, mux_b, mux_c),
+    adc_in,
+    MATRIX_COLS,
+    MATRIX_ROWS,
+    ADC_THRESHOLD,
+    debouncer,
+)
+# Don't touch the keys while booting
+keys.calibrate()
+
+# Enable LED controller via SDB pin
+sdb = digitalio.DigitalInOut(board.GP29)
+sdb.direction = digitalio.Direction.OUTPUT
+sdb.value = True
+
+i2c = busio.I2C(board.SCL, board.SDA)  # Or board.I2C()
+
+# Creating IS31FL3743 fails if the controller doesn't answer yet, wait for it
+probe_i2c(i2c, (0x20,))
+
+is31 = IS31FL3743(i2c)
+is31.set_led_scaling(0xFF)  # Full brightness
+is31.global_current = 0xFF  # Set current to max
+is31.enable = True
+leds = LedState(is31)
+
+# SLEEP# pin. Low if the host is sleeping
+sleep_pin = digitalio.DigitalInOut(board.GP0)
+sleep_pin.direction = digitalio.Direction.INPUT
+
+MATRIX_LED_MAP = [
+    [
+        4,
+        22,
+        58,
+        25,
+        1,
+        19,
+        55,
+        61,
+    ],
+    [
+        7,
+        16,
+        34,
+        70,
+        64,
+        46,
+        13,
+        67,
+    ],
+    [
+        10,
+        40,
+        37,
+        None,
+        49,
+        31,
+        28,
+        43,
+    ],
+    [
+        None,
+        None,
+        None,
+        None,
+        52,
+        None,
+        None,
+        None,
+    ],
+]
+
+color = 0  # 0 Blue, 1 Green, 2 Red
+# Flat lookup tables by matrix position, the nested tables aren't needed anymore
+keymap = Keymap(MATRIX, MACROPAD_KEYMAP, MATRIX_COLS, MATRIX_ROWS, MATRIX_LED_MAP)
+del MATRIX, MACROPAD_KEYMAP, MATRIX_LED_MAP
+
+
+def scan_step():
+    global color
+    # Only the keys that were pressed or released since the last pass are handled
+    if not keys.scan():
+        return
+    for col in range(MATRIX_COLS):
+        changed = keys.changed[col]
+        if not changed:
+            continue
+        key = col * MATRIX_ROWS
+        for row in range(MATRIX_ROWS):
+            code = keymap.keycodes[key + row]
+            if not changed & (1 << row) or not code:
+                continue
+            if keys.is_pressed(col, row):
+                leds.clear()
+                if keymap.flags[key + row] & KEY_LED:
+                    leds.set(keymap.leds[key + row] + color, 0xFF)
+                    color = (color + 1) % 3
+                report.press(code)
+            else:
+                report.release(code)
+
+
+def hid_step():
+    # One report for all keys that changed, none if nothing changed
+    report.send()
+
+
+def leds_step():
+    leds.show()
+
+
+host_awake = True
+
+
+def sleep_step():
+    global host_awake
+    if sleep_pin.value != host_awake:
+        host_awake = sleep_pin.value
+        is31.enable = host_awake
+
+
+def stats_step():
+    runtime.report()
+    runtime.reset_stats()
+
+
+runtime = Runtime()
+runtime.add("scan", scan_step, period_ms=1, priority=3)
+runtime.add("hid", hid_step, period_ms=1, priority=2)
+runtime.add("leds", leds_step, period_ms=20, priority=1)
+runtime.add("sleep", sleep_step, period_ms=50, priority=0)
+if DEBUG:
+    runtime.add("stats", stats_step, period_ms=10000, priority=0)
+runtime.run()
@@ -8,6 +8,10 @@ import board
 import busio
 import digitalio
 from framework_is31fl3743 import IS31FL3743
+from keyboard_frame import KeyboardFrame
+from animation import Animator, Cycle
+from power import PowerManager
+from startup import probe_i2c
 
 # Enable LED controller via SDB pin
 sdb = digitalio.DigitalInOut(board.GP29)
@@ -16,32 +20,25 @@ sdb.value = True
 
 i2c = busio.I2C(board.SCL, board.SDA)  # Or board.I2C()
 
-# TODO: If I don't scan the bus, creating IS31FL3743 can't find the device. Why...?
-i2c.try_lock()
-i2c.scan()
-i2c.unlock()
+# Creating IS31FL3743 fails if the controller doesn't answer yet, wait for it
+probe_i2c(i2c, (0x20,))
 
 is31 = IS31FL3743(i2c, address=0x20)
-is31.set_led_scaling(int(0xFF / 1))  # Full brightness
+frame = KeyboardFrame([is31])
+frame.set_scaling(int(0xFF / 1))  # Full brightness
 is31.global_current = 0xFF  # set current to max
 is31.enable = True
+# Change to a different color every second: red, blue, green, white
+animator = Animator(frame, Cycle(1000))
 
-# SLEEP# pin. Low if the host is sleeping
-sleep_pin = digitalio.DigitalInOut(board.GP0)
-sleep_pin.direction = digitalio.Direction.INPUT
+# Light sleep while SLEEP# is low, LED controller off via SDB.
+# The last frame is restored on wake-up.
+power = PowerManager(board.GP0, sdb, on_wake=frame.restore)
 
 # Keep in the script to keep the LED controller on
-color = 0
 while True:
-    is31.enable = sleep_pin.value
-
-    # Change to a different color every iteration
-    # 0 red
-    # 1 blue
-    # 2 green
-    # 3 white
-    # 4 black/off
-    color = (color + 1) % 4
-    for i in range(18 * 11):
-        is31[i] = 0xFF if color != 4 and color in (3, i % 3) else 0x00
-    time.sleep(1)
+    power.poll()
+
+    # Doesn't block, other work could go in this loop
+    animator.tick()
+    time.sleep(animator.wait_ms() / 1000)
@@ -4,20 +4,45 @@
 # Handle button pressed on the macropad
 # Send A-X key pressed
 # The pressed button will light up, cycling through RGB colors
-import time
+#
+# Fast boot: keys and HID come up first. BOOT_DONE is signaled after the first
+# scan pass, the LED controller is only set up after that.
+from startup import BootProfiler, probe_i2c
+import gc
 import board
-import busio
 import digitalio
 import analogio
 import usb_hid
-from adafruit_hid.keyboard import Keyboard
+import usb_cdc
 from adafruit_hid.keycode import Keycode
-from framework_is31fl3743 import IS31FL3743
+from keyscan import KeyMatrix, FILTER_NONE
+from debounce import Debouncer, DEBOUNCE_ASYM
+from scan_scheduler import ScanScheduler
+from hid_report import KeyboardReport
+from stats import Stats, HID_REPORTS, I2C_TRANSACTIONS, WAKE_MS, BOOT_MS
+from power import PowerManager
+from keymap import Keymap, KEY_LED
+
+profiler = BootProfiler()
+profiler.mark("imports")
 
 MATRIX_COLS = 8
 MATRIX_ROWS = 4
 
 ADC_THRESHOLD = 2.9
+# Report presses at once, releases after the key was up for 5ms
+DEBOUNCE_MODE = DEBOUNCE_ASYM
+DEBOUNCE_MS = 5
+# Rapid trigger distance in volts, e.g. 0.2. Keys release and re-press when they
+# move up/down this much, instead of only at ADC_THRESHOLD. 0 to turn it off.
+RAPID_TRIGGER = 0
+# ADC noise filtering, see keyscan.py. tools/keyscan_filters.py compares what
+# the settings cost against how well they filter.
+OVERSAMPLE = 1
+ADC_FILTER = FILTER_NONE
+# Time every pass for scan_max_us/scan_p99_us in the stats. Allocates two long
+# ints per pass, off to keep the loop free of allocations.
+SCAN_TIMING = False
 DEBUG = False
 
 MATRIX = [
@@ -34,7 +59,12 @@ MACROPAD_KEYMAP = [
     [Keycode.Q, Keycode.R, Keycode.S, Keycode.T],
     [Keycode.U, Keycode.V, Keycode.W, Keycode.X],
 ]
-keyboard = Keyboard(usb_hid.devices)
+report = KeyboardReport(usb_hid.devices)
+
+# Enable LED controller via SDB pin. Early, so it's up once it's set up.
+sdb = digitalio.DigitalInOut(board.GP29)
+sdb.direction = digitalio.Direction.OUTPUT
+sdb.value = True
 
 # Set unused pins to input to avoid interfering. They're hooked up to rows 5 and 6
 gp6 = sleep_pin = digitalio.DigitalInOut(board.GP6)
@@ -53,7 +83,7 @@ mux_b.direction = digitalio.Direction.OUTPUT
 mux_c = sleep_pin = digitalio.DigitalInOut(board.MUX_C)
 mux_c.direction = digitalio.Direction.OUTPUT
 
-# Set up KSO pins
+# Set up KSO pins, only the ones of the macropad's columns
 kso_pins = [
     digitalio.DigitalInOut(x)
     for x in [
@@ -75,93 +105,29 @@ kso_pins = [
         board.KSO13,
         board.KSO14,
         board.KSO15,
-    ]
+    ][:MATRIX_COLS]
 ]
 for kso in kso_pins:
     kso.direction = digitalio.Direction.OUTPUT
 adc_in = analogio.AnalogIn(board.GP28)
-
-# Signal boot done
-boot_done = sleep_pin = digitalio.DigitalInOut(board.BOOT_DONE)
-boot_done.direction = digitalio.Direction.OUTPUT
-boot_done.value = False
-
-
-def mux_select_row(row):
-    index = 0
-    if row == 0:
-        index = 2
-    elif row == 1:
-        index = 0
-    elif row == 2:
-        index = 1
-    else:
-        index = row
-
-    mux_a.value = index & 0x01
-    mux_b.value = index & 0x02
-    mux_c.value = index & 0x04
-
-
-def drive_col(col, value):
-    kso_pins[col].value = value
-
-
-def to_voltage(adc_sample):
-    return (adc_sample * 3.3) / 65536
-
-
-def matrix_scan():
-    matrix_pos = None
-    for col in range(MATRIX_COLS):
-        drive_col(col, True)
-
-    for col in range(MATRIX_COLS):
-        drive_col(col, False)
-
-        for row in range(MATRIX_ROWS):
-            mux_select_row(row)
-
-            voltage = to_voltage(adc_in.value)
-            if DEBUG:
-                print(f"{col}:{row}: {voltage}V")
-
-            if voltage < ADC_THRESHOLD:
-                if DEBUG:
-                    print(f"Pressed {col}:{row}")
-                matrix_pos = (col, row)
-
-                # TODO: Handle debounce in a different way
-                # If we break here we can only ever handle a single keypress at once
-                if matrix_pos:
-                    break
-
-        drive_col(col, True)
-    if DEBUG:
-        print()
-    return matrix_pos
-
-
-# Enable LED controller via SDB pin
-sdb = digitalio.DigitalInOut(board.GP29)
-sdb.direction = digitalio.Direction.OUTPUT
-sdb.value = True
-
-i2c = busio.I2C(board.SCL, board.SDA)  # Or board.I2C()
-
-# TODO: If I don't scan the bus, creating IS31FL3743 can't find the device. Why...?
-i2c.try_lock()
-i2c.scan()
-i2c.unlock()
-
-is31 = IS31FL3743(i2c)
-is31.set_led_scaling(0xFF)  # Full brightness
-is31.global_current = 0xFF  # Set current to max
-is31.enable = True
-
-# SLEEP# pin. Low if the host is sleeping
-sleep_pin = digitalio.DigitalInOut(board.GP0)
-sleep_pin.direction = digitalio.Direction.INPUT
+profiler.mark("pins")
+
+debouncer = Debouncer(MATRIX_COLS, MATRIX_ROWS, DEBOUNCE_MODE, DEBOUNCE_MS)
+keys = KeyMatrix(
+    kso_pins,
+    (mux_a, mux_b, mux_c),
+    adc_in,
+    MATRIX_COLS,
+    MATRIX_ROWS,
+    ADC_THRESHOLD,
+    debouncer,
+    rapid_trigger=RAPID_TRIGGER,
+    oversample=OVERSAMPLE,
+    filter=ADC_FILTER,
+)
+# Don't touch the keys while booting
+keys.calibrate()
+profiler.mark("keys")
 
 MATRIX_LED_MAP = [
     [
@@ -206,34 +172,138 @@ MATRIX_LED_MAP = [
     ],
 ]
 
-prev_matrix_pos = None
-debounce = 0
 color = 0  # 0 Blue, 1 Green, 2 Red
-while True:
-    is31.enable = sleep_pin.value
-    matrix_pos = matrix_scan()
-
-    if not matrix_pos:
-        debounce = 0
-    if matrix_pos and matrix_pos == prev_matrix_pos:
-        debounce += 1
-        # print(f"Debounce {debounce}")
-
-    if matrix_pos and (matrix_pos != prev_matrix_pos or debounce > 10 or debounce == 0):
-        debounce = 0
-        (col, row) = matrix_pos
-        (x, y) = MATRIX[row][col]
-        code = MACROPAD_KEYMAP[y][x]
-        if code:
-            print(f"Pressed {code} ({col}, {row})")
-
-            for i in range(18 * 11):
-                is31[i] = 0x00
-            if MATRIX_LED_MAP[row][col]:
-                is31[MATRIX_LED_MAP[row][col] + color] = 0xFF
-                color = (color + 1) % 3
-            keyboard.press(code)
-            keyboard.release_all()
-    prev_matrix_pos = matrix_pos
-
-    time.sleep(0.01)
+# Flat lookup tables by matrix position, the nested tables aren't needed anymore
+keymap = Keymap(MATRIX, MACROPAD_KEYMAP, MATRIX_COLS, MATRIX_ROWS, MATRIX_LED_MAP)
+del MATRIX, MACROPAD_KEYMAP, MATRIX_LED_MAP
+gc.collect()
+profiler.mark("keymap")
+
+# Set up after the first scan pass. Stay None if the controller doesn't
+# answer, the keys work without LEDs.
+is31 = None
+leds = None
+
+
+def start_leds():
+    global is31, leds
+    import busio
+    from framework_is31fl3743 import IS31FL3743
+    from led_state import LedState
+
+    i2c = busio.I2C(board.SCL, board.SDA)  # Or board.I2C()
+    # Only the controller's address instead of scanning the whole bus.
+    # Creating IS31FL3743 fails if it doesn't answer.
+    if not probe_i2c(i2c, (0x20,)):
+        i2c.deinit()
+        return False
+    is31 = IS31FL3743(i2c)
+    is31.set_led_scaling(0xFF)  # Full brightness
+    is31.global_current = 0xFF  # Set current to max
+    is31.enable = True
+    leds = LedState(is31)
+    return True
+
+
+# Don't leave keys held down while the host sleeps
+def release_keys():
+    report.release_all()
+    report.send()
+
+
+# The controller was shut down, set it up again and re-send the LEDs
+def restore_leds():
+    if is31 is None:
+        return
+    is31.set_led_scaling(0xFF)
+    is31.global_current = 0xFF
+    is31.enable = True
+    leds.restore()
+
+
+# Light sleep while SLEEP# is low, no scanning, LED controller off via SDB
+power = PowerManager(board.GP0, sdb, on_sleep=release_keys, on_wake=restore_leds)
+
+scheduler = ScanScheduler()
+# Counters, read over usb_cdc.data if boot.py enabled it
+stats = Stats(usb_cdc.data, time_scans=SCAN_TIMING)
+booting = True
+boot_done = None
+
+
+# One pass of the loop. keyscan_heap_check.py runs it to check that it
+# doesn't allocate.
+def scan_pass():
+    global color, booting, boot_done
+    if power.poll():
+        stats.set(WAKE_MS, power.wake_ms)
+        # Light sleep and wake-up allocate, clean up before scanning again
+        stats.collect()
+
+    # Only the keys that were pressed or released since the last pass are handled
+    stats.scan_start()
+    changed_keys = keys.scan()
+    stats.scan_end()
+    if changed_keys:
+        for col in range(MATRIX_COLS):
+            changed = keys.changed[col]
+            if not changed:
+                continue
+            key = col * MATRIX_ROWS
+            for row in range(MATRIX_ROWS):
+                code = keymap.keycodes[key + row]
+                if not changed & (1 << row) or not code:
+                    continue
+                pressed = keys.is_pressed(col, row)
+                if DEBUG:
+                    action = "Pressed" if pressed else "Released"
+                    print(f"{action} {code} ({col}, {row})")
+
+                if pressed:
+                    # Only the previously lit LED and the new one are written
+                    if leds:
+                        leds.clear()
+                        if keymap.flags[key + row] & KEY_LED:
+                            leds.set(keymap.leds[key + row] + color, 0xFF)
+                            color = (color + 1) % 3
+                    report.press(code)
+                else:
+                    report.release(code)
+
+    # One report for all keys that changed in this pass, none if nothing changed
+    if report.send():
+        stats.add(HID_REPORTS)
+    # LEDs after the report, so they don't delay it
+    if leds:
+        leds.show()
+        stats.add(I2C_TRANSACTIONS, leds.writes)
+    elif booting:
+        # First pass done, keys and HID work
+        booting = False
+        boot_done = digitalio.DigitalInOut(board.BOOT_DONE)
+        boot_done.direction = digitalio.Direction.OUTPUT
+        boot_done.value = False
+        profiler.boot_done()
+        if start_leds():
+            profiler.mark("leds")
+        elif DEBUG:
+            print("No LED controller at 0x20, running without LEDs")
+        stats.set(BOOT_MS, profiler.boot_done_ms)
+        stats.boot_report = profiler.report()
+        if DEBUG:
+            print(stats.boot_report)
+        stats.collect()
+    stats.poll()
+
+    # Scan fast while keys are in use, slow down when idle
+    scheduler.update(keys.active)
+    # Passes don't allocate, so collecting when the keys went idle is enough
+    if scheduler.idle_point:
+        stats.collect()
+    scheduler.wait()
+
+
+# Imported by keyscan_heap_check.py, only loop when running as code.py
+if __name__ == "__main__":
+    while True:
+        scan_pass()
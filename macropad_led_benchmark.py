@@ -0,0 +1,79 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Measure the LED update per keypress on the macropad.
+# Compares clearing all 198 LEDs before lighting the pressed key against
+# LedState, which only writes the previous and the new key's LED.
+#
+# Save as code.py and watch the serial console.
+# I2C bytes are counted as address + register + value per LED write.
+import time
+import board
+import busio
+import digitalio
+from framework_is31fl3743 import IS31FL3743
+from led_state import LedState
+from startup import probe_i2c
+
+KEYPRESSES = 24
+BYTES_PER_WRITE = 3
+
+# Base LED index of every key, like MATRIX_LED_MAP in macropad_keyscan.py
+KEY_LEDS = [4, 22, 58, 25, 1, 19, 55, 61, 7, 16, 34, 70, 64, 46, 13, 67]
+KEY_LEDS += [10, 40, 37, 49, 31, 28, 43, 52]
+
+# Enable LED controller via SDB pin
+sdb = digitalio.DigitalInOut(board.GP29)
+sdb.direction = digitalio.Direction.OUTPUT
+sdb.value = True
+
+i2c = busio.I2C(board.SCL, board.SDA)  # Or board.I2C()
+
+# Creating IS31FL3743 fails if the controller doesn't answer yet, wait for it
+probe_i2c(i2c, (0x20,))
+
+is31 = IS31FL3743(i2c)
+is31.set_led_scaling(0xFF)  # Full brightness
+is31.global_current = 0xFF  # Set current to max
+is31.enable = True
+
+
+def report(name, elapsed, writes):
+    print(
+        f"{name}: {elapsed // KEYPRESSES // 1000} us/keypress, "
+        + f"{writes * BYTES_PER_WRITE // KEYPRESSES} I2C bytes/keypress"
+    )
+
+
+# The way macropad_keyscan.py used to light a key
+def full_clear():
+    writes = 0
+    start = time.monotonic_ns()
+    for i in range(KEYPRESSES):
+        for led in range(18 * 11):
+            is31[led] = 0x00
+        is31[KEY_LEDS[i % len(KEY_LEDS)] + i % 3] = 0xFF
+        writes += 18 * 11 + 1
+    report("Clear all 198 LEDs", time.monotonic_ns() - start, writes)
+
+
+def incremental(leds):
+    writes = 0
+    start = time.monotonic_ns()
+    for i in range(KEYPRESSES):
+        leds.clear()
+        leds.set(KEY_LEDS[i % len(KEY_LEDS)] + i % 3, 0xFF)
+        leds.show()
+        writes += leds.writes
+    report("LedState", time.monotonic_ns() - start, writes)
+
+
+while True:
+    full_clear()
+    # Start from the same state LedState assumes
+    for led in range(18 * 11):
+        is31[led] = 0x00
+    leds = LedState(is31)
+    incremental(leds)
+    print()
+    time.sleep(2)
@@ -0,0 +1,177 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Play compressed LED matrix animations from a file on the CIRCUITPY drive.
+#
+# The file is read in small chunks into a reusable buffer while playing, so
+# animations can be much longer than what fits in RAM.
+# Create files with tools/matrix_anim_encode.py.
+#
+# File format, numbers little endian:
+#   "FMA1"          Magic
+#   width, height   1 byte each, 9 and 34 for the LED matrix
+#   frame count     2 bytes, at least 1
+#   frame_ms        2 bytes, time per frame, at least 1
+# Then per frame, pixel index x + y * width:
+#   FRAME_KEY       Followed by the RLE encoded pixels
+#   FRAME_DELTA     Followed by the RLE encoded XOR with the previous frame,
+#                   mostly zeros if little changed
+# RLE, like PackBits:
+#   0x00-0x7F       Next byte repeated control + 1 times
+#   0x80-0xFF       control - 0x7F literal bytes follow
+#
+# Usage:
+#   player = AnimationPlayer("boot.fma", MatrixFramebuffer(is31))
+#   while True:
+#       player.tick()
+import os
+from supervisor import ticks_ms
+
+MAGIC = b"FMA1"
+HEADER_SIZE = 10
+FRAME_KEY = ord("K")
+FRAME_DELTA = ord("D")
+
+# Longest run and literal in one RLE control byte
+MAX_RUN = 0x80
+
+# Bytes read from the file at once
+CHUNK_SIZE = 64
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+
+def ticks_diff(end, start):
+    diff = (end - start) & TICKS_MASK
+    # Negative if end is before start
+    if diff > TICKS_MASK // 2:
+        diff -= TICKS_MASK + 1
+    return diff
+
+
+class AnimationPlayer:
+    def __init__(self, path, fb, loop=True):
+        self.fb = fb
+        self.loop = loop
+        self.file = open(path, "rb")
+        self.file_size = os.stat(path)[6]
+
+        header = bytearray(HEADER_SIZE)
+        self.file.readinto(header)
+        if header[:4] != MAGIC:
+            raise ValueError("Not an animation file")
+        self.width = header[4]
+        self.height = header[5]
+        self.count = self.width * self.height
+        if self.count != fb.count:
+            raise ValueError("Animation doesn't fit the framebuffer")
+        self.frame_count = header[6] | header[7] << 8
+        self.frame_ms = header[8] | header[9] << 8
+        # tick() divides by frame_ms and expects a frame to decode
+        if not self.frame_count:
+            raise ValueError("Animation has no frames")
+        if not self.frame_ms:
+            raise ValueError("Animation has a frame_ms of 0")
+
+        # Size the frames would have uncompressed
+        self.raw_size = self.frame_count * self.count
+
+        self.frame = bytearray(self.count)
+        self.chunk = bytearray(CHUNK_SIZE)
+        self.chunk_pos = 0
+        self.chunk_end = 0
+
+        # Frame that's shown next
+        self.index = 0
+        self.next_frame = ticks_ms()
+        self.done = False
+        # Frames shown and frames decoded but not shown because tick() was late
+        self.frames = 0
+        self.dropped = 0
+
+    # Percent of the raw size saved by the compression
+    def saved_percent(self):
+        if not self.raw_size:
+            return 0
+        return 100 - self.file_size * 100 // self.raw_size
+
+    def _next(self):
+        if self.chunk_pos == self.chunk_end:
+            self.chunk_end = self.file.readinto(self.chunk)
+            self.chunk_pos = 0
+            if not self.chunk_end:
+                raise ValueError("Animation file ends mid-frame")
+        value = self.chunk[self.chunk_pos]
+        self.chunk_pos += 1
+        return value
+
+    # Decode the next frame into self.frame
+    def _decode(self):
+        if self.index == self.frame_count:
+            # Back to the first frame, right after the header
+            self.file.seek(HEADER_SIZE)
+            self.chunk_pos = 0
+            self.chunk_end = 0
+            self.index = 0
+
+        frame = self.frame
+        delta = self._next() == FRAME_DELTA
+        i = 0
+        count = self.count
+        while i < count:
+            control = self._next()
+            if control < MAX_RUN:
+                end = min(i + control + 1, count)
+                value = self._next()
+                if not delta:
+                    for j in range(i, end):
+                        frame[j] = value
+                elif value:
+                    for j in range(i, end):
+                        frame[j] ^= value
+            else:
+                end = min(i + control - MAX_RUN + 1, count)
+                for j in range(i, end):
+                    if delta:
+                        frame[j] ^= self._next()
+                    else:
+                        frame[j] = self._next()
+            i = end
+        self.index += 1
+
+    # Show the next frame if one is due. Returns True if it did.
+    def tick(self):
+        if self.done:
+            return False
+        now = ticks_ms()
+        late = ticks_diff(now, self.next_frame)
+        if late < 0:
+            return False
+
+        # Deltas build on each other, frames that are too late are decoded
+        # but not shown
+        frames = 1 + late // self.frame_ms
+        decoded = 0
+        for _ in range(frames):
+            if self.index == self.frame_count and not self.loop:
+                self.done = True
+                break
+            self._decode()
+            decoded += 1
+        if not decoded:
+            return False
+        self.dropped += decoded - 1
+        self.next_frame = (self.next_frame + frames * self.frame_ms) & TICKS_MASK
+
+        self.fb.blit(self.frame)
+        self.fb.show()
+        self.frames += 1
+        return True
+
+    # Milliseconds until the next frame is due, 0 if it's due now
+    def wait_ms(self):
+        return max(ticks_diff(self.next_frame, ticks_ms()), 0)
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,161 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Framebuffer for the 9x34 LED matrix (IS31FL3741).
+#
+# Drawing only changes a bytearray in RAM. show() compares the dirty range of
+# each PWM page against what was last sent and writes the changed spans with
+# auto-increment block writes, selecting each page at most once.
+# Instead of one I2C transaction per LED, a full frame takes one per span.
+#
+# Usage:
+#   fb = MatrixFramebuffer(is31)
+#   fb.pixel(x, y, 0xFF)
+#   fb.show()
+from matrix_mapping import PAGE_SIZES, REGISTERS, WIDTH, HEIGHT, page_address
+
+# Unchanged registers between two changed ones that are still sent along
+# instead of starting a new transaction
+SPAN_GAP = 4
+
+
+class MatrixFramebuffer:
+    # registers: Linear register index of every pixel, index x + y * width
+    def __init__(self, is31, registers=REGISTERS, width=WIDTH, height=HEIGHT):
+        self.is31 = is31
+        self.width = width
+        self.height = height
+        self.registers = registers
+        self.count = width * height
+        # Number of show_part() calls a show() consists of, one per page
+        self.parts = len(PAGE_SIZES)
+
+        # Per page, register N at offset N + 1. Byte 0 is room for the
+        # register address of a block write.
+        self.pages = [bytearray(1 + size) for size in PAGE_SIZES]
+        # What the controller currently shows
+        self.sent = [bytearray(1 + size) for size in PAGE_SIZES]
+        # Changed register range per page, start > end if clean
+        self.dirty_start = [PAGE_SIZES[0], PAGE_SIZES[1]]
+        self.dirty_end = [0, 0]
+
+        # LED scaling and global current, None until set
+        self.scaling = None
+        self.global_current = None
+
+        # Transactions and bytes written by the last show()
+        self.transactions = 0
+        self.bytes_written = 0
+
+    def _set(self, register, value):
+        page = 0
+        if register >= PAGE_SIZES[0]:
+            page = 1
+            register -= PAGE_SIZES[0]
+        buf = self.pages[page]
+        if buf[register + 1] == value:
+            return
+        buf[register + 1] = value
+        if register < self.dirty_start[page]:
+            self.dirty_start[page] = register
+        if register > self.dirty_end[page]:
+            self.dirty_end[page] = register
+
+    def pixel(self, x, y, value=None):
+        register = self.registers[x + y * self.width]
+        if value is None:
+            (page, register) = page_address(register)
+            return self.pages[page][register + 1]
+        self._set(register, value)
+        return None
+
+    # Pixel by index x + y * width, e.g. for animation effects
+    def __setitem__(self, index, value):
+        self._set(self.registers[index], value)
+
+    def fill(self, value):
+        for register in self.registers:
+            self._set(register, value)
+
+    # Set every pixel from a buffer with one brightness byte per pixel,
+    # index x + y * width
+    def blit(self, pixels):
+        registers = self.registers
+        for i in range(self.count):
+            self._set(registers[i], pixels[i])
+
+    # Same scaling for all LEDs
+    def set_scaling(self, value):
+        self.scaling = value
+        self.is31.set_led_scaling(value)
+
+    def set_global_current(self, value):
+        self.global_current = value
+        self.is31.global_current = value
+
+    # Write everything again after the controller was shut down, e.g. with
+    # SDB: scaling, global current and both PWM pages in one block write each
+    def restore(self):
+        is31 = self.is31
+        if self.scaling is not None:
+            is31.set_led_scaling(self.scaling)
+        if self.global_current is not None:
+            is31.global_current = self.global_current
+        for page in range(self.parts):
+            self._write_span(page, 0, PAGE_SIZES[page] - 1)
+            self.dirty_start[page] = PAGE_SIZES[page]
+            self.dirty_end[page] = 0
+        is31.enable = True
+
+    # Write all changed spans to the controller
+    def show(self):
+        self.transactions = 0
+        self.bytes_written = 0
+        for page in range(self.parts):
+            self.show_part(page)
+
+    # Write the changed spans of one page.
+    # Lets a caller flush a frame in steps and do other work in between.
+    def show_part(self, page):
+        start = self.dirty_start[page]
+        end = self.dirty_end[page]
+        if start > end:
+            return
+        self._flush_page(page, start, end)
+        self.dirty_start[page] = PAGE_SIZES[page]
+        self.dirty_end[page] = 0
+
+    def _flush_page(self, page, start, end):
+        buf = self.pages[page]
+        sent = self.sent[page]
+        span_start = -1
+        span_end = -1
+        for register in range(start, end + 1):
+            if buf[register + 1] == sent[register + 1]:
+                continue
+            if span_start >= 0 and register - span_end > SPAN_GAP:
+                self._write_span(page, span_start, span_end)
+                span_start = -1
+            if span_start < 0:
+                span_start = register
+            span_end = register
+        if span_start >= 0:
+            self._write_span(page, span_start, span_end)
+
+    def _write_span(self, page, start, end):
+        buf = self.pages[page]
+        sent = self.sent[page]
+        self.is31.page(page)
+
+        # Put the start register in front of the span. The byte belongs to
+        # register start - 1 (or is unused), restore it after the write.
+        saved = buf[start]
+        buf[start] = start
+        with self.is31.i2c_device as i2c:
+            i2c.write(buf, start=start, end=end + 2)
+        buf[start] = saved
+
+        for i in range(start + 1, end + 2):
+            sent[i] = buf[i]
+        self.transactions += 1
+        self.bytes_written += end - start + 2
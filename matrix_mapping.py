@@ -0,0 +1,359 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Pixel to register mapping of the 9x34 LED matrix (IS31FL3741).
+#
+# REGISTERS holds the linear PWM register index of every pixel (index
+# x + y * WIDTH), that's address + 180 * page. Page 0 covers 0-179, page 1
+# 180-350. PIXELS is the reverse, pixel index by linear register or NO_PIXEL.
+#
+# Sorting writes by linear register index puts them in page, then address
+# order, which keeps page switches and gaps between block writes to a minimum.
+from array import array
+
+WIDTH = 9
+HEIGHT = 34
+
+# PWM registers on page 0 and page 1
+PAGE_SIZES = (180, 171)
+REGISTER_COUNT = PAGE_SIZES[0] + PAGE_SIZES[1]
+
+NO_PIXEL = 0xFFFF
+
+REGISTERS = array(
+    "H",
+    [
+        0x000,  # x:1, y:1, sw:1, cs:1, id:1, page:0, addr:0x00
+        0x01E,  # x:2, y:1, sw:2, cs:1, id:2, page:0, addr:0x1E
+        0x03C,  # x:3, y:1, sw:3, cs:1, id:3, page:0, addr:0x3C
+        0x05A,  # x:4, y:1, sw:4, cs:1, id:4, page:0, addr:0x5A
+        0x078,  # x:5, y:1, sw:5, cs:1, id:5, page:0, addr:0x78
+        0x096,  # x:6, y:1, sw:6, cs:1, id:6, page:0, addr:0x96
+        0x0B4,  # x:7, y:1, sw:7, cs:1, id:7, page:1, addr:0x00
+        0x0D2,  # x:8, y:1, sw:8, cs:1, id:8, page:1, addr:0x1E
+        0x0F0,  # x:9, y:1, sw:9, cs:1, id:9, page:1, addr:0x3C
+        0x001,  # x:1, y:2, sw:1, cs:2, id:10, page:0, addr:0x01
+        0x01F,  # x:2, y:2, sw:2, cs:2, id:11, page:0, addr:0x1F
+        0x03D,  # x:3, y:2, sw:3, cs:2, id:12, page:0, addr:0x3D
+        0x05B,  # x:4, y:2, sw:4, cs:2, id:13, page:0, addr:0x5B
+        0x079,  # x:5, y:2, sw:5, cs:2, id:14, page:0, addr:0x79
+        0x097,  # x:6, y:2, sw:6, cs:2, id:15, page:0, addr:0x97
+        0x0B5,  # x:7, y:2, sw:7, cs:2, id:16, page:1, addr:0x01
+        0x0D3,  # x:8, y:2, sw:8, cs:2, id:17, page:1, addr:0x1F
+        0x0F1,  # x:9, y:2, sw:9, cs:2, id:18, page:1, addr:0x3D
+        0x002,  # x:1, y:3, sw:1, cs:3, id:19, page:0, addr:0x02
+        0x020,  # x:2, y:3, sw:2, cs:3, id:20, page:0, addr:0x20
+        0x03E,  # x:3, y:3, sw:3, cs:3, id:21, page:0, addr:0x3E
+        0x05C,  # x:4, y:3, sw:4, cs:3, id:22, page:0, addr:0x5C
+        0x07A,  # x:5, y:3, sw:5, cs:3, id:23, page:0, addr:0x7A
+        0x098,  # x:6, y:3, sw:6, cs:3, id:24, page:0, addr:0x98
+        0x0B6,  # x:7, y:3, sw:7, cs:3, id:25, page:1, addr:0x02
+        0x0D4,  # x:8, y:3, sw:8, cs:3, id:26, page:1, addr:0x20
+        0x0F2,  # x:9, y:3, sw:9, cs:3, id:27, page:1, addr:0x3E
+        0x003,  # x:1, y:4, sw:1, cs:4, id:28, page:0, addr:0x03
+        0x021,  # x:2, y:4, sw:2, cs:4, id:29, page:0, addr:0x21
+        0x03F,  # x:3, y:4, sw:3, cs:4, id:30, page:0, addr:0x3F
+        0x05D,  # x:4, y:4, sw:4, cs:4, id:31, page:0, addr:0x5D
+        0x07B,  # x:5, y:4, sw:5, cs:4, id:32, page:0, addr:0x7B
+        0x099,  # x:6, y:4, sw:6, cs:4, id:33, page:0, addr:0x99
+        0x0B7,  # x:7, y:4, sw:7, cs:4, id:34, page:1, addr:0x03
+        0x0D5,  # x:8, y:4, sw:8, cs:4, id:35, page:1, addr:0x21
+        0x0F3,  # x:9, y:4, sw:9, cs:4, id:36, page:1, addr:0x3F
+        0x004,  # x:1, y:5, sw:1, cs:5, id:37, page:0, addr:0x04
+        0x022,  # x:2, y:5, sw:2, cs:5, id:41, page:0, addr:0x22
+        0x040,  # x:3, y:5, sw:3, cs:5, id:45, page:0, addr:0x40
+        0x05E,  # x:4, y:5, sw:4, cs:5, id:49, page:0, addr:0x5E
+        0x07C,  # x:5, y:5, sw:5, cs:5, id:53, page:0, addr:0x7C
+        0x09A,  # x:6, y:5, sw:6, cs:5, id:57, page:0, addr:0x9A
+        0x0B8,  # x:7, y:5, sw:7, cs:5, id:61, page:1, addr:0x04
+        0x0D6,  # x:8, y:5, sw:8, cs:5, id:65, page:1, addr:0x22
+        0x0F4,  # x:9, y:5, sw:9, cs:5, id:69, page:1, addr:0x40
+        0x005,  # x:1, y:6, sw:1, cs:6, id:38, page:0, addr:0x05
+        0x023,  # x:2, y:6, sw:2, cs:6, id:42, page:0, addr:0x23
+        0x041,  # x:3, y:6, sw:3, cs:6, id:46, page:0, addr:0x41
+        0x05F,  # x:4, y:6, sw:4, cs:6, id:50, page:0, addr:0x5F
+        0x07D,  # x:5, y:6, sw:5, cs:6, id:54, page:0, addr:0x7D
+        0x09B,  # x:6, y:6, sw:6, cs:6, id:58, page:0, addr:0x9B
+        0x0B9,  # x:7, y:6, sw:7, cs:6, id:62, page:1, addr:0x05
+        0x0D7,  # x:8, y:6, sw:8, cs:6, id:66, page:1, addr:0x23
+        0x0F5,  # x:9, y:6, sw:9, cs:6, id:70, page:1, addr:0x41
+        0x006,  # x:1, y:7, sw:1, cs:7, id:39, page:0, addr:0x06
+        0x024,  # x:2, y:7, sw:2, cs:7, id:43, page:0, addr:0x24
+        0x042,  # x:3, y:7, sw:3, cs:7, id:47, page:0, addr:0x42
+        0x060,  # x:4, y:7, sw:4, cs:7, id:51, page:0, addr:0x60
+        0x07E,  # x:5, y:7, sw:5, cs:7, id:55, page:0, addr:0x7E
+        0x09C,  # x:6, y:7, sw:6, cs:7, id:59, page:0, addr:0x9C
+        0x0BA,  # x:7, y:7, sw:7, cs:7, id:63, page:1, addr:0x06
+        0x0D8,  # x:8, y:7, sw:8, cs:7, id:67, page:1, addr:0x24
+        0x0F6,  # x:9, y:7, sw:9, cs:7, id:71, page:1, addr:0x42
+        0x007,  # x:1, y:8, sw:1, cs:8, id:40, page:0, addr:0x07
+        0x025,  # x:2, y:8, sw:2, cs:8, id:44, page:0, addr:0x25
+        0x043,  # x:3, y:8, sw:3, cs:8, id:48, page:0, addr:0x43
+        0x061,  # x:4, y:8, sw:4, cs:8, id:52, page:0, addr:0x61
+        0x07F,  # x:5, y:8, sw:5, cs:8, id:56, page:0, addr:0x7F
+        0x09D,  # x:6, y:8, sw:6, cs:8, id:60, page:0, addr:0x9D
+        0x0BB,  # x:7, y:8, sw:7, cs:8, id:64, page:1, addr:0x07
+        0x0D9,  # x:8, y:8, sw:8, cs:8, id:68, page:1, addr:0x25
+        0x0F7,  # x:9, y:8, sw:9, cs:8, id:72, page:1, addr:0x43
+        0x008,  # x:1, y:9, sw:1, cs:9, id:73, page:0, addr:0x08
+        0x026,  # x:2, y:9, sw:2, cs:9, id:81, page:0, addr:0x26
+        0x044,  # x:3, y:9, sw:3, cs:9, id:89, page:0, addr:0x44
+        0x062,  # x:4, y:9, sw:4, cs:9, id:97, page:0, addr:0x62
+        0x080,  # x:5, y:9, sw:5, cs:9, id:105, page:0, addr:0x80
+        0x09E,  # x:6, y:9, sw:6, cs:9, id:113, page:0, addr:0x9E
+        0x0BC,  # x:7, y:9, sw:7, cs:9, id:121, page:1, addr:0x08
+        0x0DA,  # x:8, y:9, sw:8, cs:9, id:129, page:1, addr:0x26
+        0x0F8,  # x:9, y:9, sw:9, cs:9, id:137, page:1, addr:0x44
+        0x009,  # x:1, y:10, sw:1, cs:10, id:74, page:0, addr:0x09
+        0x027,  # x:2, y:10, sw:2, cs:10, id:82, page:0, addr:0x27
+        0x045,  # x:3, y:10, sw:3, cs:10, id:90, page:0, addr:0x45
+        0x063,  # x:4, y:10, sw:4, cs:10, id:98, page:0, addr:0x63
+        0x081,  # x:5, y:10, sw:5, cs:10, id:106, page:0, addr:0x81
+        0x09F,  # x:6, y:10, sw:6, cs:10, id:114, page:0, addr:0x9F
+        0x0BD,  # x:7, y:10, sw:7, cs:10, id:122, page:1, addr:0x09
+        0x0DB,  # x:8, y:10, sw:8, cs:10, id:130, page:1, addr:0x27
+        0x0F9,  # x:9, y:10, sw:9, cs:10, id:138, page:1, addr:0x45
+        0x00A,  # x:1, y:11, sw:1, cs:11, id:75, page:0, addr:0x0A
+        0x028,  # x:2, y:11, sw:2, cs:11, id:83, page:0, addr:0x28
+        0x046,  # x:3, y:11, sw:3, cs:11, id:91, page:0, addr:0x46
+        0x064,  # x:4, y:11, sw:4, cs:11, id:99, page:0, addr:0x64
+        0x082,  # x:5, y:11, sw:5, cs:11, id:107, page:0, addr:0x82
+        0x0A0,  # x:6, y:11, sw:6, cs:11, id:115, page:0, addr:0xA0
+        0x0BE,  # x:7, y:11, sw:7, cs:11, id:123, page:1, addr:0x0A
+        0x0DC,  # x:8, y:11, sw:8, cs:11, id:131, page:1, addr:0x28
+        0x0FA,  # x:9, y:11, sw:9, cs:11, id:139, page:1, addr:0x46
+        0x00B,  # x:1, y:12, sw:1, cs:12, id:76, page:0, addr:0x0B
+        0x029,  # x:2, y:12, sw:2, cs:12, id:84, page:0, addr:0x29
+        0x047,  # x:3, y:12, sw:3, cs:12, id:92, page:0, addr:0x47
+        0x065,  # x:4, y:12, sw:4, cs:12, id:100, page:0, addr:0x65
+        0x083,  # x:5, y:12, sw:5, cs:12, id:108, page:0, addr:0x83
+        0x0A1,  # x:6, y:12, sw:6, cs:12, id:116, page:0, addr:0xA1
+        0x0BF,  # x:7, y:12, sw:7, cs:12, id:124, page:1, addr:0x0B
+        0x0DD,  # x:8, y:12, sw:8, cs:12, id:132, page:1, addr:0x29
+        0x0FB,  # x:9, y:12, sw:9, cs:12, id:140, page:1, addr:0x47
+        0x00C,  # x:1, y:13, sw:1, cs:13, id:77, page:0, addr:0x0C
+        0x02A,  # x:2, y:13, sw:2, cs:13, id:85, page:0, addr:0x2A
+        0x048,  # x:3, y:13, sw:3, cs:13, id:93, page:0, addr:0x48
+        0x066,  # x:4, y:13, sw:4, cs:13, id:101, page:0, addr:0x66
+        0x084,  # x:5, y:13, sw:5, cs:13, id:109, page:0, addr:0x84
+        0x0A2,  # x:6, y:13, sw:6, cs:13, id:117, page:0, addr:0xA2
+        0x0C0,  # x:7, y:13, sw:7, cs:13, id:125, page:1, addr:0x0C
+        0x0DE,  # x:8, y:13, sw:8, cs:13, id:133, page:1, addr:0x2A
+        0x0FC,  # x:9, y:13, sw:9, cs:13, id:141, page:1, addr:0x48
+        0x00D,  # x:1, y:14, sw:1, cs:14, id:78, page:0, addr:0x0D
+        0x02B,  # x:2, y:14, sw:2, cs:14, id:86, page:0, addr:0x2B
+        0x049,  # x:3, y:14, sw:3, cs:14, id:94, page:0, addr:0x49
+        0x067,  # x:4, y:14, sw:4, cs:14, id:102, page:0, addr:0x67
+        0x085,  # x:5, y:14, sw:5, cs:14, id:110, page:0, addr:0x85
+        0x0A3,  # x:6, y:14, sw:6, cs:14, id:118, page:0, addr:0xA3
+        0x0C1,  # x:7, y:14, sw:7, cs:14, id:126, page:1, addr:0x0D
+        0x0DF,  # x:8, y:14, sw:8, cs:14, id:134, page:1, addr:0x2B
+        0x0FD,  # x:9, y:14, sw:9, cs:14, id:142, page:1, addr:0x49
+        0x00E,  # x:1, y:15, sw:1, cs:15, id:79, page:0, addr:0x0E
+        0x02C,  # x:2, y:15, sw:2, cs:15, id:87, page:0, addr:0x2C
+        0x04A,  # x:3, y:15, sw:3, cs:15, id:95, page:0, addr:0x4A
+        0x068,  # x:4, y:15, sw:4, cs:15, id:103, page:0, addr:0x68
+        0x086,  # x:5, y:15, sw:5, cs:15, id:111, page:0, addr:0x86
+        0x0A4,  # x:6, y:15, sw:6, cs:15, id:119, page:0, addr:0xA4
+        0x0C2,  # x:7, y:15, sw:7, cs:15, id:127, page:1, addr:0x0E
+        0x0E0,  # x:8, y:15, sw:8, cs:15, id:135, page:1, addr:0x2C
+        0x0FE,  # x:9, y:15, sw:9, cs:15, id:143, page:1, addr:0x4A
+        0x00F,  # x:1, y:16, sw:1, cs:16, id:80, page:0, addr:0x0F
+        0x02D,  # x:2, y:16, sw:2, cs:16, id:88, page:0, addr:0x2D
+        0x04B,  # x:3, y:16, sw:3, cs:16, id:96, page:0, addr:0x4B
+        0x069,  # x:4, y:16, sw:4, cs:16, id:104, page:0, addr:0x69
+        0x087,  # x:5, y:16, sw:5, cs:16, id:112, page:0, addr:0x87
+        0x0A5,  # x:6, y:16, sw:6, cs:16, id:120, page:0, addr:0xA5
+        0x0C3,  # x:7, y:16, sw:7, cs:16, id:128, page:1, addr:0x0F
+        0x0E1,  # x:8, y:16, sw:8, cs:16, id:136, page:1, addr:0x2D
+        0x0FF,  # x:9, y:16, sw:9, cs:16, id:144, page:1, addr:0x4B
+        0x010,  # x:1, y:17, sw:1, cs:17, id:145, page:0, addr:0x10
+        0x02E,  # x:2, y:17, sw:2, cs:17, id:161, page:0, addr:0x2E
+        0x04C,  # x:3, y:17, sw:3, cs:17, id:177, page:0, addr:0x4C
+        0x06A,  # x:4, y:17, sw:4, cs:17, id:193, page:0, addr:0x6A
+        0x088,  # x:5, y:17, sw:5, cs:17, id:209, page:0, addr:0x88
+        0x0A6,  # x:6, y:17, sw:6, cs:17, id:225, page:0, addr:0xA6
+        0x0C4,  # x:7, y:17, sw:7, cs:17, id:241, page:1, addr:0x10
+        0x0E2,  # x:8, y:17, sw:8, cs:17, id:257, page:1, addr:0x2E
+        0x100,  # x:9, y:17, sw:9, cs:17, id:273, page:1, addr:0x4C
+        0x011,  # x:1, y:18, sw:1, cs:18, id:146, page:0, addr:0x11
+        0x02F,  # x:2, y:18, sw:2, cs:18, id:162, page:0, addr:0x2F
+        0x04D,  # x:3, y:18, sw:3, cs:18, id:178, page:0, addr:0x4D
+        0x06B,  # x:4, y:18, sw:4, cs:18, id:194, page:0, addr:0x6B
+        0x089,  # x:5, y:18, sw:5, cs:18, id:210, page:0, addr:0x89
+        0x0A7,  # x:6, y:18, sw:6, cs:18, id:226, page:0, addr:0xA7
+        0x0C5,  # x:7, y:18, sw:7, cs:18, id:242, page:1, addr:0x11
+        0x0E3,  # x:8, y:18, sw:8, cs:18, id:258, page:1, addr:0x2F
+        0x101,  # x:9, y:18, sw:9, cs:18, id:274, page:1, addr:0x4D
+        0x012,  # x:1, y:19, sw:1, cs:19, id:147, page:0, addr:0x12
+        0x030,  # x:2, y:19, sw:2, cs:19, id:163, page:0, addr:0x30
+        0x04E,  # x:3, y:19, sw:3, cs:19, id:179, page:0, addr:0x4E
+        0x06C,  # x:4, y:19, sw:4, cs:19, id:195, page:0, addr:0x6C
+        0x08A,  # x:5, y:19, sw:5, cs:19, id:211, page:0, addr:0x8A
+        0x0A8,  # x:6, y:19, sw:6, cs:19, id:227, page:0, addr:0xA8
+        0x0C6,  # x:7, y:19, sw:7, cs:19, id:243, page:1, addr:0x12
+        0x0E4,  # x:8, y:19, sw:8, cs:19, id:259, page:1, addr:0x30
+        0x102,  # x:9, y:19, sw:9, cs:19, id:275, page:1, addr:0x4E
+        0x013,  # x:1, y:20, sw:1, cs:20, id:148, page:0, addr:0x13
+        0x031,  # x:2, y:20, sw:2, cs:20, id:164, page:0, addr:0x31
+        0x04F,  # x:3, y:20, sw:3, cs:20, id:180, page:0, addr:0x4F
+        0x06D,  # x:4, y:20, sw:4, cs:20, id:196, page:0, addr:0x6D
+        0x08B,  # x:5, y:20, sw:5, cs:20, id:212, page:0, addr:0x8B
+        0x0A9,  # x:6, y:20, sw:6, cs:20, id:228, page:0, addr:0xA9
+        0x0C7,  # x:7, y:20, sw:7, cs:20, id:244, page:1, addr:0x13
+        0x0E5,  # x:8, y:20, sw:8, cs:20, id:260, page:1, addr:0x31
+        0x103,  # x:9, y:20, sw:9, cs:20, id:276, page:1, addr:0x4F
+        0x014,  # x:1, y:21, sw:1, cs:21, id:149, page:0, addr:0x14
+        0x032,  # x:2, y:21, sw:2, cs:21, id:165, page:0, addr:0x32
+        0x050,  # x:3, y:21, sw:3, cs:21, id:181, page:0, addr:0x50
+        0x06E,  # x:4, y:21, sw:4, cs:21, id:197, page:0, addr:0x6E
+        0x08C,  # x:5, y:21, sw:5, cs:21, id:213, page:0, addr:0x8C
+        0x0AA,  # x:6, y:21, sw:6, cs:21, id:229, page:0, addr:0xAA
+        0x0C8,  # x:7, y:21, sw:7, cs:21, id:245, page:1, addr:0x14
+        0x0E6,  # x:8, y:21, sw:8, cs:21, id:261, page:1, addr:0x32
+        0x104,  # x:9, y:21, sw:9, cs:21, id:277, page:1, addr:0x50
+        0x015,  # x:1, y:22, sw:1, cs:22, id:150, page:0, addr:0x15
+        0x033,  # x:2, y:22, sw:2, cs:22, id:166, page:0, addr:0x33
+        0x051,  # x:3, y:22, sw:3, cs:22, id:182, page:0, addr:0x51
+        0x06F,  # x:4, y:22, sw:4, cs:22, id:198, page:0, addr:0x6F
+        0x08D,  # x:5, y:22, sw:5, cs:22, id:214, page:0, addr:0x8D
+        0x0AB,  # x:6, y:22, sw:6, cs:22, id:230, page:0, addr:0xAB
+        0x0C9,  # x:7, y:22, sw:7, cs:22, id:246, page:1, addr:0x15
+        0x0E7,  # x:8, y:22, sw:8, cs:22, id:262, page:1, addr:0x33
+        0x105,  # x:9, y:22, sw:9, cs:22, id:278, page:1, addr:0x51
+        0x016,  # x:1, y:23, sw:1, cs:23, id:151, page:0, addr:0x16
+        0x034,  # x:2, y:23, sw:2, cs:23, id:167, page:0, addr:0x34
+        0x052,  # x:3, y:23, sw:3, cs:23, id:183, page:0, addr:0x52
+        0x070,  # x:4, y:23, sw:4, cs:23, id:199, page:0, addr:0x70
+        0x08E,  # x:5, y:23, sw:5, cs:23, id:215, page:0, addr:0x8E
+        0x0AC,  # x:6, y:23, sw:6, cs:23, id:231, page:0, addr:0xAC
+        0x0CA,  # x:7, y:23, sw:7, cs:23, id:247, page:1, addr:0x16
+        0x0E8,  # x:8, y:23, sw:8, cs:23, id:263, page:1, addr:0x34
+        0x106,  # x:9, y:23, sw:9, cs:23, id:279, page:1, addr:0x52
+        0x017,  # x:1, y:24, sw:1, cs:24, id:152, page:0, addr:0x17
+        0x035,  # x:2, y:24, sw:2, cs:24, id:168, page:0, addr:0x35
+        0x053,  # x:3, y:24, sw:3, cs:24, id:184, page:0, addr:0x53
+        0x071,  # x:4, y:24, sw:4, cs:24, id:200, page:0, addr:0x71
+        0x08F,  # x:5, y:24, sw:5, cs:24, id:216, page:0, addr:0x8F
+        0x0AD,  # x:6, y:24, sw:6, cs:24, id:232, page:0, addr:0xAD
+        0x0CB,  # x:7, y:24, sw:7, cs:24, id:248, page:1, addr:0x17
+        0x0E9,  # x:8, y:24, sw:8, cs:24, id:264, page:1, addr:0x35
+        0x107,  # x:9, y:24, sw:9, cs:24, id:280, page:1, addr:0x53
+        0x018,  # x:1, y:25, sw:1, cs:25, id:153, page:0, addr:0x18
+        0x036,  # x:2, y:25, sw:2, cs:25, id:169, page:0, addr:0x36
+        0x054,  # x:3, y:25, sw:3, cs:25, id:185, page:0, addr:0x54
+        0x072,  # x:4, y:25, sw:4, cs:25, id:201, page:0, addr:0x72
+        0x090,  # x:5, y:25, sw:5, cs:25, id:217, page:0, addr:0x90
+        0x0AE,  # x:6, y:25, sw:6, cs:25, id:233, page:0, addr:0xAE
+        0x0CC,  # x:7, y:25, sw:7, cs:25, id:249, page:1, addr:0x18
+        0x0EA,  # x:8, y:25, sw:8, cs:25, id:265, page:1, addr:0x36
+        0x108,  # x:9, y:25, sw:9, cs:25, id:281, page:1, addr:0x54
+        0x019,  # x:1, y:26, sw:1, cs:26, id:154, page:0, addr:0x19
+        0x037,  # x:2, y:26, sw:2, cs:26, id:170, page:0, addr:0x37
+        0x055,  # x:3, y:26, sw:3, cs:26, id:186, page:0, addr:0x55
+        0x073,  # x:4, y:26, sw:4, cs:26, id:202, page:0, addr:0x73
+        0x091,  # x:5, y:26, sw:5, cs:26, id:218, page:0, addr:0x91
+        0x0AF,  # x:6, y:26, sw:6, cs:26, id:234, page:0, addr:0xAF
+        0x0CD,  # x:7, y:26, sw:7, cs:26, id:250, page:1, addr:0x19
+        0x0EB,  # x:8, y:26, sw:8, cs:26, id:266, page:1, addr:0x37
+        0x109,  # x:9, y:26, sw:9, cs:26, id:282, page:1, addr:0x55
+        0x01A,  # x:1, y:27, sw:1, cs:27, id:155, page:0, addr:0x1A
+        0x038,  # x:2, y:27, sw:2, cs:27, id:171, page:0, addr:0x38
+        0x056,  # x:3, y:27, sw:3, cs:27, id:187, page:0, addr:0x56
+        0x074,  # x:4, y:27, sw:4, cs:27, id:203, page:0, addr:0x74
+        0x092,  # x:5, y:27, sw:5, cs:27, id:219, page:0, addr:0x92
+        0x0B0,  # x:6, y:27, sw:6, cs:27, id:235, page:0, addr:0xB0
+        0x0CE,  # x:7, y:27, sw:7, cs:27, id:251, page:1, addr:0x1A
+        0x0EC,  # x:8, y:27, sw:8, cs:27, id:267, page:1, addr:0x38
+        0x10A,  # x:9, y:27, sw:9, cs:27, id:283, page:1, addr:0x56
+        0x01B,  # x:1, y:28, sw:1, cs:28, id:156, page:0, addr:0x1B
+        0x039,  # x:2, y:28, sw:2, cs:28, id:172, page:0, addr:0x39
+        0x057,  # x:3, y:28, sw:3, cs:28, id:188, page:0, addr:0x57
+        0x075,  # x:4, y:28, sw:4, cs:28, id:204, page:0, addr:0x75
+        0x093,  # x:5, y:28, sw:5, cs:28, id:220, page:0, addr:0x93
+        0x0B1,  # x:6, y:28, sw:6, cs:28, id:236, page:0, addr:0xB1
+        0x0CF,  # x:7, y:28, sw:7, cs:28, id:252, page:1, addr:0x1B
+        0x0ED,  # x:8, y:28, sw:8, cs:28, id:268, page:1, addr:0x39
+        0x10B,  # x:9, y:28, sw:9, cs:28, id:284, page:1, addr:0x57
+        0x01C,  # x:1, y:29, sw:1, cs:29, id:157, page:0, addr:0x1C
+        0x03A,  # x:2, y:29, sw:2, cs:29, id:173, page:0, addr:0x3A
+        0x058,  # x:3, y:29, sw:3, cs:29, id:189, page:0, addr:0x58
+        0x076,  # x:4, y:29, sw:4, cs:29, id:205, page:0, addr:0x76
+        0x094,  # x:5, y:29, sw:5, cs:29, id:221, page:0, addr:0x94
+        0x0B2,  # x:6, y:29, sw:6, cs:29, id:237, page:0, addr:0xB2
+        0x0D0,  # x:7, y:29, sw:7, cs:29, id:253, page:1, addr:0x1C
+        0x0EE,  # x:8, y:29, sw:8, cs:29, id:269, page:1, addr:0x3A
+        0x10C,  # x:9, y:29, sw:9, cs:29, id:285, page:1, addr:0x58
+        0x01D,  # x:1, y:30, sw:1, cs:30, id:158, page:0, addr:0x1D
+        0x03B,  # x:2, y:30, sw:2, cs:30, id:174, page:0, addr:0x3B
+        0x059,  # x:3, y:30, sw:3, cs:30, id:190, page:0, addr:0x59
+        0x077,  # x:4, y:30, sw:4, cs:30, id:206, page:0, addr:0x77
+        0x095,  # x:5, y:30, sw:5, cs:30, id:222, page:0, addr:0x95
+        0x0B3,  # x:6, y:30, sw:6, cs:30, id:238, page:0, addr:0xB3
+        0x0D1,  # x:7, y:30, sw:7, cs:30, id:254, page:1, addr:0x1D
+        0x0EF,  # x:8, y:30, sw:8, cs:30, id:270, page:1, addr:0x3B
+        0x10D,  # x:9, y:30, sw:9, cs:30, id:286, page:1, addr:0x59
+        0x10E,  # x:1, y:31, sw:1, cs:31, id:159, page:1, addr:0x5A
+        0x117,  # x:2, y:31, sw:2, cs:31, id:175, page:1, addr:0x63
+        0x120,  # x:3, y:31, sw:3, cs:31, id:191, page:1, addr:0x6C
+        0x129,  # x:4, y:31, sw:4, cs:31, id:207, page:1, addr:0x75
+        0x132,  # x:5, y:31, sw:5, cs:31, id:223, page:1, addr:0x7E
+        0x13B,  # x:6, y:31, sw:6, cs:31, id:239, page:1, addr:0x87
+        0x144,  # x:7, y:31, sw:7, cs:31, id:255, page:1, addr:0x90
+        0x14D,  # x:8, y:31, sw:8, cs:31, id:271, page:1, addr:0x99
+        0x156,  # x:9, y:31, sw:9, cs:31, id:287, page:1, addr:0xA2
+        0x10F,  # x:1, y:32, sw:1, cs:32, id:160, page:1, addr:0x5B
+        0x118,  # x:2, y:32, sw:2, cs:32, id:176, page:1, addr:0x64
+        0x121,  # x:3, y:32, sw:3, cs:32, id:192, page:1, addr:0x6D
+        0x12A,  # x:4, y:32, sw:4, cs:32, id:208, page:1, addr:0x76
+        0x133,  # x:5, y:32, sw:5, cs:32, id:224, page:1, addr:0x7F
+        0x13C,  # x:6, y:32, sw:6, cs:32, id:240, page:1, addr:0x88
+        0x145,  # x:7, y:32, sw:7, cs:32, id:256, page:1, addr:0x91
+        0x14E,  # x:8, y:32, sw:8, cs:32, id:272, page:1, addr:0x9A
+        0x157,  # x:9, y:32, sw:9, cs:32, id:288, page:1, addr:0xA3
+        0x110,  # x:1, y:33, sw:1, cs:33, id:289, page:1, addr:0x5C
+        0x119,  # x:2, y:33, sw:2, cs:33, id:290, page:1, addr:0x65
+        0x122,  # x:3, y:33, sw:3, cs:33, id:291, page:1, addr:0x6E
+        0x12B,  # x:4, y:33, sw:4, cs:33, id:292, page:1, addr:0x77
+        0x134,  # x:5, y:33, sw:5, cs:33, id:293, page:1, addr:0x80
+        0x13D,  # x:6, y:33, sw:6, cs:33, id:294, page:1, addr:0x89
+        0x146,  # x:7, y:33, sw:7, cs:33, id:295, page:1, addr:0x92
+        0x14F,  # x:8, y:33, sw:8, cs:33, id:296, page:1, addr:0x9B
+        0x158,  # x:9, y:33, sw:9, cs:33, id:297, page:1, addr:0xA4
+        0x111,  # x:1, y:34, sw:1, cs:34, id:298, page:1, addr:0x5D
+        0x11A,  # x:2, y:34, sw:2, cs:34, id:299, page:1, addr:0x66
+        0x123,  # x:3, y:34, sw:3, cs:34, id:300, page:1, addr:0x6F
+        0x12C,  # x:4, y:34, sw:4, cs:34, id:301, page:1, addr:0x78
+        0x135,  # x:5, y:34, sw:5, cs:34, id:302, page:1, addr:0x81
+        0x13E,  # x:6, y:34, sw:6, cs:34, id:303, page:1, addr:0x8A
+        0x147,  # x:7, y:34, sw:7, cs:34, id:304, page:1, addr:0x93
+        0x150,  # x:8, y:34, sw:8, cs:34, id:305, page:1, addr:0x9C
+        0x159,  # x:9, y:34, sw:9, cs:34, id:306, page:1, addr:0xA5
+    ],
+)
+
+PIXELS = array("H", [NO_PIXEL] * REGISTER_COUNT)
+for _pixel, _register in enumerate(REGISTERS):
+    PIXELS[_register] = _pixel
+
+
+# (page, address) of a linear register index
+def page_address(register):
+    if register >= PAGE_SIZES[0]:
+        return (1, register - PAGE_SIZES[0])
+    return (0, register)
+
+
+# (x, y) of the pixel driven by a linear register index, None if unused
+def register_to_xy(register):
+    pixel = PIXELS[register]
+    if pixel == NO_PIXEL:
+        return None
+    return (pixel % WIDTH, pixel // WIDTH)
+
+
+# Sort a list of pixel indices in place by the register they're written to.
+# Writes in that order select each page once and ascend through its addresses.
+def sort_writes(pixels):
+    pixels.sort(key=lambda pixel: REGISTERS[pixel])
+    return pixels
@@ -0,0 +1,194 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Receive LED matrix frames from the host over the USB CDC data channel.
+#
+# Frame format, pixel index x + y * 9:
+#   0xF5            Magic byte, start of a frame
+#   mode            MODE_MONO or MODE_GREY
+#   seq             Sequence number, 0-255 and wrapping around
+#   payload         MODE_MONO: 39 bytes, pixel i is bit i % 8 of byte i // 8
+#                   MODE_GREY: 306 bytes, one brightness byte per pixel
+#
+# After a frame is shown, the module answers with two bytes: 0x06 and the
+# sequence number. The host paces itself by keeping at most a couple of frames
+# unacknowledged. Bytes in front of a magic byte are skipped.
+#
+# If the host stopped in the middle of a frame, e.g. because it was restarted,
+# the rest of that frame never arrives. Once a partial frame got no new bytes
+# for FRAME_TIMEOUT_MS, it's dropped together with the bytes of it that are
+# still waiting, and the receiver looks for the start of the next frame. A
+# frame is sent in one go, so it only stalls that long if the host stopped.
+#
+# The payload is read in chunks into a preallocated buffer, only once enough
+# bytes for a chunk are waiting. Frames go through a MatrixFramebuffer, which
+# only writes the pixels that changed.
+#
+# See tools/matrix_stream_send.py for the sender on the host.
+#
+# Usage:
+#   receiver = FrameReceiver(usb_cdc.data, MatrixFramebuffer(is31))
+#   while True:
+#       receiver.poll()
+
+from supervisor import ticks_ms
+
+MAGIC = 0xF5
+MODE_MONO = 0x01
+MODE_GREY = 0x08
+ACK = 0x06
+
+# Bytes read at once, one USB full speed packet
+CHUNK_SIZE = 64
+# Drop a partial frame that got no new bytes for this long
+FRAME_TIMEOUT_MS = 50
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+# What poll() is waiting for
+WAIT_MAGIC = 0
+WAIT_HEADER = 1
+WAIT_PAYLOAD = 2
+
+
+def ticks_diff(end, start):
+    diff = (end - start) & TICKS_MASK
+    # Negative if end is before start
+    if diff > TICKS_MASK // 2:
+        diff -= TICKS_MASK + 1
+    return diff
+
+
+def payload_size(mode, count):
+    if mode == MODE_MONO:
+        return (count + 7) // 8
+    return count
+
+
+class FrameReceiver:
+    # on_value: Brightness of lit pixels in MODE_MONO
+    def __init__(self, serial, fb, on_value=0xFF):
+        self.serial = serial
+        self.fb = fb
+        self.count = fb.count
+        self.on_value = on_value
+
+        self.magic = bytearray(1)
+        # Mode and sequence number
+        self.header = bytearray(2)
+        self.payload = bytearray(payload_size(MODE_GREY, self.count))
+        # Chunk views of the payload per mode, so reading allocates nothing
+        view = memoryview(self.payload)
+        self.chunks = {}
+        for mode in (MODE_MONO, MODE_GREY):
+            size = payload_size(mode, self.count)
+            self.chunks[mode] = [
+                view[start : min(start + CHUNK_SIZE, size)]
+                for start in range(0, size, CHUNK_SIZE)
+            ]
+        self.ack = bytearray([ACK, 0])
+
+        self.state = WAIT_MAGIC
+        self.mode = MODE_MONO
+        self.chunk = 0
+        self.expected_seq = -1
+        # in_waiting at the last _stalled() check, and when it last changed.
+        # -1 after reading, the next check starts counting from then.
+        self.waiting = -1
+        self.progress = 0
+
+        # Frames shown, frames missing according to the sequence numbers,
+        # bytes skipped looking for a frame start, partial frames dropped
+        # after FRAME_TIMEOUT_MS
+        self.frames = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.timeouts = 0
+
+    # Read what's waiting on the serial port without blocking, up to the end
+    # of the next frame. Returns True if a frame was shown.
+    def poll(self):
+        serial = self.serial
+        while True:
+            waiting = serial.in_waiting
+            if self.state == WAIT_MAGIC:
+                if not waiting:
+                    return False
+                serial.readinto(self.magic)
+                if self.magic[0] == MAGIC:
+                    self.state = WAIT_HEADER
+                    self.waiting = -1
+                else:
+                    self.skipped += 1
+            elif self.state == WAIT_HEADER:
+                if waiting < 2:
+                    if not self._stalled(waiting):
+                        return False
+                    continue
+                serial.readinto(self.header)
+                self.waiting = -1
+                if self.header[0] in self.chunks:
+                    self.mode = self.header[0]
+                    self.chunk = 0
+                    self.state = WAIT_PAYLOAD
+                else:
+                    self.skipped += 3
+                    self.state = WAIT_MAGIC
+            else:
+                chunks = self.chunks[self.mode]
+                chunk = chunks[self.chunk]
+                if waiting < len(chunk):
+                    if not self._stalled(waiting):
+                        return False
+                    continue
+                serial.readinto(chunk)
+                self.waiting = -1
+                self.chunk += 1
+                if self.chunk == len(chunks):
+                    self.state = WAIT_MAGIC
+                    self._show(self.header[1])
+                    return True
+
+    # Not enough bytes for the next part of the frame. Returns True if the
+    # frame stalled for FRAME_TIMEOUT_MS and was dropped, then the receiver
+    # waits for a magic byte again.
+    def _stalled(self, waiting):
+        now = ticks_ms()
+        if waiting != self.waiting:
+            self.waiting = waiting
+            self.progress = now
+            return False
+        if ticks_diff(now, self.progress) < FRAME_TIMEOUT_MS:
+            return False
+
+        # The rest of the partial frame, a new frame can't have started in it.
+        # Checking it for a magic byte could take payload bytes for one.
+        for _ in range(waiting):
+            self.serial.readinto(self.magic)
+        read = 1
+        if self.state == WAIT_PAYLOAD:
+            read += len(self.header) + self.chunk * CHUNK_SIZE
+        self.skipped += read + waiting
+        self.timeouts += 1
+        self.state = WAIT_MAGIC
+        return True
+
+    def _show(self, seq):
+        if self.expected_seq >= 0 and seq != self.expected_seq:
+            self.dropped += (seq - self.expected_seq) & 0xFF
+        self.expected_seq = (seq + 1) & 0xFF
+
+        fb = self.fb
+        payload = self.payload
+        if self.mode == MODE_MONO:
+            value = self.on_value
+            for i in range(self.count):
+                fb[i] = value if payload[i >> 3] & (1 << (i & 7)) else 0
+        else:
+            fb.blit(payload)
+        fb.show()
+        self.frames += 1
+
+        self.ack[1] = seq
+        self.serial.write(self.ack)
@@ -0,0 +1,295 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Scrolling text on the vertical 9x34 LED matrix.
+#
+# The characters are stacked top to bottom and scroll up, one row per step.
+# Each glyph is rasterized once into a GlyphCache, a row of pixels is a bit
+# mask there. A scroll step shifts the rows of the canvas up with a single
+# slice copy and only draws the new bottom row from the cache, instead of
+# rendering the text again. The canvas then goes through MatrixFramebuffer,
+# which only writes the pixels that changed.
+#
+# Fonts have `height`, `width` (of the widest glyph) and rasterize(code) ->
+# (width, rows), rows being one bit mask per row, bit width - 1 is the
+# leftmost pixel. GlyphCache keeps the rows in 16 bits, fonts can be up to
+# MAX_GLYPH_WIDTH wide:
+# - Font3x5: Built-in, digits, upper case letters and some punctuation
+# - BitmapFont: BDF/PCF fonts through adafruit_bitmap_font
+#
+# Usage:
+#   ticker = Ticker(MatrixFramebuffer(is31), Font3x5(), "HELLO")
+#   while True:
+#       ticker.tick()
+#       time.sleep(ticker.wait_ms() / 1000)
+import gc
+from array import array
+from supervisor import ticks_ms
+
+FONT_3X5_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ .!?-:%+/="
+# 3 bits per row, top row in the highest bits
+FONT_3X5 = (
+    0x7B6F,  # 0
+    0x2C97,  # 1
+    0x73E7,  # 2
+    0x73CF,  # 3
+    0x5BC9,  # 4
+    0x79CF,  # 5
+    0x79EF,  # 6
+    0x7252,  # 7
+    0x7BEF,  # 8
+    0x7BCF,  # 9
+    0x2BED,  # A
+    0x6BAE,  # B
+    0x3923,  # C
+    0x6B6E,  # D
+    0x79A7,  # E
+    0x79A4,  # F
+    0x396B,  # G
+    0x5BED,  # H
+    0x7497,  # I
+    0x126A,  # J
+    0x5BAD,  # K
+    0x4927,  # L
+    0x5FED,  # M
+    0x6B6D,  # N
+    0x2B6A,  # O
+    0x6BA4,  # P
+    0x2B73,  # Q
+    0x6BAD,  # R
+    0x388E,  # S
+    0x7492,  # T
+    0x5B6F,  # U
+    0x5B6A,  # V
+    0x5BFD,  # W
+    0x5AAD,  # X
+    0x5A92,  # Y
+    0x72A7,  # Z
+    0x0000,  # Space
+    0x0002,  # .
+    0x2482,  # !
+    0x6282,  # ?
+    0x01C0,  # -
+    0x0410,  # :
+    0x52A5,  # %
+    0x05D0,  # +
+    0x12A4,  # /
+    0x0E38,  # =
+)
+
+# Glyph cache size if the free memory isn't known, e.g. on the host
+DEFAULT_GLYPHS = 32
+MIN_GLYPHS = 8
+MAX_GLYPHS = 96
+# Share of the free memory the cache may take
+HEAP_SHARE = 8
+# Per glyph besides the rows: width, LRU tick, dict entry
+GLYPH_OVERHEAD = 24
+# Glyph rows are kept in an array of 16-bit masks
+MAX_GLYPH_WIDTH = 16
+
+# Blank rows between two characters and after the end of the text
+CHAR_SPACING = 1
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+
+def ticks_diff(end, start):
+    diff = (end - start) & TICKS_MASK
+    # Negative if end is before start
+    if diff > TICKS_MASK // 2:
+        diff -= TICKS_MASK + 1
+    return diff
+
+
+class Font3x5:
+    # scale: Pixels per font pixel, 2 for 6x10 glyphs
+    def __init__(self, scale=1):
+        self.scale = scale
+        self.height = 5 * scale
+        self.width = 3 * scale
+
+    def rasterize(self, code):
+        char = chr(code).upper()
+        index = FONT_3X5_CHARS.find(char)
+        if index < 0:
+            index = FONT_3X5_CHARS.find("?")
+        bits = FONT_3X5[index]
+        scale = self.scale
+        rows = []
+        for row in range(5):
+            pattern = bits >> (3 * (4 - row)) & 0x7
+            mask = 0
+            for col in range(3):
+                if pattern & (4 >> col):
+                    mask |= ((1 << scale) - 1) << (scale * (2 - col))
+            for _ in range(scale):
+                rows.append(mask)
+        return (3 * scale, rows)
+
+
+class BitmapFont:
+    # path: BDF or PCF font on the CIRCUITPY drive, needs adafruit_bitmap_font
+    def __init__(self, path):
+        from adafruit_bitmap_font import bitmap_font
+
+        self.font = bitmap_font.load_font(path)
+        (self.width, self.height, _, self.descent) = self.font.get_bounding_box()
+
+    def rasterize(self, code):
+        glyph = self.font.get_glyph(code)
+        rows = [0] * self.height
+        if glyph is None:
+            return (0, rows)
+        # Glyphs are placed on the baseline, dy is above it
+        top = self.height + self.descent - glyph.height - glyph.dy
+        for y in range(glyph.height):
+            if not 0 <= top + y < self.height:
+                continue
+            mask = 0
+            for x in range(glyph.width):
+                if glyph.bitmap[x, y]:
+                    mask |= 1 << (glyph.width - 1 - x)
+            rows[top + y] = mask
+        return (glyph.width, rows)
+
+
+class GlyphCache:
+    # capacity: Number of glyphs, by default sized by the free memory
+    def __init__(self, font, capacity=None):
+        if font.width > MAX_GLYPH_WIDTH:
+            raise ValueError(f"Font is wider than {MAX_GLYPH_WIDTH} pixels")
+        self.font = font
+        self.height = font.height
+        if capacity is None:
+            capacity = DEFAULT_GLYPHS
+            mem_free = getattr(gc, "mem_free", None)
+            if mem_free:
+                glyph_size = 2 * self.height + GLYPH_OVERHEAD
+                capacity = mem_free() // HEAP_SHARE // glyph_size
+            capacity = max(MIN_GLYPHS, min(capacity, MAX_GLYPHS))
+        self.capacity = capacity
+
+        # Rows of slot N at N * height
+        self.rows = array("H", [0] * (capacity * self.height))
+        self.widths = bytearray(capacity)
+        # Character code in each slot, -1 if free
+        self.codes = [-1] * capacity
+        # When each slot was last used, the least recently used one is evicted
+        self.used = array("L", [0] * capacity)
+        self.tick = 0
+        # Character code -> slot
+        self.slots = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    # Slot of a glyph, rasterizing it if it isn't cached
+    def slot(self, code):
+        self.tick += 1
+        slot = self.slots.get(code)
+        if slot is not None:
+            self.used[slot] = self.tick
+            self.hits += 1
+            return slot
+
+        self.misses += 1
+        slot = 0
+        for i in range(self.capacity):
+            if self.used[i] < self.used[slot]:
+                slot = i
+        if self.codes[slot] >= 0:
+            del self.slots[self.codes[slot]]
+
+        (width, rows) = self.font.rasterize(code)
+        start = slot * self.height
+        for row in range(self.height):
+            self.rows[start + row] = rows[row]
+        self.widths[slot] = width
+        self.codes[slot] = code
+        self.used[slot] = self.tick
+        self.slots[code] = slot
+        return slot
+
+
+class Ticker:
+    def __init__(self, fb, font, text, rows_per_second=10, value=0xFF, cache=None):
+        self.fb = fb
+        self.width = fb.width
+        self.count = fb.count
+        self.value = value
+        self.cache = cache or GlyphCache(font)
+        self.step_ms = 1000 // rows_per_second
+
+        self.canvas = bytearray(self.count)
+        # Views for shifting the canvas up by one row with a slice copy
+        view = memoryview(self.canvas)
+        self.upper = view[: self.count - self.width]
+        self.lower = view[self.width :]
+
+        self.set_text(text)
+        self.next_step = ticks_ms()
+        # Steps shown and steps skipped because tick() was called too late
+        self.steps = 0
+        self.dropped = 0
+
+    def set_text(self, text):
+        self.codes = array("H", [ord(char) for char in text])
+        # Position in the text of the row drawn next
+        self.char = 0
+        self.row = 0
+
+    # Shift the canvas up and draw the next row of the text at the bottom
+    def _step(self):
+        self.upper[:] = self.lower
+
+        mask = 0
+        width = 0
+        cache = self.cache
+        if self.char < len(self.codes) and self.row < cache.height:
+            slot = cache.slot(self.codes[self.char])
+            mask = cache.rows[slot * cache.height + self.row]
+            width = cache.widths[slot]
+
+        # Centered, cut off if the glyph is wider than the matrix
+        shift = (self.width - width) // 2
+        base = self.count - self.width
+        value = self.value
+        for x in range(self.width):
+            bit = width - 1 - (x - shift)
+            lit = 0 <= bit < width and mask & (1 << bit)
+            self.canvas[base + x] = value if lit else 0
+
+        # Next row, the text starts over after it scrolled off the top
+        self.row += 1
+        if self.char < len(self.codes):
+            if self.row == cache.height + CHAR_SPACING:
+                self.row = 0
+                self.char += 1
+        elif self.row == self.fb.height:
+            self.row = 0
+            self.char = 0
+
+    # Scroll if a step is due. Returns True if it did.
+    def tick(self):
+        now = ticks_ms()
+        late = ticks_diff(now, self.next_step)
+        if late < 0:
+            return False
+
+        # Catch up, but only show the result
+        steps = 1 + late // self.step_ms
+        for _ in range(steps):
+            self._step()
+        self.dropped += steps - 1
+        self.next_step = (self.next_step + steps * self.step_ms) & TICKS_MASK
+
+        self.fb.blit(self.canvas)
+        self.fb.show()
+        self.steps += 1
+        return True
+
+    # Milliseconds until the next step is due, 0 if it's due now
+    def wait_ms(self):
+        return max(ticks_diff(self.next_step, ticks_ms()), 0)
@@ -4,20 +4,47 @@
 # Handle button pressed on the numpad.
 # Calculator button is not mapped. Not supported by circuitpython
 # Backlight 50% on, of off if SLEEP# low
+#
+# Fast boot: keys and HID come up first. BOOT_DONE is signaled after the first
+# scan pass, the backlight is only turned on after that.
 
-import time
+from startup import BootProfiler
+import gc
 import board
 import digitalio
 import analogio
 import usb_hid
+import usb_cdc
 import pwmio
-from adafruit_hid.keyboard import Keyboard
 from adafruit_hid.keycode import Keycode
+from keyscan import KeyMatrix, FILTER_NONE
+from debounce import Debouncer, DEBOUNCE_ASYM
+from scan_scheduler import ScanScheduler
+from hid_report import KeyboardReport
+from stats import Stats, HID_REPORTS, WAKE_MS, BOOT_MS
+from power import PowerManager
+from keymap import Keymap
+
+profiler = BootProfiler()
+profiler.mark("imports")
 
 MATRIX_COLS = 8
 MATRIX_ROWS = 4
 
 ADC_THRESHOLD = 2.9
+# Report presses at once, releases after the key was up for 5ms
+DEBOUNCE_MODE = DEBOUNCE_ASYM
+DEBOUNCE_MS = 5
+# Rapid trigger distance in volts, e.g. 0.2. Keys release and re-press when they
+# move up/down this much, instead of only at ADC_THRESHOLD. 0 to turn it off.
+RAPID_TRIGGER = 0
+# ADC noise filtering, see keyscan.py. tools/keyscan_filters.py compares what
+# the settings cost against how well they filter.
+OVERSAMPLE = 1
+ADC_FILTER = FILTER_NONE
+# Time every pass for scan_max_us/scan_p99_us in the stats. Allocates two long
+# ints per pass, off to keep the loop free of allocations.
+SCAN_TIMING = False
 DEBUG = False
 
 MATRIX = [
@@ -40,7 +67,7 @@ NUMPAD_KEYMAP = [
     [Keycode.KEYPAD_ONE, Keycode.KEYPAD_TWO, Keycode.KEYPAD_THREE, Keycode.KEYPAD_PLUS],
     [Keycode.KEYPAD_ZERO, Keycode.KEYPAD_ZERO, Keycode.KEYPAD_ENTER, Keycode.ENTER],
 ]
-keyboard = Keyboard(usb_hid.devices)
+report = KeyboardReport(usb_hid.devices)
 
 # Set unused pins to input to avoid interfering. They're hooked up to rows 5 and 6
 gp6 = sleep_pin = digitalio.DigitalInOut(board.GP6)
@@ -59,7 +86,7 @@ mux_b.direction = digitalio.Direction.OUTPUT
 mux_c = sleep_pin = digitalio.DigitalInOut(board.MUX_C)
 mux_c.direction = digitalio.Direction.OUTPUT
 
-# Set up KSO pins
+# Set up KSO pins, only the ones of the numpad's columns
 kso_pins = [
     digitalio.DigitalInOut(x)
     for x in [
@@ -81,101 +108,108 @@ kso_pins = [
         board.KSO13,
         board.KSO14,
         board.KSO15,
-    ]
+    ][:MATRIX_COLS]
 ]
 for kso in kso_pins:
     kso.direction = digitalio.Direction.OUTPUT
 adc_in = analogio.AnalogIn(board.GP28)
+profiler.mark("pins")
+
+debouncer = Debouncer(MATRIX_COLS, MATRIX_ROWS, DEBOUNCE_MODE, DEBOUNCE_MS)
+keys = KeyMatrix(
+    kso_pins,
+    (mux_a, mux_b, mux_c),
+    adc_in,
+    MATRIX_COLS,
+    MATRIX_ROWS,
+    ADC_THRESHOLD,
+    debouncer,
+    rapid_trigger=RAPID_TRIGGER,
+    oversample=OVERSAMPLE,
+    filter=ADC_FILTER,
+)
+# Don't touch the keys while booting
+keys.calibrate()
+profiler.mark("keys")
 
-# Signal boot done
-boot_done = sleep_pin = digitalio.DigitalInOut(board.BOOT_DONE)
-boot_done.direction = digitalio.Direction.OUTPUT
-boot_done.value = False
-
-
-def mux_select_row(row):
-    index = 0
-    if row == 0:
-        index = 2
-    elif row == 1:
-        index = 0
-    elif row == 2:
-        index = 1
-    else:
-        index = row
-
-    mux_a.value = index & 0x01
-    mux_b.value = index & 0x02
-    mux_c.value = index & 0x04
-
-
-def drive_col(col, value):
-    kso_pins[col].value = value
-
-
-def to_voltage(adc_sample):
-    return (adc_sample * 3.3) / 65536
-
-
-def matrix_scan():
-    matrix_pos = None
-    for col in range(MATRIX_COLS):
-        drive_col(col, True)
-
-    for col in range(MATRIX_COLS):
-        drive_col(col, False)
+backlight = pwmio.PWMOut(board.GP25, frequency=5000, duty_cycle=0)
 
-        for row in range(MATRIX_ROWS):
-            mux_select_row(row)
+# Flat lookup tables by matrix position, the nested tables aren't needed anymore
+keymap = Keymap(MATRIX, NUMPAD_KEYMAP, MATRIX_COLS, MATRIX_ROWS)
+del MATRIX, NUMPAD_KEYMAP
+gc.collect()
+profiler.mark("keymap")
 
-            voltage = to_voltage(adc_in.value)
-            if DEBUG:
-                print(f"{col}:{row}: {voltage}V")
 
-            if voltage < ADC_THRESHOLD:
-                if DEBUG:
-                    print(f"Pressed {col}:{row}")
-                matrix_pos = (col, row)
+# Backlight off and no keys held down while the host sleeps
+def suspend():
+    backlight.duty_cycle = 0
+    report.release_all()
+    report.send()
 
-                # TODO: Handle debounce in a different way
-                # If we break here we can only ever handle a single keypress at once
-                if matrix_pos:
-                    break
 
-        drive_col(col, True)
-    if DEBUG:
-        print()
-    return matrix_pos
+def restore_backlight():
+    backlight.duty_cycle = int(65535 / 2)
 
-# SLEEP# pin. Low if the host is sleeping
-sleep_pin = digitalio.DigitalInOut(board.GP0)
-sleep_pin.direction = digitalio.Direction.INPUT
 
-backlight = pwmio.PWMOut(board.GP25, frequency=5000, duty_cycle=0)
+# Light sleep while SLEEP# is low, no scanning
+power = PowerManager(board.GP0, on_sleep=suspend, on_wake=restore_backlight)
 
-prev_matrix_pos = None
-debounce = 0
-color = 0  # 0 Blue, 1 Green, 2 Red
+scheduler = ScanScheduler()
+# Counters, read over usb_cdc.data if boot.py enabled it
+stats = Stats(usb_cdc.data, time_scans=SCAN_TIMING)
+booting = True
 while True:
-    backlight.duty_cycle = int(65535 / 2) if sleep_pin.value else 0
-    matrix_pos = matrix_scan()
-
-    if not matrix_pos:
-        debounce = 0
-    if matrix_pos and matrix_pos == prev_matrix_pos:
-        debounce += 1
-        # print(f"Debounce {debounce}")
-
-    if matrix_pos and (matrix_pos != prev_matrix_pos or debounce > 10 or debounce == 0):
-        debounce = 0
-        (col, row) = matrix_pos
-        (x, y) = MATRIX[row][col]
-        code = NUMPAD_KEYMAP[y][x]
-        if code:
-            print(f"Pressed {code} ({col}, {row})")
-
-            keyboard.press(code)
-            keyboard.release_all()
-    prev_matrix_pos = matrix_pos
-
-    time.sleep(0.01)
+    if power.poll():
+        stats.set(WAKE_MS, power.wake_ms)
+        # Light sleep and wake-up allocate, clean up before scanning again
+        stats.collect()
+
+    # Only the keys that were pressed or released since the last pass are handled
+    stats.scan_start()
+    changed_keys = keys.scan()
+    stats.scan_end()
+    if changed_keys:
+        for col in range(MATRIX_COLS):
+            changed = keys.changed[col]
+            if not changed:
+                continue
+            key = col * MATRIX_ROWS
+            for row in range(MATRIX_ROWS):
+                code = keymap.keycodes[key + row]
+                if not changed & (1 << row) or not code:
+                    continue
+                pressed = keys.is_pressed(col, row)
+                if DEBUG:
+                    action = "Pressed" if pressed else "Released"
+                    print(f"{action} {code} ({col}, {row})")
+
+                if pressed:
+                    report.press(code)
+                else:
+                    report.release(code)
+
+    # One report for all keys that changed in this pass, none if nothing changed
+    if report.send():
+        stats.add(HID_REPORTS)
+    if booting:
+        # First pass done, keys and HID work
+        booting = False
+        boot_done = digitalio.DigitalInOut(board.BOOT_DONE)
+        boot_done.direction = digitalio.Direction.OUTPUT
+        boot_done.value = False
+        profiler.boot_done()
+        restore_backlight()
+        profiler.mark("backlight")
+        stats.set(BOOT_MS, profiler.boot_done_ms)
+        stats.boot_report = profiler.report()
+        if DEBUG:
+            print(stats.boot_report)
+    stats.poll()
+
+    # Scan fast while keys are in use, slow down when idle
+    scheduler.update(keys.active)
+    # Passes don't allocate, so collecting when the keys went idle is enough
+    if scheduler.idle_point:
+        stats.collect()
+    scheduler.wait()
@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Power down with the host, on the edges of the SLEEP# signal (GP0).
+#
+# When the host goes to sleep, on_sleep() is called, the LED controllers are
+# shut down through SDB (GP29) and the microcontroller goes into light sleep
+# until SLEEP# is high again. Nothing runs in between, also no key scanning,
+# so keys don't wake the host.
+# On wake-up SDB goes high and on_wake() restores the LEDs, e.g. with
+# restore() of KeyboardFrame, MatrixFramebuffer or LedState, which re-send the
+# last frame from RAM in bulk writes instead of running the setup again.
+#
+# The time from wake-up until the first frame is back on the LEDs is measured
+# and kept in wake_ms (last) and worst_wake_ms.
+#
+# Without the alarm module, e.g. in builds without it, the sleep is a loop
+# checking SLEEP# every POLL_MS instead.
+#
+# Usage:
+#   power = PowerManager(board.GP0, sdb, on_wake=frame.restore)
+#   while True:
+#       power.poll()
+#       ...
+import time
+import digitalio
+from supervisor import ticks_ms
+
+try:
+    import alarm
+except ImportError:
+    alarm = None
+
+POLL_MS = 100
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+
+class PowerManager:
+    # sleep_pin: SLEEP# as board pin, it's released while in light sleep
+    # sdb: DigitalInOut of the LED controller shutdown pin, or None
+    def __init__(self, sleep_pin, sdb=None, on_sleep=None, on_wake=None):
+        self.sleep_pin = sleep_pin
+        self.sdb = sdb
+        self.on_sleep = on_sleep
+        self.on_wake = on_wake
+        self.pin = self._input()
+
+        self.sleeps = 0
+        # Wake-up until the LEDs are restored, in ms
+        self.wake_ms = 0
+        self.worst_wake_ms = 0
+
+    def _input(self):
+        pin = digitalio.DigitalInOut(self.sleep_pin)
+        pin.direction = digitalio.Direction.INPUT
+        return pin
+
+    # Check SLEEP#, sleep until the host wakes up if it went to sleep.
+    # Returns True if it slept.
+    def poll(self):
+        if self.pin.value:
+            return False
+        self.sleep()
+        return True
+
+    def sleep(self):
+        if self.on_sleep:
+            self.on_sleep()
+        if self.sdb:
+            self.sdb.value = False
+        self.sleeps += 1
+
+        if alarm:
+            # The alarm needs the pin, hand it back afterwards
+            self.pin.deinit()
+            alarm.light_sleep_until_alarms(
+                alarm.pin.PinAlarm(pin=self.sleep_pin, value=True)
+            )
+            self.pin = self._input()
+        while not self.pin.value:
+            time.sleep(POLL_MS / 1000)
+
+        woke = ticks_ms()
+        if self.sdb:
+            self.sdb.value = True
+        if self.on_wake:
+            self.on_wake()
+        self.wake_ms = (ticks_ms() - woke) & TICKS_MASK
+        if self.wake_ms > self.worst_wake_ms:
+            self.worst_wake_ms = self.wake_ms
@@ -0,0 +1,148 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Cooperative runtime on top of CircuitPython asyncio.
+#
+# Each task is a function (or async function) that does one step of work and
+# is called every period_ms. Before a step runs, the task yields as long as a
+# task with a higher priority is due, so e.g. the matrix scan never waits
+# behind an LED flush. A due task only gets one turn ahead of each step of a
+# lower task: once it ran after that task's last step, it doesn't hold it up
+# again, even if it's due again right away because its step took longer than
+# its period. Otherwise a scan step that overruns its period would starve all
+# tasks below it, tools/runtime_check.py checks that.
+#
+# Long work like flushing LEDs should be split into several steps with
+# `await asyncio.sleep(0)` in between, see flush().
+#
+# The runtime records how late each task started compared to when it was due.
+# The worst case per task shows regressions, e.g. a step that got too slow.
+#
+# Usage:
+#   runtime = Runtime()
+#   runtime.add("scan", scan_step, period_ms=1, priority=3)
+#   runtime.add("leds", leds_step, period_ms=33, priority=1)
+#   runtime.run()
+import asyncio
+from supervisor import ticks_ms
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+
+def ticks_diff(end, start):
+    diff = (end - start) & TICKS_MASK
+    # Negative if end is before start
+    if diff > TICKS_MASK // 2:
+        diff -= TICKS_MASK + 1
+    return diff
+
+
+# Show a frame (KeyboardFrame, MatrixFramebuffer) one part at a time,
+# letting other tasks run in between
+async def flush(frame):
+    for part in range(frame.parts):
+        frame.show_part(part)
+        await asyncio.sleep(0)
+
+
+class Task:
+    def __init__(self, name, step, period_ms, priority):
+        self.name = name
+        self.step = step
+        self.period_ms = period_ms
+        self.priority = priority
+        self.due = ticks_ms()
+        # Runtime.steps when the step last started
+        self.last_step = 0
+
+        self.runs = 0
+        # Latest start compared to when the step was due
+        self.worst_latency_ms = 0
+        # Longest step, including the time it yielded to other tasks
+        self.worst_duration_ms = 0
+
+
+class Runtime:
+    def __init__(self):
+        self.tasks = []
+        # Steps started so far, by all tasks
+        self.steps = 0
+
+    # step: Function or async function, called every period_ms.
+    # Tasks with a higher priority go first if several are due.
+    def add(self, name, step, period_ms, priority=0):
+        task = Task(name, step, period_ms, priority)
+        self.tasks.append(task)
+        self.tasks.sort(key=lambda t: -t.priority)
+        return task
+
+    # A task with a higher priority than this one is due and hasn't run since
+    # step waiting_since, when this one's last step ended
+    def _higher_due(self, task, now, waiting_since):
+        for other in self.tasks:
+            if other.priority <= task.priority:
+                return False
+            if other.last_step > waiting_since:
+                continue
+            if ticks_diff(now, other.due) >= 0:
+                return True
+        return False
+
+    async def _run(self, task):
+        waiting_since = self.steps
+        while True:
+            while self._higher_due(task, ticks_ms(), waiting_since):
+                await asyncio.sleep(0)
+
+            self.steps += 1
+            task.last_step = self.steps
+            start = ticks_ms()
+            latency = ticks_diff(start, task.due)
+            if latency > task.worst_latency_ms:
+                task.worst_latency_ms = latency
+
+            result = task.step()
+            # Async step
+            if result is not None and hasattr(result, "send"):
+                await result
+
+            now = ticks_ms()
+            duration = ticks_diff(now, start)
+            if duration > task.worst_duration_ms:
+                task.worst_duration_ms = duration
+            task.runs += 1
+            waiting_since = self.steps
+
+            task.due = (task.due + task.period_ms) & TICKS_MASK
+            wait = ticks_diff(task.due, now)
+            if wait < 0:
+                # Fell behind, don't try to catch up on missed periods
+                task.due = now
+                wait = 0
+            await asyncio.sleep(wait / 1000)
+
+    async def _main(self):
+        now = ticks_ms()
+        for task in self.tasks:
+            task.due = now
+        await asyncio.gather(*[asyncio.create_task(self._run(t)) for t in self.tasks])
+
+    # Run all tasks, doesn't return
+    def run(self):
+        asyncio.run(self._main())
+
+    # Forget the recorded worst cases
+    def reset_stats(self):
+        for task in self.tasks:
+            task.runs = 0
+            task.worst_latency_ms = 0
+            task.worst_duration_ms = 0
+
+    def report(self):
+        for task in self.tasks:
+            print(
+                f"{task.name}: {task.runs} runs, "
+                + f"worst latency {task.worst_latency_ms}ms, "
+                + f"worst duration {task.worst_duration_ms}ms"
+            )
@@ -0,0 +1,82 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Adaptive scan rate for the keyscan loops.
+#
+# While a key is down or was active recently, scan back to back (1kHz+).
+# The longer the keys are idle, the longer the pause between passes gets,
+# one step every IDLE_STEP_MS. While the host is asleep the loop doesn't scan
+# at all, see power.py.
+#
+# idle_point is True for the one pass where the rate steps down, the keys
+# have been idle for a while then. The loop can run gc.collect() there
+# instead of letting the collector kick in during a keypress.
+#
+# Usage:
+#   scheduler = ScanScheduler()
+#   while True:
+#       keys.scan()
+#       scheduler.update(keys.active)
+#       if scheduler.idle_point:
+#           gc.collect()
+#       scheduler.wait()
+import time
+from supervisor import ticks_ms
+
+# Pause between the start of two passes, fastest first. 0 means back to back.
+IDLE_PERIODS_MS = (0, 1, 2, 5, 10, 20)
+IDLE_STEP_MS = 500
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+
+class ScanScheduler:
+    def __init__(self, periods_ms=IDLE_PERIODS_MS, step_ms=IDLE_STEP_MS):
+        self.periods_ms = periods_ms
+        self.step_ms = step_ms
+
+        now = ticks_ms()
+        self.last_active = now
+        self.pass_start = now
+        self.level = 0
+        self.period_ms = periods_ms[0]
+        # The rate stepped down in the last update()
+        self.idle_point = False
+
+        # Measured passes in the last full second
+        self.rate_hz = 0
+        self.passes = 0
+        self.window_start = now
+
+    # Call after every pass.
+    # active: A key is down or bouncing.
+    def update(self, active):
+        now = ticks_ms()
+        if active:
+            self.last_active = now
+            level = 0
+        else:
+            idle = (now - self.last_active) & TICKS_MASK
+            level = min(idle // self.step_ms, len(self.periods_ms) - 1)
+        self.idle_point = level > self.level
+        self.level = level
+        self.period_ms = self.periods_ms[level]
+
+        self.passes += 1
+        if (now - self.window_start) & TICKS_MASK >= 1000:
+            self.rate_hz = self.passes
+            self.passes = 0
+            self.window_start = now
+
+    # Sleep until the next pass is due
+    def wait(self):
+        if self.period_ms:
+            elapsed = (ticks_ms() - self.pass_start) & TICKS_MASK
+            if elapsed < self.period_ms:
+                time.sleep((self.period_ms - elapsed) / 1000)
+        self.pass_start = ticks_ms()
+
+    # Target rate of the current level, 0 if scanning back to back
+    def target_hz(self):
+        return 1000 // self.period_ms if self.period_ms else 0
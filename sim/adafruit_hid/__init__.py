@@ -0,0 +1,11 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Stand-in for adafruit_hid on the simulated usb_hid
+
+
+def find_device(devices, *, usage_page, usage, timeout=None):
+    for device in devices:
+        if device.usage_page == usage_page and device.usage == usage:
+            return device
+    raise ValueError("Could not find matching HID device.")
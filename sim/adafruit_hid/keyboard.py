@@ -0,0 +1,40 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Stand-in for adafruit_hid.keyboard, sends a report per press()/release()
+from adafruit_hid import find_device
+
+
+class Keyboard:
+    def __init__(self, devices, timeout=None):
+        self._keyboard_device = find_device(devices, usage_page=0x1, usage=0x06)
+        self.report = bytearray(8)
+
+    def press(self, *keycodes):
+        for keycode in keycodes:
+            if 0xE0 <= keycode <= 0xE7:
+                self.report[0] |= 1 << (keycode - 0xE0)
+            elif keycode not in self.report[2:]:
+                for i in range(2, 8):
+                    if not self.report[i]:
+                        self.report[i] = keycode
+                        break
+        self._keyboard_device.send_report(self.report)
+
+    def release(self, *keycodes):
+        for keycode in keycodes:
+            if 0xE0 <= keycode <= 0xE7:
+                self.report[0] &= ~(1 << (keycode - 0xE0))
+            for i in range(2, 8):
+                if self.report[i] == keycode:
+                    self.report[i] = 0
+        self._keyboard_device.send_report(self.report)
+
+    def release_all(self):
+        for i in range(8):
+            self.report[i] = 0
+        self._keyboard_device.send_report(self.report)
+
+    def send(self, *keycodes):
+        self.press(*keycodes)
+        self.release_all()
@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Stand-in for the adafruit_is31fl3741 driver on the simulated bus.
+# Same register accesses as the real driver for the parts the scripts use.
+from adafruit_bus_device import i2c_device
+
+NO_BUFFER = 0x00
+PREFER_BUFFER = 0x01
+MUST_BUFFER = 0x02
+
+_IS3741_ADDR_DEFAULT = 0x30
+_IS3741_COMMANDREGISTER = 0xFD
+_IS3741_COMMANDREGISTERLOCK = 0xFE
+_IS3741_FUNCTION_PAGE = 4
+_IS3741_FUNCREG_CONFIG = 0x00
+_IS3741_FUNCREG_GCURRENT = 0x01
+_IS3741_FUNCREG_RESET = 0x3F
+
+
+class IS31FL3741:
+    def __init__(self, i2c, address=_IS3741_ADDR_DEFAULT, allocate=NO_BUFFER):
+        self.i2c_device = i2c_device.I2CDevice(i2c, address)
+        self._buf = bytearray(2)
+        self._page = None
+        self._config = 0
+        self._global_current = 0
+        self.reset()
+
+    def page(self, page_value=None):
+        if page_value is None:
+            return self._page
+        if self._page is None or page_value != self._page:
+            self._write(_IS3741_COMMANDREGISTERLOCK, 0xC5)
+            self._write(_IS3741_COMMANDREGISTER, page_value)
+            self._page = page_value
+        return None
+
+    def _write(self, register, value):
+        self._buf[0] = register
+        self._buf[1] = value
+        with self.i2c_device as i2c:
+            i2c.write(self._buf)
+
+    def _write_function(self, register, value):
+        self.page(_IS3741_FUNCTION_PAGE)
+        self._write(register, value)
+
+    def reset(self):
+        self._write_function(_IS3741_FUNCREG_RESET, 0xAE)
+        self._config = 0
+
+    @property
+    def enable(self):
+        return bool(self._config & 0x01)
+
+    @enable.setter
+    def enable(self, value):
+        self._config = (self._config & ~0x01) | bool(value)
+        self._write_function(_IS3741_FUNCREG_CONFIG, self._config)
+
+    @property
+    def global_current(self):
+        return self._global_current
+
+    @global_current.setter
+    def global_current(self, value):
+        self._global_current = value
+        self._write_function(_IS3741_FUNCREG_GCURRENT, value)
+
+    def set_led_scaling(self, scale):
+        scalebuf = bytearray(181)
+        for i in range(1, 181):
+            scalebuf[i] = scale
+        for page in (2, 3):
+            self.page(page)
+            with self.i2c_device as i2c:
+                i2c.write(scalebuf, end=181 if page == 2 else 172)
+
+    def __setitem__(self, led, pwm):
+        if not 0 <= led <= 350:
+            raise ValueError("LED must be 0 ~ 350")
+        if led < 180:
+            self.page(0)
+            self._write(led, pwm)
+        else:
+            self.page(1)
+            self._write(led - 180, pwm)
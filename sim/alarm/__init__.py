@@ -0,0 +1,35 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated alarm module. Light sleep skips ahead in virtual time to the
+# first alarm that goes off, the time spent is counted in hardware.sleep_ns.
+from sim_hardware import hardware
+from alarm import pin, time  # noqa: F401
+
+wake_alarm = None
+
+
+def _triggered(alarms):
+    for candidate in alarms:
+        if candidate.triggered():
+            return candidate
+    return None
+
+
+def light_sleep_until_alarms(*alarms):
+    global wake_alarm
+    triggered = _triggered(alarms)
+    while triggered is None:
+        # Next point in time something could change
+        events = [change[0] for change in hardware.input_changes]
+        events += [a.deadline_ms() for a in alarms if a.deadline_ms() is not None]
+        if not events:
+            if hardware.stop_ns is None:
+                raise RuntimeError("Light sleep without an alarm that goes off")
+            events.append(hardware.stop_ns / 1000000)
+        target_ns = max(int(min(events) * 1000000), hardware.clock_ns + 1)
+        hardware.sleep_ns += target_ns - hardware.clock_ns
+        hardware.advance(target_ns - hardware.clock_ns)
+        triggered = _triggered(alarms)
+    wake_alarm = triggered
+    return triggered
@@ -0,0 +1,19 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated alarm.pin, level triggered
+from sim_hardware import hardware
+
+
+class PinAlarm:
+    def __init__(self, pin, value, edge=False, pull=False):
+        self.pin = pin
+        self.value = value
+        self.edge = edge
+        self.pull = pull
+
+    def triggered(self):
+        return bool(hardware.read_pin(self.pin.name)) == self.value
+
+    def deadline_ms(self):
+        return None
@@ -0,0 +1,16 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated alarm.time, on the virtual clock
+from sim_hardware import hardware
+
+
+class TimeAlarm:
+    def __init__(self, *, monotonic_time=None, epoch_time=None):
+        self.monotonic_time = monotonic_time
+
+    def triggered(self):
+        return hardware.clock_ns >= self.monotonic_time * 1000000000
+
+    def deadline_ms(self):
+        return self.monotonic_time * 1000
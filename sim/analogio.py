@@ -0,0 +1,18 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated analogio, the value comes from the key matrix model in sim_hardware
+from sim_hardware import hardware
+
+
+class AnalogIn:
+    def __init__(self, pin):
+        self.pin = pin
+        self.reference_voltage = 3.3
+
+    @property
+    def value(self):
+        return hardware.read_adc()
+
+    def deinit(self):
+        pass
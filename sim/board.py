@@ -0,0 +1,32 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated board module of the framework_inputmodule board
+
+
+class Pin:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"board.{self.name}"
+
+
+for _i in range(30):
+    globals()[f"GP{_i}"] = Pin(f"GP{_i}")
+for _i in range(16):
+    globals()[f"KSO{_i}"] = Pin(f"KSO{_i}")
+
+MUX_ENABLE = Pin("MUX_ENABLE")
+MUX_A = Pin("MUX_A")
+MUX_B = Pin("MUX_B")
+MUX_C = Pin("MUX_C")
+BOOT_DONE = Pin("BOOT_DONE")
+SCL = Pin("SCL")
+SDA = Pin("SDA")
+
+
+def I2C():
+    import busio
+
+    return busio.I2C(SCL, SDA)
@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated busio.I2C, talks to the LED controller models in sim_hardware
+from sim_hardware import hardware
+
+
+class I2C:
+    def __init__(self, scl, sda, *, frequency=100000, timeout=255):
+        self.scl = scl
+        self.sda = sda
+        self.frequency = frequency
+        self.locked = False
+
+    def try_lock(self):
+        if self.locked:
+            return False
+        self.locked = True
+        return True
+
+    def unlock(self):
+        self.locked = False
+
+    def scan(self):
+        # A full scan addresses every possible device
+        for address in range(0x08, 0x78):
+            try:
+                hardware.i2c_write(address, b"")
+            except OSError:
+                pass
+        return sorted(hardware.devices)
+
+    def probe(self, address):
+        try:
+            hardware.i2c_write(address, b"")
+        except OSError:
+            return False
+        return True
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        hardware.i2c_write(address, bytes(buffer[start:end]))
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        buffer[start:end] = hardware.i2c_read(address, end - start)
+
+    def writeto_then_readfrom(
+        self,
+        address,
+        out_buffer,
+        in_buffer,
+        *,
+        out_start=0,
+        out_end=None,
+        in_start=0,
+        in_end=None,
+    ):
+        self.writeto(address, out_buffer, start=out_start, end=out_end)
+        self.readfrom_into(address, in_buffer, start=in_start, end=in_end)
+
+    def deinit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
@@ -0,0 +1,82 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Stand-in for the framework_is31fl3743 driver on the simulated bus.
+# Same interface as the IS31FL3741 driver: LED N is PWM register N + 1 on
+# page 0, scaling on page 1, function registers on page 2.
+from adafruit_bus_device import i2c_device
+
+_IS3743_ADDR_DEFAULT = 0x20
+_IS3743_COMMANDREGISTER = 0xFD
+_IS3743_COMMANDREGISTERLOCK = 0xFE
+_IS3743_FUNCTION_PAGE = 2
+_IS3743_FUNCREG_CONFIG = 0x00
+_IS3743_FUNCREG_GCURRENT = 0x01
+_IS3743_FUNCREG_RESET = 0x2F
+_IS3743_LED_COUNT = 18 * 11
+
+
+class IS31FL3743:
+    def __init__(self, i2c, address=_IS3743_ADDR_DEFAULT):
+        self.i2c_device = i2c_device.I2CDevice(i2c, address)
+        self._buf = bytearray(2)
+        self._page = None
+        self._config = 0
+        self._global_current = 0
+        self.reset()
+
+    def page(self, page_value=None):
+        if page_value is None:
+            return self._page
+        if self._page is None or page_value != self._page:
+            self._write(_IS3743_COMMANDREGISTERLOCK, 0xC5)
+            self._write(_IS3743_COMMANDREGISTER, page_value)
+            self._page = page_value
+        return None
+
+    def _write(self, register, value):
+        self._buf[0] = register
+        self._buf[1] = value
+        with self.i2c_device as i2c:
+            i2c.write(self._buf)
+
+    def _write_function(self, register, value):
+        self.page(_IS3743_FUNCTION_PAGE)
+        self._write(register, value)
+
+    def reset(self):
+        self._write_function(_IS3743_FUNCREG_RESET, 0xAE)
+        self._config = 0
+
+    @property
+    def enable(self):
+        return bool(self._config & 0x01)
+
+    @enable.setter
+    def enable(self, value):
+        self._config = (self._config & ~0x01) | bool(value)
+        self._write_function(_IS3743_FUNCREG_CONFIG, self._config)
+
+    @property
+    def global_current(self):
+        return self._global_current
+
+    @global_current.setter
+    def global_current(self, value):
+        self._global_current = value
+        self._write_function(_IS3743_FUNCREG_GCURRENT, value)
+
+    def set_led_scaling(self, scale):
+        scalebuf = bytearray(1 + _IS3743_LED_COUNT)
+        scalebuf[0] = 0x01
+        for i in range(1, len(scalebuf)):
+            scalebuf[i] = scale
+        self.page(1)
+        with self.i2c_device as i2c:
+            i2c.write(scalebuf)
+
+    def __setitem__(self, led, pwm):
+        if not 0 <= led < _IS3743_LED_COUNT:
+            raise ValueError(f"LED must be 0 ~ {_IS3743_LED_COUNT - 1}")
+        self.page(0)
+        self._write(led + 1, pwm)
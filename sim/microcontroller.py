@@ -0,0 +1,24 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated microcontroller, a reset ends the simulation
+from sim_hardware import SimulationDone
+
+
+class RunMode:
+    NORMAL = "NORMAL"
+    SAFE_MODE = "SAFE_MODE"
+    UF2 = "UF2"
+    BOOTLOADER = "BOOTLOADER"
+
+
+next_reset = RunMode.NORMAL
+
+
+def on_next_reset(run_mode):
+    global next_reset
+    next_reset = run_mode
+
+
+def reset():
+    raise SimulationDone()
@@ -0,0 +1,26 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated pwmio, duty cycle writes go to sim_hardware
+from sim_hardware import hardware
+
+
+class PWMOut:
+    def __init__(self, pin, *, duty_cycle=0, frequency=500, variable_frequency=False):
+        self.pin = pin
+        self.frequency = frequency
+        self._duty_cycle = duty_cycle
+        hardware.pwm_duty[pin.name] = duty_cycle
+
+    @property
+    def duty_cycle(self):
+        return self._duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        self._duty_cycle = value
+        hardware.pwm_duty[self.pin.name] = value
+        hardware.write_pin(self.pin.name, value)
+
+    def deinit(self):
+        pass
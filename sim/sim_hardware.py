@@ -0,0 +1,292 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# State of the simulated input module, shared by the fake CircuitPython
+# modules in this folder (board, digitalio, analogio, pwmio, busio, ...).
+#
+# - A virtual clock. It advances when the script sleeps and by a fixed cost
+#   per GPIO write, ADC read and I2C byte, so simulated time doesn't depend
+#   on how fast the host is.
+# - The analog key matrix: the ADC reads a pressed level if the key at the
+#   KSO column that's driven low and the row selected by the MUX is pressed
+#   according to the scripted key presses. Optional gaussian noise on every
+#   reading, from a seeded generator so runs are repeatable.
+# - IS31FL3741/IS31FL3743 register pages on the I2C bus.
+# - Counters for GPIO writes, ADC reads, I2C transactions and bytes, and the
+#   HID reports sent to the host.
+
+import random
+
+# Virtual cost of hardware accesses in nanoseconds
+GPIO_WRITE_NS = 1000
+ADC_READ_NS = 5000
+# 400kHz I2C, 9 clocks per byte, plus start/address/stop per transaction
+I2C_BYTE_NS = 22500
+I2C_TRANSACTION_NS = 50000
+
+# ADC readings (16 bit) of a released and a fully pressed key
+IDLE_LEVEL = 63500
+PRESSED_LEVEL = 20000
+
+# The MUX inputs aren't wired in row order, MUX index to matrix row
+MUX_INDEX_ROW = (1, 2, 0, 3, 4, 5, 6, 7)
+
+
+class SimulationDone(BaseException):
+    pass
+
+
+class KeyPress:
+    # Key at (col, row) goes down at start_ms and up at end_ms.
+    # depth: How far it goes down, 1.0 is fully pressed.
+    # travel_ms: Time to go all the way down or up, 0 for a step.
+    # bounce_ms: Contact chatter after going down and up.
+    def __init__(
+        self, col, row, start_ms, end_ms, depth=1.0, travel_ms=0, bounce_ms=0
+    ):
+        self.col = col
+        self.row = row
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.depth = depth
+        self.travel_ms = travel_ms
+        self.bounce_ms = bounce_ms
+
+    # How far the key is down at time t, 0.0 - 1.0
+    def position(self, t_ms):
+        if t_ms < self.start_ms:
+            return 0.0
+        if t_ms < self.end_ms:
+            since = t_ms - self.start_ms
+        else:
+            since = t_ms - self.end_ms
+
+        if since < self.bounce_ms:
+            # Alternate between the old and new level every 0.3ms
+            bouncing = int(since / 0.3) % 2 == 1
+        else:
+            bouncing = False
+
+        if self.travel_ms and since < self.travel_ms:
+            fraction = since / self.travel_ms
+        else:
+            fraction = 1.0
+        if t_ms < self.end_ms:
+            position = self.depth * fraction
+        else:
+            position = self.depth * (1.0 - fraction)
+        if bouncing:
+            position = self.depth - position
+        return position
+
+
+class IS31Model:
+    # Register pages of an IS31FL3741 or IS31FL3743.
+    # Writing 0xC5 to 0xFE unlocks 0xFD, which selects the page. Register
+    # addresses auto-increment within a transaction.
+    def __init__(self, name, address, pages):
+        self.name = name
+        self.address = address
+        self.pages = [bytearray(256) for _ in range(pages)]
+        self.page = 0
+        self.unlocked = False
+        self.register = 0
+        self.transactions = 0
+        self.bytes = 0
+
+    def write(self, data):
+        if not data:
+            return
+        register = data[0]
+        for value in data[1:]:
+            if register == 0xFE:
+                self.unlocked = value == 0xC5
+            elif register == 0xFD:
+                if self.unlocked:
+                    self.page = value
+                self.unlocked = False
+            elif self.page < len(self.pages):
+                self.pages[self.page][register] = value
+            register = (register + 1) & 0xFF
+        self.register = register
+
+    def read(self, length):
+        page = self.pages[self.page] if self.page < len(self.pages) else bytearray(256)
+        data = bytearray(length)
+        for i in range(length):
+            if self.register == 0xFC:
+                # ID register
+                data[i] = self.address << 1
+            else:
+                data[i] = page[self.register]
+            self.register = (self.register + 1) & 0xFF
+        return data
+
+
+# (name, pages) of the LED controllers on each module
+MODULE_DEVICES = {
+    "macropad": {0x20: ("IS31FL3743", 3)},
+    "keyboard": {0x20: ("IS31FL3743", 3), 0x23: ("IS31FL3743", 3)},
+    "matrix": {0x30: ("IS31FL3741", 5)},
+    "numpad": {},
+    "white_keyboard": {},
+}
+
+
+class Hardware:
+    def __init__(self):
+        self.reset()
+
+    def reset(self, module="macropad"):
+        self.clock_ns = 0
+        self.stop_ns = None
+
+        # Pin name -> value driven by the script
+        self.outputs = {}
+        # Pin name -> value the script reads. GP0 is SLEEP#, high if awake.
+        self.inputs = {"GP0": True}
+        # (time_ms, pin name, value) changes of the inputs, in time order
+        self.input_changes = []
+        self.pwm_duty = {}
+
+        self.presses = []
+        self.idle_level = IDLE_LEVEL
+        self.pressed_level = PRESSED_LEVEL
+        # Different idle level per (col, row)
+        self.key_idle_levels = {}
+        # Standard deviation of the ADC noise in raw units, 0 for none
+        self.adc_noise = 0
+        self.noise = random.Random(0)
+
+        self.devices = {}
+        for address, (name, pages) in MODULE_DEVICES[module].items():
+            self.devices[address] = IS31Model(name, address, pages)
+
+        self.hid_reports = []
+        # USB CDC data channel. (time_ms, data) the host sends, in time order,
+        # bytes that arrived and everything the script wrote.
+        self.serial_schedule = []
+        self.serial_in = bytearray()
+        self.serial_out = bytearray()
+
+        # When BOOT_DONE was first driven low, None until then
+        self.boot_done_ns = None
+
+        self.gpio_writes = 0
+        self.adc_reads = 0
+        # Time spent in light sleep
+        self.sleep_ns = 0
+        self.i2c_transactions = 0
+        self.i2c_bytes = 0
+
+    def advance(self, ns):
+        self.clock_ns += ns
+        if self.stop_ns is not None and self.clock_ns >= self.stop_ns:
+            raise SimulationDone()
+
+    def now_ms(self):
+        return self.clock_ns / 1000000
+
+    def press(self, col, row, start_ms, end_ms, **kwargs):
+        self.presses.append(KeyPress(col, row, start_ms, end_ms, **kwargs))
+
+    def write_pin(self, name, value):
+        self.outputs[name] = value
+        if name == "BOOT_DONE" and not value and self.boot_done_ns is None:
+            self.boot_done_ns = self.clock_ns
+        self.gpio_writes += 1
+        self.advance(GPIO_WRITE_NS)
+
+    # Change an input pin at a point in virtual time
+    def schedule_input(self, name, t_ms, value):
+        self.input_changes.append((t_ms, name, value))
+        self.input_changes.sort(key=lambda change: change[0])
+
+    def read_pin(self, name):
+        t_ms = self.now_ms()
+        while self.input_changes and self.input_changes[0][0] <= t_ms:
+            (_, changed, value) = self.input_changes.pop(0)
+            self.inputs[changed] = value
+        if name in self.inputs:
+            return self.inputs[name]
+        return self.outputs.get(name, False)
+
+    def read_adc(self):
+        self.adc_reads += 1
+        self.advance(ADC_READ_NS)
+
+        # Low to enable the MUX
+        if self.outputs.get("MUX_ENABLE", True):
+            return self.idle_level
+        index = (
+            bool(self.outputs.get("MUX_A"))
+            | bool(self.outputs.get("MUX_B")) << 1
+            | bool(self.outputs.get("MUX_C")) << 2
+        )
+        row = MUX_INDEX_ROW[index]
+
+        level = None
+        t_ms = self.now_ms()
+        for col in range(16):
+            # Columns are driven low to scan them
+            if self.outputs.get(f"KSO{col}", True):
+                continue
+            idle = self.key_idle_levels.get((col, row), self.idle_level)
+            position = 0.0
+            for press in self.presses:
+                if press.col == col and press.row == row:
+                    position = max(position, press.position(t_ms))
+            value = int(idle - (idle - self.pressed_level) * position)
+            level = value if level is None else min(level, value)
+        if level is None:
+            level = self.idle_level
+        if self.adc_noise:
+            level += int(self.noise.gauss(0, self.adc_noise))
+            level = max(0, min(level, 0xFFFF))
+        return level
+
+    def i2c_write(self, address, data):
+        self._i2c_transaction(address, len(data) + 1)
+        self.devices[address].write(data)
+
+    def i2c_read(self, address, length):
+        self._i2c_transaction(address, length + 1)
+        return self.devices[address].read(length)
+
+    def _i2c_transaction(self, address, length):
+        self.i2c_transactions += 1
+        self.i2c_bytes += length
+        self.advance(I2C_TRANSACTION_NS + I2C_BYTE_NS * length)
+        if address not in self.devices:
+            # Not acknowledged, only the address byte went out
+            self.i2c_bytes -= length - 1
+            raise OSError(19)  # ENODEV
+        device = self.devices[address]
+        device.transactions += 1
+        device.bytes += length
+
+    def send_hid_report(self, report):
+        self.hid_reports.append((self.now_ms(), bytes(report)))
+
+    # Host sends data on the USB CDC data channel at a point in virtual time
+    def schedule_serial(self, t_ms, data):
+        self.serial_schedule.append((t_ms, bytes(data)))
+        self.serial_schedule.sort(key=lambda sent: sent[0])
+
+    def serial_waiting(self):
+        t_ms = self.now_ms()
+        while self.serial_schedule and self.serial_schedule[0][0] <= t_ms:
+            self.serial_in += self.serial_schedule.pop(0)[1]
+        return len(self.serial_in)
+
+    def serial_read(self, length):
+        length = min(length, self.serial_waiting())
+        data = bytes(self.serial_in[:length])
+        del self.serial_in[:length]
+        return data
+
+    def serial_write(self, data):
+        self.serial_out += data
+
+
+hardware = Hardware()
@@ -0,0 +1,9 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated supervisor, ticks_ms() runs on the virtual clock
+from sim_hardware import hardware
+
+
+def ticks_ms():
+    return (hardware.clock_ns // 1000000) & ((1 << 29) - 1)
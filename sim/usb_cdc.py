@@ -0,0 +1,40 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated usb_cdc. The data channel is enabled, as if boot.py did it.
+# What the host sends is scheduled with hardware.schedule_serial(), what the
+# script writes ends up in hardware.serial_out.
+from sim_hardware import hardware
+
+
+class Serial:
+    def __init__(self):
+        self.timeout = 1
+        self.write_timeout = None
+
+    @property
+    def connected(self):
+        return True
+
+    @property
+    def in_waiting(self):
+        return hardware.serial_waiting()
+
+    def read(self, size=1):
+        return hardware.serial_read(size)
+
+    def readinto(self, buf):
+        data = hardware.serial_read(len(buf))
+        buf[: len(data)] = data
+        return len(data)
+
+    def write(self, buf):
+        hardware.serial_write(buf)
+        return len(buf)
+
+    def reset_input_buffer(self):
+        hardware.serial_read(hardware.serial_waiting())
+
+
+console = None
+data = Serial()
@@ -0,0 +1,22 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Simulated usb_hid with a boot keyboard. Reports are recorded in sim_hardware.
+from sim_hardware import hardware
+
+
+class Device:
+    def __init__(self, usage_page, usage, report_length):
+        self.usage_page = usage_page
+        self.usage = usage
+        self.report_length = report_length
+
+    def send_report(self, report, report_id=None):
+        hardware.send_hid_report(report)
+
+    def get_last_received_report(self, report_id=None):
+        return None
+
+
+KEYBOARD = Device(usage_page=0x01, usage=0x06, report_length=8)
+devices = [KEYBOARD]
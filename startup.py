@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Boot time profiling and LED controller bring-up.
+#
+# BootProfiler timestamps the init phases of a script. Times are in ms since
+# the microcontroller was reset (time.monotonic_ns()). The first phase starts
+# when this module is imported, import it first to include the other imports,
+# and shows how long it took until code.py started. Only used while booting,
+# the allocations don't matter there.
+#
+# probe_i2c() checks only the addresses the LED controllers are known to be
+# at (0x20/0x23 IS31FL3743, 0x30 IS31FL3741), instead of a full i2c.scan()
+# that addresses all 112 possible devices. Controllers that don't answer yet,
+# e.g. right after SDB went high, are asked again up to PROBE_ATTEMPTS times.
+#
+# Usage:
+#   from startup import BootProfiler, probe_i2c
+#   import board
+#   ...
+#   profiler = BootProfiler()
+#   profiler.mark("keys")
+#   found = probe_i2c(i2c, (0x20,))
+#   profiler.mark("leds")
+#   print(profiler.report())
+import time
+
+PROBE_ATTEMPTS = 5
+PROBE_RETRY_MS = 1
+
+
+def ms_since_reset():
+    return time.monotonic_ns() // 1000000
+
+
+IMPORTED_MS = ms_since_reset()
+
+
+# Ask the devices at addresses until they answer.
+# Returns the addresses that did.
+def probe_i2c(i2c, addresses, attempts=PROBE_ATTEMPTS):
+    while not i2c.try_lock():
+        pass
+    found = []
+    try:
+        for address in addresses:
+            for _ in range(attempts):
+                if i2c.probe(address):
+                    found.append(address)
+                    break
+                time.sleep(PROBE_RETRY_MS / 1000)
+    finally:
+        i2c.unlock()
+    return found
+
+
+class BootProfiler:
+    def __init__(self):
+        # (phase, ms since reset when it ended)
+        self.phases = [("start", IMPORTED_MS)]
+        # When BOOT_DONE was signaled, ms since reset
+        self.boot_done_ms = 0
+
+    # The phase called name ended now
+    def mark(self, name):
+        self.phases.append((name, ms_since_reset()))
+
+    def boot_done(self):
+        self.mark("boot done")
+        self.boot_done_ms = self.phases[-1][1]
+
+    # One line, e.g. "start=812 keys=+35 hid=+4 boot done=+2 leds=+18"
+    def report(self):
+        parts = [f"{self.phases[0][0]}={self.phases[0][1]}"]
+        for i in range(1, len(self.phases)):
+            (name, end_ms) = self.phases[i]
+            parts.append(f"{name}=+{end_ms - self.phases[i - 1][1]}")
+        return " ".join(parts)
@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Lightweight runtime counters, read on demand over the USB CDC data channel.
+#
+# Nothing is printed from the scan loop. The counters live in preallocated
+# arrays and the loop only increments them. The host asks for them by
+# sending a single command byte on usb_cdc.data (needs boot.py):
+#   s  Reply with one line of counters
+#   r  Reset the counters
+#   b  Reply with the boot profile (boot_report, see startup.py)
+#
+# Reply, one line, e.g.:
+#   scan_hz=612 scan_max_us=1450 scan_p99_us=1400 hid=12 i2c=24 gc=1 free=81234
+#   wake_ms=3 boot_ms=850
+#
+# gc counts the collections the loop ran through collect(). Automatic
+# collections, when an allocation finds the heap full, aren't counted.
+#
+# Scan times go into a histogram of SCAN_BUCKET_US wide buckets, the p99 is
+# the upper edge of the bucket it falls into. Timing a pass takes two
+# time.monotonic_ns() calls, which return long ints on the heap. With
+# time_scans=False only the passes are counted and the loop doesn't allocate,
+# scan_max_us and scan_p99_us stay 0.
+#
+# Usage:
+#   stats = Stats(usb_cdc.data)
+#   while True:
+#       stats.scan_start()
+#       keys.scan()
+#       stats.scan_end()
+#       if report.send():
+#           stats.add(HID_REPORTS)
+#       if scheduler.idle_point:
+#           stats.collect()
+#       stats.poll()
+import gc
+import time
+from array import array
+from supervisor import ticks_ms
+
+# Counters, indices into Stats.counters
+SCAN_PASSES = 0
+HID_REPORTS = 1
+I2C_TRANSACTIONS = 2
+GC_COLLECTIONS = 3
+# Last wake-up until the LEDs were restored, in ms (see power.py)
+WAKE_MS = 4
+# Reset until BOOT_DONE, in ms (see startup.py)
+BOOT_MS = 5
+COUNTER_COUNT = 6
+
+SCAN_BUCKET_US = 100
+# The last bucket collects everything slower
+SCAN_BUCKETS = 64
+
+CMD_STATS = ord("s")
+CMD_RESET = ord("r")
+CMD_BOOT = ord("b")
+
+# supervisor.ticks_ms() wraps around at 2**29
+TICKS_MASK = (1 << 29) - 1
+
+
+class Stats:
+    def __init__(self, serial=None, time_scans=True):
+        # usb_cdc.data, None if the data channel isn't enabled
+        self.serial = serial
+        self.time_scans = time_scans
+        self.command = bytearray(1)
+        # Boot profile line, sent as is
+        self.boot_report = ""
+
+        self.counters = array("L", [0] * COUNTER_COUNT)
+        self.histogram = array("L", [0] * SCAN_BUCKETS)
+        self.scan_max_us = 0
+        self.started_ns = 0
+
+        # Scan passes in the last full second
+        self.scan_hz = 0
+        self.window_passes = 0
+        self.window_start = ticks_ms()
+
+        # Not available on the host
+        self._mem_free = getattr(gc, "mem_free", None)
+        self.mem_free = self._mem_free() if self._mem_free else 0
+
+    def scan_start(self):
+        if self.time_scans:
+            self.started_ns = time.monotonic_ns()
+
+    def scan_end(self):
+        self.counters[SCAN_PASSES] += 1
+        self.window_passes += 1
+        if not self.time_scans:
+            return
+        elapsed_us = (time.monotonic_ns() - self.started_ns) // 1000
+        if elapsed_us > self.scan_max_us:
+            self.scan_max_us = elapsed_us
+        bucket = elapsed_us // SCAN_BUCKET_US
+        if bucket >= SCAN_BUCKETS:
+            bucket = SCAN_BUCKETS - 1
+        self.histogram[bucket] += 1
+
+    def add(self, counter, count=1):
+        self.counters[counter] += count
+
+    def set(self, counter, value):
+        self.counters[counter] = value
+
+    # gc.collect(), counted
+    def collect(self):
+        gc.collect()
+        self.counters[GC_COLLECTIONS] += 1
+
+    # Percentile of the scan time in microseconds, upper edge of the bucket
+    def scan_percentile_us(self, percent):
+        total = self.counters[SCAN_PASSES]
+        if not total or not self.time_scans:
+            return 0
+        limit = total * percent // 100
+        seen = 0
+        for bucket in range(SCAN_BUCKETS):
+            seen += self.histogram[bucket]
+            if seen >= limit:
+                return (bucket + 1) * SCAN_BUCKET_US
+        return SCAN_BUCKETS * SCAN_BUCKET_US
+
+    def reset(self):
+        for i in range(COUNTER_COUNT):
+            # Boots only once
+            if i != BOOT_MS:
+                self.counters[i] = 0
+        for i in range(SCAN_BUCKETS):
+            self.histogram[i] = 0
+        self.scan_max_us = 0
+
+    # Call once per loop. Updates the per second values and answers commands.
+    def poll(self):
+        now = ticks_ms()
+        if (now - self.window_start) & TICKS_MASK >= 1000:
+            self.scan_hz = self.window_passes
+            self.window_passes = 0
+            self.window_start = now
+            if self._mem_free:
+                self.mem_free = self._mem_free()
+
+        serial = self.serial
+        if serial is None or not serial.in_waiting:
+            return
+        serial.readinto(self.command)
+        command = self.command[0]
+        if command == CMD_STATS:
+            serial.write(self.line().encode())
+        elif command == CMD_RESET:
+            self.reset()
+        elif command == CMD_BOOT:
+            serial.write((self.boot_report + "\n").encode())
+
+    def line(self):
+        counters = self.counters
+        return (
+            f"scan_hz={self.scan_hz} scan_max_us={self.scan_max_us} "
+            + f"scan_p99_us={self.scan_percentile_us(99)} "
+            + f"hid={counters[HID_REPORTS]} i2c={counters[I2C_TRANSACTIONS]} "
+            + f"gc={counters[GC_COLLECTIONS]} free={self.mem_free} "
+            + f"wake_ms={counters[WAKE_MS]} boot_ms={counters[BOOT_MS]}\n"
+        )
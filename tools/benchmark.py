@@ -0,0 +1,516 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Benchmark the hot paths of the scripts against the simulated hardware in sim/.
+#
+# For every operation it reports GPIO writes, ADC reads, I2C transactions and
+# bytes, virtual time (from the simulator's cost model) and host wall-clock
+# time. The hardware counters are deterministic, so they can be compared
+# across changes. Wall-clock time only compares runs on the same host.
+#
+# Two figures are derived from the virtual time:
+# - latency: key press until the HID report is sent, worst and mean over the
+#   presses, for benchmarks whose operation returns it
+# - frames/s: the LED frame rate the hardware accesses allow, for benchmarks
+#   where one operation is one full frame
+#
+# Results are written as JSON. With --baseline, the counters are compared
+# against an earlier run and the exit code is 1 if any of them went up.
+#
+#   python tools/benchmark.py --output bench_output.json
+#   python tools/benchmark.py --baseline bench_output.json
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import simulate  # noqa: E402  Sets up sys.path for sim/ and the repo
+
+import board  # noqa: E402
+import busio  # noqa: E402
+import digitalio  # noqa: E402
+import analogio  # noqa: E402
+from sim_hardware import hardware  # noqa: E402
+
+# Counters that must not go up compared to a baseline
+COUNTERS = ("gpio_writes", "adc_reads", "i2c_transactions", "i2c_bytes")
+
+MATRIX_COLS = 8
+MATRIX_ROWS = 4
+ADC_THRESHOLD = 2.9
+PRESS_MS = 50
+
+benchmarks = []
+
+
+# Register a benchmark. setup(module) returns the function to measure.
+# latency: The function returns a key press latency in us.
+# frame: One call shows one full LED frame.
+def benchmark(name, module, iterations, latency=False, frame=False):
+    def register(setup):
+        benchmarks.append((name, module, iterations, latency, frame, setup))
+        return setup
+
+    return register
+
+
+def measure(name, module, iterations, latency, frame, setup):
+    simulate.reset(module)
+    operation = setup()
+
+    start = (
+        hardware.gpio_writes,
+        hardware.adc_reads,
+        hardware.i2c_transactions,
+        hardware.i2c_bytes,
+        hardware.clock_ns,
+    )
+    latencies_us = []
+    wall_start = time.perf_counter_ns()
+    for i in range(iterations):
+        if latency:
+            latencies_us.append(operation(i))
+        else:
+            operation(i)
+    wall_ns = time.perf_counter_ns() - wall_start
+
+    virtual_us = (hardware.clock_ns - start[4]) / iterations / 1000
+    result = {
+        "name": name,
+        "module": module,
+        "iterations": iterations,
+        "gpio_writes": (hardware.gpio_writes - start[0]) / iterations,
+        "adc_reads": (hardware.adc_reads - start[1]) / iterations,
+        "i2c_transactions": (hardware.i2c_transactions - start[2]) / iterations,
+        "i2c_bytes": (hardware.i2c_bytes - start[3]) / iterations,
+        "virtual_us": virtual_us,
+        "wall_us": wall_ns / iterations / 1000,
+    }
+    if latency:
+        result["latency_max_us"] = max(latencies_us)
+        result["latency_mean_us"] = sum(latencies_us) / len(latencies_us)
+    if frame:
+        result["frames_per_s"] = 1000000 / virtual_us
+    return result
+
+
+# Pins as set up by the keyscan scripts
+def keyscan_pins():
+    mux_enable = digitalio.DigitalInOut(board.MUX_ENABLE)
+    mux_enable.direction = digitalio.Direction.OUTPUT
+    mux_enable.value = False
+    mux = []
+    for pin in (board.MUX_A, board.MUX_B, board.MUX_C):
+        mux.append(digitalio.DigitalInOut(pin))
+        mux[-1].direction = digitalio.Direction.OUTPUT
+    kso_pins = []
+    for col in range(16):
+        kso_pins.append(digitalio.DigitalInOut(getattr(board, f"KSO{col}")))
+        kso_pins[-1].direction = digitalio.Direction.OUTPUT
+    adc_in = analogio.AnalogIn(board.GP28)
+    # One key held down, so every pass has something to find
+    hardware.press(3, 2, 0, 1e9)
+    return (kso_pins, mux, adc_in)
+
+
+def i2c_bus():
+    i2c = busio.I2C(board.SCL, board.SDA)
+    i2c.try_lock()
+    i2c.scan()
+    i2c.unlock()
+    return i2c
+
+
+@benchmark("matrix_scan single-key (before KeyMatrix)", "macropad", 200)
+def bench_matrix_scan():
+    from keyscan import to_voltage
+
+    (kso_pins, (mux_a, mux_b, mux_c), adc_in) = keyscan_pins()
+
+    def mux_select_row(row):
+        index = 0
+        if row == 0:
+            index = 2
+        elif row == 1:
+            index = 0
+        elif row == 2:
+            index = 1
+        else:
+            index = row
+
+        mux_a.value = index & 0x01
+        mux_b.value = index & 0x02
+        mux_c.value = index & 0x04
+
+    def drive_col(col, value):
+        kso_pins[col].value = value
+
+    def matrix_scan(_):
+        matrix_pos = None
+        for col in range(MATRIX_COLS):
+            drive_col(col, True)
+
+        for col in range(MATRIX_COLS):
+            drive_col(col, False)
+
+            for row in range(MATRIX_ROWS):
+                mux_select_row(row)
+
+                voltage = to_voltage(adc_in.value)
+                if voltage < ADC_THRESHOLD:
+                    matrix_pos = (col, row)
+                    break
+
+            drive_col(col, True)
+        return matrix_pos
+
+    return matrix_scan
+
+
+@benchmark("KeyMatrix.scan 8x4", "macropad", 200)
+def bench_keymatrix_scan():
+    from keyscan import KeyMatrix
+    from debounce import Debouncer, DEBOUNCE_ASYM
+
+    (kso_pins, mux, adc_in) = keyscan_pins()
+    debouncer = Debouncer(MATRIX_COLS, MATRIX_ROWS, DEBOUNCE_ASYM, 5)
+    keys = KeyMatrix(
+        kso_pins, mux, adc_in, MATRIX_COLS, MATRIX_ROWS, ADC_THRESHOLD, debouncer
+    )
+    return lambda _: keys.scan()
+
+
+@benchmark("KeyMatrix.scan 8x4 rapid trigger", "macropad", 200)
+def bench_keymatrix_rapid_trigger():
+    from keyscan import KeyMatrix
+    from debounce import Debouncer, DEBOUNCE_ASYM
+
+    (kso_pins, mux, adc_in) = keyscan_pins()
+    debouncer = Debouncer(MATRIX_COLS, MATRIX_ROWS, DEBOUNCE_ASYM, 5)
+    keys = KeyMatrix(
+        kso_pins,
+        mux,
+        adc_in,
+        MATRIX_COLS,
+        MATRIX_ROWS,
+        ADC_THRESHOLD,
+        debouncer,
+        rapid_trigger=0.2,
+    )
+    return lambda _: keys.scan()
+
+
+@benchmark("KeyMatrix.scan 8x4 oversample 2 + median", "macropad", 200)
+def bench_keymatrix_filtered():
+    from keyscan import KeyMatrix, FILTER_MEDIAN
+    from debounce import Debouncer, DEBOUNCE_ASYM
+
+    (kso_pins, mux, adc_in) = keyscan_pins()
+    debouncer = Debouncer(MATRIX_COLS, MATRIX_ROWS, DEBOUNCE_ASYM, 5)
+    keys = KeyMatrix(
+        kso_pins,
+        mux,
+        adc_in,
+        MATRIX_COLS,
+        MATRIX_ROWS,
+        ADC_THRESHOLD,
+        debouncer,
+        oversample=2,
+        filter=FILTER_MEDIAN,
+    )
+    return lambda _: keys.scan()
+
+
+# The same matrix with more columns, the time per pass should grow linearly
+def keymatrix_cols(cols):
+    from keyscan import KeyMatrix
+    from debounce import Debouncer, DEBOUNCE_ASYM
+
+    (kso_pins, mux, adc_in) = keyscan_pins()
+    debouncer = Debouncer(cols, 8, DEBOUNCE_ASYM, 5)
+    keys = KeyMatrix(kso_pins, mux, adc_in, cols, 8, ADC_THRESHOLD, debouncer)
+    return lambda _: keys.scan()
+
+
+@benchmark("KeyMatrix.scan 8x8", "keyboard", 100)
+def bench_keymatrix_8x8():
+    return keymatrix_cols(8)
+
+
+@benchmark("KeyMatrix.scan 16x8 (ANSI keyboard)", "keyboard", 100)
+def bench_keymatrix_16x8():
+    return keymatrix_cols(16)
+
+
+# The scan loop of macropad_keyscan.py without LEDs. Every call presses key
+# 5,1 at a different point of a pass, returns the us until the HID report
+# with the key went out and scans until its release was reported.
+# period_ms: Pause between passes, None for ScanScheduler's default levels.
+# Presses are PRESS_MS long, so the slowest idle rate sees them too.
+def press_to_report(period_ms=None):
+    import usb_hid
+    from adafruit_hid.keycode import Keycode
+    from keyscan import KeyMatrix
+    from debounce import Debouncer, DEBOUNCE_ASYM
+    from hid_report import KeyboardReport
+    from scan_scheduler import ScanScheduler
+
+    (kso_pins, mux, adc_in) = keyscan_pins()
+    debouncer = Debouncer(MATRIX_COLS, MATRIX_ROWS, DEBOUNCE_ASYM, 5)
+    keys = KeyMatrix(
+        kso_pins, mux, adc_in, MATRIX_COLS, MATRIX_ROWS, ADC_THRESHOLD, debouncer
+    )
+    report = KeyboardReport(usb_hid.devices)
+    if period_ms is None:
+        scheduler = ScanScheduler()
+    else:
+        scheduler = ScanScheduler(periods_ms=(period_ms,))
+
+    def scan_until_report():
+        sent = len(hardware.hid_reports)
+        give_up_ms = hardware.now_ms() + 1000
+        while len(hardware.hid_reports) == sent:
+            if hardware.now_ms() > give_up_ms:
+                raise RuntimeError("Key press or release wasn't reported")
+            if keys.scan():
+                for col in range(MATRIX_COLS):
+                    for row in range(MATRIX_ROWS):
+                        if not keys.changed[col] & (1 << row):
+                            continue
+                        code = Keycode.A + col * MATRIX_ROWS + row
+                        if keys.is_pressed(col, row):
+                            report.press(code)
+                        else:
+                            report.release(code)
+            report.send()
+            scheduler.update(keys.active)
+            scheduler.wait()
+
+    # Report of the key keyscan_pins() holds down
+    scan_until_report()
+    spread_ms = period_ms or 0.2
+
+    def press(i):
+        # Spread the press starts over a pass, or the pause between passes
+        start_ms = hardware.now_ms() + (i % 8) * spread_ms / 8
+        hardware.press(5, 1, start_ms, start_ms + PRESS_MS)
+        scan_until_report()
+        latency_us = (hardware.hid_reports[-1][0] - start_ms) * 1000
+        scan_until_report()
+        return latency_us
+
+    return press
+
+
+@benchmark(
+    "macropad key press to HID report, back to back passes",
+    "macropad",
+    16,
+    latency=True,
+)
+def bench_press_to_report():
+    return press_to_report()
+
+
+@benchmark(
+    "macropad key press to HID report, idle rate (20ms)",
+    "macropad",
+    16,
+    latency=True,
+)
+def bench_press_to_report_idle():
+    from scan_scheduler import IDLE_PERIODS_MS
+
+    return press_to_report(IDLE_PERIODS_MS[-1])
+
+
+@benchmark("macropad full clear + light key (before LedState)", "macropad", 20)
+def bench_macropad_full_clear():
+    from framework_is31fl3743 import IS31FL3743
+
+    is31 = IS31FL3743(i2c_bus())
+
+    def keypress(i):
+        for led in range(18 * 11):
+            is31[led] = 0x00
+        is31[4 + i % 3] = 0xFF
+
+    return keypress
+
+
+@benchmark("macropad LedState keypress", "macropad", 20)
+def bench_macropad_led_state():
+    from framework_is31fl3743 import IS31FL3743
+    from led_state import LedState
+
+    leds = LedState(IS31FL3743(i2c_bus()))
+
+    def keypress(i):
+        leds.clear()
+        leds.set((4, 22, 58)[i % 3] + i % 3, 0xFF)
+        leds.show()
+
+    return keypress
+
+
+@benchmark(
+    "led_matrix zigzag per-pixel (before MatrixFramebuffer)", "matrix", 5, frame=True
+)
+def bench_led_matrix_per_pixel():
+    from adafruit_is31fl3741 import IS31FL3741
+    from matrix_mapping import REGISTERS, WIDTH, HEIGHT
+
+    is31 = IS31FL3741(i2c_bus(), address=0x30)
+
+    def zigzag(frame):
+        for i in range(WIDTH * HEIGHT):
+            x = i % WIDTH
+            y = (i + frame) % HEIGHT
+            is31[REGISTERS[x + y * WIDTH]] = (
+                0xFF
+                if (y % (WIDTH * 2) < WIDTH and x == y % WIDTH)
+                or (y % 18 >= WIDTH and x == WIDTH - y % WIDTH)
+                else 0x00
+            )
+
+    return zigzag
+
+
+@benchmark("led_matrix zigzag MatrixFramebuffer", "matrix", 5, frame=True)
+def bench_led_matrix_framebuffer():
+    from adafruit_is31fl3741 import IS31FL3741
+    from matrix_framebuffer import MatrixFramebuffer
+    from matrix_mapping import WIDTH, HEIGHT
+
+    fb = MatrixFramebuffer(IS31FL3741(i2c_bus(), address=0x30))
+
+    def zigzag(frame):
+        for i in range(WIDTH * HEIGHT):
+            x = i % WIDTH
+            y = (i + frame) % HEIGHT
+            fb.pixel(
+                x,
+                y,
+                0xFF
+                if (y % (WIDTH * 2) < WIDTH and x == y % WIDTH)
+                or (y % 18 >= WIDTH and x == WIDTH - y % WIDTH)
+                else 0x00,
+            )
+        fb.show()
+
+    return zigzag
+
+
+# Worst case for the frame rate, no pixel keeps its value
+@benchmark("led_matrix every pixel changes MatrixFramebuffer", "matrix", 4, frame=True)
+def bench_led_matrix_full_frame():
+    from adafruit_is31fl3741 import IS31FL3741
+    from matrix_framebuffer import MatrixFramebuffer
+
+    fb = MatrixFramebuffer(IS31FL3741(i2c_bus(), address=0x30))
+
+    def flip(frame):
+        fb.fill(0xFF if frame % 2 == 0 else 0x10)
+        fb.show()
+
+    return flip
+
+
+@benchmark(
+    "ANSI two-controller fill per-LED (before KeyboardFrame)", "keyboard", 4, frame=True
+)
+def bench_ansi_per_led():
+    from framework_is31fl3743 import IS31FL3743
+
+    i2c = i2c_bus()
+    controllers = [IS31FL3743(i2c, address=0x20), IS31FL3743(i2c, address=0x23)]
+
+    def fill(color):
+        color %= 4
+        for is31 in controllers:
+            for i in range(18 * 11):
+                is31[i] = 0xFF if color in (3, i % 3) else 0x00
+
+    return fill
+
+
+@benchmark("ANSI two-controller fill KeyboardFrame", "keyboard", 4, frame=True)
+def bench_ansi_keyboard_frame():
+    from framework_is31fl3743 import IS31FL3743
+    from keyboard_frame import KeyboardFrame
+
+    i2c = i2c_bus()
+    frame = KeyboardFrame(
+        [IS31FL3743(i2c, address=0x20), IS31FL3743(i2c, address=0x23)]
+    )
+
+    def fill(color):
+        color %= 4
+        for i in range(frame.count):
+            frame[i] = 0xFF if color in (3, i % 3) else 0x00
+        frame.show()
+
+    return fill
+
+
+def print_results(results, baseline=None):
+    print(
+        f"{'benchmark':58} {'gpio':>7} {'adc':>6} {'i2c tx':>7} "
+        + f"{'i2c B':>7} {'virt us':>9} {'wall us':>9}"
+    )
+    for result in results:
+        print(
+            f"{result['name']:58} {result['gpio_writes']:7.1f} "
+            + f"{result['adc_reads']:6.1f} {result['i2c_transactions']:7.1f} "
+            + f"{result['i2c_bytes']:7.1f} {result['virtual_us']:9.1f} "
+            + f"{result['wall_us']:9.1f}"
+        )
+        previous = baseline.get(result["name"]) if baseline else None
+        if previous:
+            for counter in COUNTERS:
+                if result[counter] != previous[counter]:
+                    print(f"    {counter}: {previous[counter]} -> {result[counter]}")
+        if "latency_max_us" in result:
+            print(
+                f"    latency: worst {result['latency_max_us']:.1f} us, "
+                + f"mean {result['latency_mean_us']:.1f} us"
+            )
+        if "frames_per_s" in result:
+            print(f"    frames/s: {result['frames_per_s']:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results of an earlier run")
+    parser.add_argument("--filter", default="", help="Only run matching benchmarks")
+    args = parser.parse_args()
+
+    results = [
+        measure(name, module, iterations, latency, frame, setup)
+        for (name, module, iterations, latency, frame, setup) in benchmarks
+        if args.filter in name
+    ]
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result["name"]: result for result in json.load(f)["results"]}
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"version": 1, "results": results}, f, indent=2)
+
+    if baseline:
+        for result in results:
+            previous = baseline.get(result["name"])
+            if previous and any(result[c] > previous[c] for c in COUNTERS):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Run keyscan_heap_check.py, and with it the loop of macropad_keyscan.py, in
+# the simulator, with keys pressed while the passes are measured.
+#
+# The host has no gc.mem_free(), here it's backed by tracemalloc and counts
+# the memory held by objects allocated in the scripts of this repository
+# (not sim/ or tools/). CPython frees garbage at once through reference
+# counting, so this catches memory that stays allocated, e.g. lists or dicts
+# that grow with every pass. Garbage that's freed again right away only shows
+# up when keyscan_heap_check.py runs on the module.
+#
+# CPython itself holds around a hundred bytes more after the first passes through
+# the loop (caches of the code objects), that doesn't grow with the passes.
+# Exits with 1 if the memory held went up by more than HOST_SLACK.
+#   python tools/heap_check.py
+import contextlib
+import gc
+import io
+import os
+import runpy
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import simulate  # noqa: E402  Sets up sys.path for sim/ and the repo
+
+from sim_hardware import hardware  # noqa: E402
+
+SCRIPT = os.path.join(simulate.REPO, "keyscan_heap_check.py")
+# What mem_free() starts from, only differences matter
+HEAP_SIZE = 1 << 20
+# One-time growth of CPython's own bookkeeping. Anything kept per pass is
+# far more, even a list entry is 8 bytes times the passes.
+HOST_SLACK = 256
+
+# (col, row, start_ms, end_ms), during the measured passes
+PRESSES = (
+    (1, 2, 50, 120),
+    (3, 0, 100, 180),
+    (6, 1, 200, 215),
+    (0, 3, 300, 400),
+    (7, 2, 350, 360),
+)
+
+
+def mem_free():
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(True, os.path.join(simulate.REPO, "*")),
+            tracemalloc.Filter(False, os.path.join(simulate.SIM, "*")),
+            tracemalloc.Filter(False, os.path.join(simulate.REPO, "tools", "*")),
+        )
+    )
+    return HEAP_SIZE - sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+def main():
+    simulate.reset("macropad")
+    for col, row, start_ms, end_ms in PRESSES:
+        hardware.press(col, row, start_ms, end_ms, bounce_ms=2)
+
+    gc.mem_free = mem_free
+    tracemalloc.start()
+    try:
+        # Its verdict is for the module, without slack
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = runpy.run_path(SCRIPT, run_name="__main__")
+    finally:
+        tracemalloc.stop()
+        del gc.mem_free
+    allocated = result["allocated"]
+    print(
+        f"Memory held grew by {allocated} bytes in "
+        + f"{result['PASSES'] - result['skipped']} passes "
+        + f"({result['skipped']} skipped), "
+        + f"{result['stats'].counters[result['HID_REPORTS']]} HID reports"
+    )
+    if allocated > HOST_SLACK:
+        print(f"FAIL, more than the {HOST_SLACK} bytes CPython holds on its own")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Compare the noise filter settings of KeyMatrix against a noisy ADC.
+#
+# Runs KeyMatrix without a debouncer on the simulated macropad, with gaussian
+# noise on every ADC reading. Key 5,1 is pressed and released a few times,
+# key 3,2 is held down (see benchmark.keyscan_pins()), all other keys stay
+# up. For every setting it reports:
+# - hw us, hw extra and ADC reads per pass: virtual time of the GPIO/ADC
+#   accesses from the simulator's model, total and over "none". The filter
+#   math costs no virtual time, EMA and median show 0 there.
+# - wall us: host wall-clock time per pass in the noisy run.
+# - wall extra: what the filter math costs per pass, measured host wall-clock
+#   time over "none". Measured separately without noise and key changes, so
+#   every setting does the same work apart from the filter, best of
+#   WALL_REPEATS runs of WALL_PASSES. Interpreter time on the host CPU, not
+#   on the RP2040, keyscan_benchmark.py measures it on the module.
+# - false presses: presses of the keys that stay up, per 1000 passes
+# - chatter: extra press/release edges of the pressed key
+# - latency: press start until the key reads pressed, worst case
+#
+#   python tools/keyscan_filters.py --noise 3000
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import simulate  # noqa: E402  Sets up sys.path for sim/ and the repo
+
+from sim_hardware import hardware  # noqa: E402
+from benchmark import keyscan_pins, MATRIX_COLS, MATRIX_ROWS  # noqa: E402
+from benchmark import ADC_THRESHOLD  # noqa: E402
+from keyscan import KeyMatrix, FILTER_NONE, FILTER_EMA, FILTER_MEDIAN  # noqa: E402
+
+# (name, oversample, filter)
+SETTINGS = (
+    ("none", 1, FILTER_NONE),
+    ("oversample 2", 2, FILTER_NONE),
+    ("oversample 4", 4, FILTER_NONE),
+    ("ema", 1, FILTER_EMA),
+    ("median", 1, FILTER_MEDIAN),
+    ("oversample 2 + median", 2, FILTER_MEDIAN),
+    ("oversample 4 + ema", 4, FILTER_EMA),
+)
+
+PRESSED_COL = 5
+PRESSED_ROW = 1
+# Held down all the time by keyscan_pins()
+HELD_COL = 3
+HELD_BIT = 1 << 2
+# (start_ms, end_ms) of the presses
+PRESSES = ((50, 150), (250, 350), (450, 550))
+TRAVEL_MS = 2
+WALL_PASSES = 100
+WALL_REPEATS = 20
+
+
+def key_matrix(oversample, filter):
+    (kso_pins, mux, adc_in) = keyscan_pins()
+    return KeyMatrix(
+        kso_pins,
+        mux,
+        adc_in,
+        MATRIX_COLS,
+        MATRIX_ROWS,
+        ADC_THRESHOLD,
+        oversample=oversample,
+        filter=filter,
+    )
+
+
+# Host wall-clock us per pass of every setting, without noise or key changes.
+# The settings take turns in every repeat, so the host's load drifting
+# affects all of them alike. Best of the repeats.
+def wall_costs():
+    simulate.reset("macropad")
+    matrices = [key_matrix(oversample, filter) for _, oversample, filter in SETTINGS]
+    best_ns = [None] * len(matrices)
+    for _ in range(WALL_REPEATS):
+        for i, keys in enumerate(matrices):
+            keys.scan()
+            gc.disable()
+            start_ns = time.perf_counter_ns()
+            for _ in range(WALL_PASSES):
+                keys.scan()
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            gc.enable()
+            if best_ns[i] is None or elapsed_ns < best_ns[i]:
+                best_ns[i] = elapsed_ns
+    return [ns / WALL_PASSES / 1000 for ns in best_ns]
+
+
+def run(oversample, filter, noise, duration_ms):
+    simulate.reset("macropad")
+    hardware.adc_noise = noise
+    for start_ms, end_ms in PRESSES:
+        hardware.press(
+            PRESSED_COL, PRESSED_ROW, start_ms, end_ms, travel_ms=TRAVEL_MS
+        )
+    keys = key_matrix(oversample, filter)
+
+    start_ns = hardware.clock_ns
+    start_reads = hardware.adc_reads
+    wall_ns = 0
+    passes = 0
+    false_presses = 0
+    edges = 0
+    latency_ms = 0
+    pressed_at = None
+    bit = 1 << PRESSED_ROW
+    while hardware.now_ms() < duration_ms:
+        wall_start = time.perf_counter_ns()
+        keys.scan()
+        wall_ns += time.perf_counter_ns() - wall_start
+        passes += 1
+        now_ms = hardware.now_ms()
+        for col in range(MATRIX_COLS):
+            pressed = keys.changed[col] & keys.state[col]
+            if col == PRESSED_COL:
+                if keys.changed[col] & bit:
+                    edges += 1
+                pressed &= ~bit
+            if col == HELD_COL:
+                pressed &= ~HELD_BIT
+            while pressed:
+                pressed &= pressed - 1
+                false_presses += 1
+
+        # Latency of the first press edge after each press started
+        for start_ms, end_ms in PRESSES:
+            if start_ms <= now_ms < end_ms and pressed_at != start_ms:
+                if keys.state[PRESSED_COL] & bit:
+                    pressed_at = start_ms
+                    latency_ms = max(latency_ms, now_ms - start_ms)
+
+    return {
+        "us": (hardware.clock_ns - start_ns) / passes / 1000,
+        "wall_us": wall_ns / passes / 1000,
+        "reads": (hardware.adc_reads - start_reads) / passes,
+        "false": false_presses * 1000 / passes,
+        # One press and one release edge per press
+        "chatter": max(edges - 2 * len(PRESSES), 0),
+        "latency_ms": latency_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--noise", type=int, default=3000, help="ADC noise, raw 16-bit units"
+    )
+    parser.add_argument("--duration-ms", type=float, default=600)
+    args = parser.parse_args()
+
+    print(
+        f"{'setting':24} {'hw us':>8} {'hw extra':>8} {'wall us':>8} "
+        + f"{'wall extra':>10} {'adc':>6} "
+        + f"{'false/1k':>8} {'chatter':>7} {'latency ms':>10}"
+    )
+    costs_us = wall_costs()
+    base = None
+    for (name, oversample, filter), cost_us in zip(SETTINGS, costs_us):
+        result = run(oversample, filter, args.noise, args.duration_ms)
+        result["wall_cost_us"] = cost_us
+        if base is None:
+            base = result
+        print(
+            f"{name:24} {result['us']:8.1f} {result['us'] - base['us']:8.1f} "
+            + f"{result['wall_us']:8.1f} "
+            + f"{result['wall_cost_us'] - base['wall_cost_us']:10.1f} "
+            + f"{result['reads']:6.1f} {result['false']:8.2f} "
+            + f"{result['chatter']:7} {result['latency_ms']:10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Encode an LED matrix animation for matrix_animation.py.
+#
+# Every --keyframe-interval frames a keyframe is stored, in between only the
+# XOR with the previous frame, whichever is smaller. Both are RLE encoded.
+# Frames come from a built-in pattern, a file of raw 306 byte frames
+# (pixel index x + y * 9, one brightness byte each) or images (needs Pillow).
+#
+# Examples:
+#   python tools/matrix_anim_encode.py boot.fma --pattern zigzag --frames 68
+#   python tools/matrix_anim_encode.py idle.fma --images frame*.png --frame-ms 50
+import argparse
+import os
+import struct
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from matrix_stream_send import PATTERNS, WIDTH, HEIGHT, COUNT  # noqa: E402
+
+# Same as in matrix_animation.py, which can't be imported on the host
+MAGIC = b"FMA1"
+FRAME_KEY = ord("K")
+FRAME_DELTA = ord("D")
+MAX_RUN = 0x80
+
+
+def rle_encode(data):
+    out = bytearray()
+    literal = bytearray()
+    i = 0
+    while i < len(data):
+        run = 1
+        while i + run < len(data) and run < MAX_RUN and data[i + run] == data[i]:
+            run += 1
+        # Runs of two are cheaper as part of a literal
+        if run >= 3:
+            if literal:
+                out.append(MAX_RUN + len(literal) - 1)
+                out += literal
+                literal = bytearray()
+            out += bytes([run - 1, data[i]])
+            i += run
+            continue
+        literal.append(data[i])
+        i += 1
+        if len(literal) == MAX_RUN:
+            out.append(MAX_RUN + len(literal) - 1)
+            out += literal
+            literal = bytearray()
+    if literal:
+        out.append(MAX_RUN + len(literal) - 1)
+        out += literal
+    return out
+
+
+def rle_decode(data, pos, count):
+    out = bytearray()
+    while len(out) < count:
+        control = data[pos]
+        if control < MAX_RUN:
+            out += bytes([data[pos + 1]]) * (control + 1)
+            pos += 2
+        else:
+            length = control - MAX_RUN + 1
+            out += data[pos + 1 : pos + 1 + length]
+            pos += 1 + length
+    return (out, pos)
+
+
+def encode(frames, frame_ms, keyframe_interval):
+    out = bytearray(MAGIC)
+    out += struct.pack("<BBHH", WIDTH, HEIGHT, len(frames), frame_ms)
+    previous = None
+    for index, frame in enumerate(frames):
+        key = rle_encode(frame)
+        if previous is None or index % keyframe_interval == 0:
+            out.append(FRAME_KEY)
+            out += key
+        else:
+            delta = rle_encode(bytes(a ^ b for a, b in zip(frame, previous)))
+            if len(delta) < len(key):
+                out.append(FRAME_DELTA)
+                out += delta
+            else:
+                out.append(FRAME_KEY)
+                out += key
+        previous = frame
+    return out
+
+
+# Decode a whole file, to check the encoder
+def decode(data):
+    if data[:4] != MAGIC:
+        raise ValueError("Not an animation file")
+    (width, height, frame_count, _) = struct.unpack("<BBHH", data[4:10])
+    count = width * height
+    frames = []
+    frame = bytearray(count)
+    pos = 10
+    for _ in range(frame_count):
+        kind = data[pos]
+        (pixels, pos) = rle_decode(data, pos + 1, count)
+        if kind == FRAME_DELTA:
+            frame = bytearray(a ^ b for a, b in zip(frame, pixels))
+        else:
+            frame = pixels
+        frames.append(bytes(frame))
+    return frames
+
+
+def load_images(paths):
+    try:
+        from PIL import Image
+    except ImportError:
+        sys.exit("Reading images needs Pillow: pip install pillow")
+    frames = []
+    for path in paths:
+        image = Image.open(path).convert("L")
+        if image.size != (WIDTH, HEIGHT):
+            image = image.resize((WIDTH, HEIGHT))
+        frames.append(bytes(image.getdata()))
+    return frames
+
+
+def load_raw(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) % COUNT:
+        sys.exit(f"{path} isn't a multiple of {COUNT} byte frames")
+    return [data[i : i + COUNT] for i in range(0, len(data), COUNT)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output", help="Animation file, e.g. boot.fma")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pattern", choices=sorted(PATTERNS))
+    source.add_argument("--raw", help="File of raw 306 byte frames")
+    source.add_argument("--images", nargs="+", help="One image per frame")
+    parser.add_argument("--frames", type=int, default=68, help="Frames of --pattern")
+    parser.add_argument("--frame-ms", type=int, default=33)
+    parser.add_argument("--keyframe-interval", type=int, default=60)
+    args = parser.parse_args()
+    # Both end up as 16-bit numbers in the header, the player divides by frame_ms
+    if not 1 <= args.frame_ms <= 0xFFFF:
+        parser.error("--frame-ms must be 1-65535")
+    if args.frames < 1:
+        parser.error("--frames must be at least 1")
+    if args.keyframe_interval < 1:
+        parser.error("--keyframe-interval must be at least 1")
+
+    if args.pattern:
+        frames = [bytes(PATTERNS[args.pattern](i)) for i in range(args.frames)]
+    elif args.raw:
+        frames = load_raw(args.raw)
+    else:
+        frames = load_images(args.images)
+    if not 1 <= len(frames) <= 0xFFFF:
+        sys.exit(f"{len(frames)} frames, an animation has 1-65535")
+
+    data = encode(frames, args.frame_ms, args.keyframe_interval)
+    if decode(data) != frames:
+        sys.exit("Encoded animation doesn't decode to the input frames")
+    with open(args.output, "wb") as f:
+        f.write(data)
+
+    raw_size = len(frames) * COUNT
+    print(
+        f"{len(frames)} frames, {len(data)} bytes instead of {raw_size} raw "
+        + f"({100 - len(data) * 100 // raw_size}% saved)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Check the LED matrix streaming end to end, without a module.
+#
+# The receiver from matrix_stream.py runs against the simulated LED matrix on
+# one side of a pseudo terminal, tools/matrix_stream_send.py on the other.
+# Frames are streamed in both modes, with garbage in between to make the
+# receiver resynchronize. In each mode the host also stops in the middle of a
+# frame, like when it's restarted, and sends the full frame after
+# FRAME_TIMEOUT_MS. After each frame the receiver shows, the PWM registers of
+# the simulated IS31FL3741 are compared against what was sent.
+#
+# The receiver runs on the host clock, the simulator's virtual clock only
+# advances on hardware accesses and would never time out a stalled frame.
+#
+# Exits with 1 if a frame was missing or differed, or a truncated frame
+# wasn't dropped.
+#   python tools/matrix_stream_loopback.py --frames 100 --fps 60
+import argparse
+import fcntl
+import os
+import pty
+import select
+import struct
+import sys
+import termios
+import threading
+import time
+import tty
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import simulate  # noqa: E402, F401  Sets up sys.path for sim/ and the repo
+import matrix_stream_send  # noqa: E402
+
+import board  # noqa: E402
+import busio  # noqa: E402
+from sim_hardware import hardware  # noqa: E402
+from adafruit_is31fl3741 import IS31FL3741  # noqa: E402
+from matrix_framebuffer import MatrixFramebuffer  # noqa: E402
+from matrix_mapping import REGISTERS, page_address  # noqa: E402
+import matrix_stream  # noqa: E402
+from matrix_stream import FrameReceiver, MODE_MONO, MODE_GREY  # noqa: E402
+from matrix_stream import FRAME_TIMEOUT_MS, TICKS_MASK  # noqa: E402
+
+
+def host_ticks_ms():
+    return int(time.monotonic() * 1000) & TICKS_MASK
+
+
+# usb_cdc.Serial on a file descriptor
+class PtySerial:
+    def __init__(self, fd):
+        self.fd = fd
+
+    @property
+    def in_waiting(self):
+        waiting = fcntl.ioctl(self.fd, termios.FIONREAD, b"\0\0\0\0")
+        return struct.unpack("i", waiting)[0]
+
+    def readinto(self, buf):
+        data = os.read(self.fd, len(buf))
+        buf[: len(data)] = data
+        return len(data)
+
+    def write(self, buf):
+        return os.write(self.fd, buf)
+
+
+# What the simulated controller shows, per pixel
+def shown_pixels():
+    device = hardware.devices[0x30]
+    pixels = bytearray(len(REGISTERS))
+    for i, register in enumerate(REGISTERS):
+        (page, address) = page_address(register)
+        pixels[i] = device.pages[page][address]
+    return pixels
+
+
+def run_module(fd, receiver, shown, stop):
+    while not stop.is_set():
+        if receiver.poll():
+            shown.append((receiver.header[1], shown_pixels()))
+        else:
+            select.select([fd], [], [], 0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=60, help="Frames per mode")
+    parser.add_argument("--fps", type=float, default=0, help="0 for as fast as possible")
+    args = parser.parse_args()
+
+    hardware.reset("matrix")
+    matrix_stream.ticks_ms = host_ticks_ms
+    i2c = busio.I2C(board.SCL, board.SDA)
+    is31 = IS31FL3741(i2c, address=0x30)
+    receiver = FrameReceiver(None, MatrixFramebuffer(is31))
+
+    (host_fd, module_fd) = pty.openpty()
+    tty.setraw(host_fd)
+    tty.setraw(module_fd)
+    receiver.serial = PtySerial(module_fd)
+
+    shown = []
+    stop = threading.Event()
+    module = threading.Thread(target=run_module, args=(module_fd, receiver, shown, stop))
+    module.start()
+
+    # (seq, expected pixels) of every frame sent
+    expected = []
+    truncated = 0
+    start = time.monotonic()
+    sender = matrix_stream_send.Sender(host_fd, fps=args.fps)
+    try:
+        for mode in (MODE_MONO, MODE_GREY):
+            sender.mode = mode
+            pattern = (
+                matrix_stream_send.zigzag
+                if mode == MODE_MONO
+                else matrix_stream_send.gradient
+            )
+            for frame in range(args.frames):
+                pixels = pattern(frame)
+                if frame == args.frames // 4:
+                    # Noise on the line between two frames
+                    os.write(host_fd, b"\x00garbage")
+                if frame == args.frames // 2:
+                    # Host stopped in the middle of a frame and was restarted.
+                    # Only the full frame after it may be shown.
+                    data = matrix_stream_send.encode_frame(pixels, mode, sender.seq)
+                    os.write(host_fd, data[: len(data) // 2])
+                    time.sleep(2 * FRAME_TIMEOUT_MS / 1000)
+                    truncated += 1
+                expected.append((sender.seq, pixels))
+                sender.send(pixels)
+        sender.drain()
+    finally:
+        stop.set()
+        module.join()
+    elapsed = time.monotonic() - start
+
+    failures = 0
+    if len(shown) != len(expected):
+        print(f"Sent {len(expected)} frames, module showed {len(shown)}")
+        failures += 1
+    for (seq, pixels), (shown_seq, shown_frame) in zip(expected, shown):
+        if seq != shown_seq or pixels != shown_frame:
+            print(f"Frame {seq} differs")
+            failures += 1
+    if receiver.timeouts != truncated:
+        print(f"Sent {truncated} truncated frames, {receiver.timeouts} dropped")
+        failures += 1
+
+    print(
+        f"{len(shown)} frames in {elapsed:.2f}s ({len(shown) / elapsed:.0f}fps), "
+        + f"{receiver.dropped} dropped, {receiver.skipped} bytes skipped, "
+        + f"{receiver.timeouts} truncated frames dropped, "
+        + f"{hardware.i2c_transactions} I2C transactions"
+    )
+    print("OK" if not failures else f"{failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
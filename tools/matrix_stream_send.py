@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Stream frames to led_matrix_stream.py over the USB CDC data channel.
+# See matrix_stream.py for the format.
+#
+# Frames are sent at --fps, with at most --window frames not acknowledged by
+# the module yet. If the module falls behind, the sender waits instead of
+# filling up the USB buffers.
+#
+# Example, scroll the zigzag pattern at 30fps:
+#   python tools/matrix_stream_send.py /dev/ttyACM1 --pattern zigzag --fps 30
+import argparse
+import os
+import select
+import time
+import tty
+
+# Same as in matrix_stream.py, which can't be imported on the host
+MAGIC = 0xF5
+MODE_MONO = 0x01
+MODE_GREY = 0x08
+ACK = 0x06
+
+WIDTH = 9
+HEIGHT = 34
+COUNT = WIDTH * HEIGHT
+
+
+def pack_mono(pixels):
+    payload = bytearray((len(pixels) + 7) // 8)
+    for i, value in enumerate(pixels):
+        if value:
+            payload[i >> 3] |= 1 << (i & 7)
+    return payload
+
+
+def encode_frame(pixels, mode, seq):
+    payload = pack_mono(pixels) if mode == MODE_MONO else bytes(pixels)
+    return bytes([MAGIC, mode, seq & 0xFF]) + payload
+
+
+def zigzag(frame):
+    pixels = bytearray(COUNT)
+    for y in range(HEIGHT):
+        row = (y + frame) % HEIGHT
+        x = row % WIDTH if row % 18 < WIDTH else WIDTH - 1 - row % WIDTH
+        pixels[x + y * WIDTH] = 0xFF
+    return pixels
+
+
+def gradient(frame):
+    pixels = bytearray(COUNT)
+    for y in range(HEIGHT):
+        level = (y + frame) % HEIGHT * 0xFF // (HEIGHT - 1)
+        for x in range(WIDTH):
+            pixels[x + y * WIDTH] = level
+    return pixels
+
+
+def blink(frame):
+    return bytearray([0xFF if frame % 2 else 0] * COUNT)
+
+
+PATTERNS = {"zigzag": zigzag, "gradient": gradient, "blink": blink}
+
+
+class Sender:
+    def __init__(self, fd, mode=MODE_MONO, fps=30, window=2):
+        self.fd = fd
+        self.mode = mode
+        self.frame_s = 1 / fps if fps else 0
+        self.window = window
+        self.seq = 0
+        # Sequence numbers sent but not acknowledged yet
+        self.in_flight = []
+        self.received = bytearray()
+        self.next_frame = time.monotonic()
+
+        self.sent = 0
+        self.acked = 0
+
+    def _read_acks(self, timeout):
+        (readable, _, _) = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return
+        self.received += os.read(self.fd, 256)
+        while len(self.received) >= 2:
+            if self.received[0] != ACK:
+                del self.received[0]
+                continue
+            seq = self.received[1]
+            del self.received[:2]
+            if seq in self.in_flight:
+                # Everything sent before it is done as well
+                done = self.in_flight.index(seq) + 1
+                del self.in_flight[:done]
+                self.acked += done
+
+    # Send one frame, after waiting for the frame time and a free window slot
+    def send(self, pixels, timeout=1.0):
+        deadline = time.monotonic() + timeout
+        while len(self.in_flight) >= self.window:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Module didn't acknowledge frames")
+            self._read_acks(remaining)
+
+        delay = self.next_frame - time.monotonic()
+        if delay > 0:
+            self._read_acks(delay)
+        self.next_frame = max(self.next_frame + self.frame_s, time.monotonic())
+
+        os.write(self.fd, encode_frame(pixels, self.mode, self.seq))
+        self.in_flight.append(self.seq)
+        self.seq = (self.seq + 1) & 0xFF
+        self.sent += 1
+
+    # Wait until all frames are acknowledged
+    def drain(self, timeout=1.0):
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            self._read_acks(deadline - time.monotonic())
+        return not self.in_flight
+
+
+def open_port(path):
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+    if os.isatty(fd):
+        # Binary data, no line editing or newline translation
+        tty.setraw(fd)
+    return fd
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("port", help="USB CDC data port, e.g. /dev/ttyACM1")
+    parser.add_argument("--pattern", choices=sorted(PATTERNS), default="zigzag")
+    parser.add_argument(
+        "--mode", type=int, choices=[MODE_MONO, MODE_GREY], default=MODE_MONO
+    )
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--window", type=int, default=2)
+    parser.add_argument("--frames", type=int, default=0, help="0 to run forever")
+    args = parser.parse_args()
+
+    fd = open_port(args.port)
+    sender = Sender(fd, args.mode, args.fps, args.window)
+    pattern = PATTERNS[args.pattern]
+    start = time.monotonic()
+    frame = 0
+    try:
+        while not args.frames or frame < args.frames:
+            sender.send(pattern(frame))
+            frame += 1
+    except KeyboardInterrupt:
+        pass
+    sender.drain()
+    elapsed = time.monotonic() - start
+    print(
+        f"{sender.sent} frames sent, {sender.acked} acknowledged, "
+        + f"{sender.sent / elapsed:.1f}fps"
+    )
+    os.close(fd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Check that the tasks of runtime.Runtime below the scan still run when the
+# scan step takes longer than its period.
+#
+# Runs the task setup of macropad_async.py (scan 1ms, hid 1ms, leds 20ms,
+# sleep 50ms) for DURATION_MS on the host clock. The scan step busy-waits for
+# the given time, the others only count their runs. The simulator's virtual
+# clock only advances on hardware accesses, so ticks_ms() of the runtime is
+# the host's clock here.
+#
+# Fails if HID ran in less than 3/4 of the scan passes, or the LED or sleep task
+# less than half their periods in the time.
+#
+#   python tools/runtime_check.py
+#   python tools/runtime_check.py --scan-ms 1.2 0.5
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import simulate  # noqa: E402, F401  Sets up sys.path for sim/ and the repo
+
+import runtime  # noqa: E402
+
+DURATION_MS = 1000
+
+
+def host_ticks_ms():
+    return int(time.monotonic() * 1000) & runtime.TICKS_MASK
+
+
+def busy_wait(ms):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+def check(scan_ms):
+    rt = runtime.Runtime()
+    scan = rt.add("scan", lambda: busy_wait(scan_ms), period_ms=1, priority=3)
+    hid = rt.add("hid", lambda: None, period_ms=1, priority=2)
+    leds = rt.add("leds", lambda: None, period_ms=20, priority=1)
+    sleep = rt.add("sleep", lambda: None, period_ms=50, priority=0)
+
+    async def run_for():
+        try:
+            await asyncio.wait_for(rt._main(), DURATION_MS / 1000)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run_for())
+    print(
+        f"scan step {scan_ms}ms: scan {scan.runs}, hid {hid.runs}, "
+        + f"leds {leds.runs}, sleep {sleep.runs} runs in {DURATION_MS}ms"
+    )
+    return (
+        hid.runs >= scan.runs * 3 // 4
+        and leds.runs >= DURATION_MS // leds.period_ms // 2
+        and sleep.runs >= DURATION_MS // sleep.period_ms // 2
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--scan-ms",
+        type=float,
+        nargs="+",
+        default=[1.2, 0.5],
+        help="Time a scan step takes, longer than 1 overruns its period",
+    )
+    args = parser.parse_args()
+
+    runtime.ticks_ms = host_ticks_ms
+    ok = True
+    for scan_ms in args.scan_ms:
+        if not check(scan_ms):
+            ok = False
+    print("OK" if ok else "FAIL, tasks below the scan were starved")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
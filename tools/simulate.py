@@ -0,0 +1,175 @@
+# SPDX-FileCopyrightText: 2023 Daniel Schaefer for Framework Computer
+# SPDX-License-Identifier: MIT
+#
+# Run one of the CircuitPython scripts unmodified on the host, against the
+# simulated hardware in sim/.
+#
+# Time is virtual: it advances when the script sleeps and by a fixed cost per
+# GPIO write, ADC read and I2C byte (see sim/sim_hardware.py). The script is
+# stopped once --duration-ms of virtual time have passed.
+#
+# Example, press the key at column 1, row 2 from 100ms to 300ms:
+#   python tools/simulate.py macropad_keyscan.py --press 1,2,100,300
+import argparse
+import os
+import runpy
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIM = os.path.join(REPO, "sim")
+
+# Module simulated for each script, by file name prefix
+SCRIPT_MODULES = (
+    ("macropad", "macropad"),
+    ("numpad", "numpad"),
+    ("led_matrix", "matrix"),
+    ("ansi_keyboard", "keyboard"),
+    ("white_keyboard", "white_keyboard"),
+)
+
+if SIM not in sys.path:
+    sys.path.insert(0, SIM)
+if REPO not in sys.path:
+    sys.path.insert(1, REPO)
+
+from sim_hardware import hardware, SimulationDone  # noqa: E402
+
+
+def module_for(script):
+    name = os.path.basename(script)
+    for prefix, module in SCRIPT_MODULES:
+        if name.startswith(prefix):
+            return module
+    return "macropad"
+
+
+def _sleep(seconds):
+    hardware.advance(int(seconds * 1000000000))
+
+
+def _monotonic():
+    return hardware.clock_ns / 1000000000
+
+
+def _monotonic_ns():
+    return hardware.clock_ns
+
+
+# Make the time module run on the virtual clock
+def patch_time():
+    time.sleep = _sleep
+    time.monotonic = _monotonic
+    time.monotonic_ns = _monotonic_ns
+
+
+# Reset the simulated hardware for a module, to set up presses etc. before
+# calling run()
+def reset(module="macropad"):
+    hardware.reset(module)
+    patch_time()
+    return hardware
+
+
+# Run a script until duration_ms of virtual time have passed.
+# Returns the simulated hardware with all counters.
+def run(script, duration_ms=1000):
+    hardware.stop_ns = int(duration_ms * 1000000)
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SimulationDone:
+        pass
+    hardware.stop_ns = None
+    return hardware
+
+
+def summary(hw):
+    lines = [
+        f"Virtual time: {hw.now_ms():.1f}ms, light sleep {hw.sleep_ns / 1000000:.1f}ms",
+        f"GPIO writes: {hw.gpio_writes}",
+        f"ADC reads: {hw.adc_reads}",
+        f"I2C transactions: {hw.i2c_transactions}, bytes: {hw.i2c_bytes}",
+    ]
+    if hw.boot_done_ns is not None:
+        lines.append(f"BOOT_DONE low at {hw.boot_done_ns / 1000000:.1f}ms")
+    for address, device in sorted(hw.devices.items()):
+        lines.append(
+            f"  {device.name} at 0x{address:02X}: "
+            + f"{device.transactions} transactions, {device.bytes} bytes"
+        )
+    if hw.serial_out:
+        lines.append("Serial output:")
+        for line in hw.serial_out.decode(errors="replace").splitlines():
+            lines.append(f"  {line}")
+    lines.append(f"HID reports: {len(hw.hid_reports)}")
+    for t_ms, report in hw.hid_reports:
+        keys = " ".join(f"0x{k:02X}" for k in report[2:] if k)
+        lines.append(f"  {t_ms:8.1f}ms modifiers 0x{report[0]:02X} keys [{keys}]")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("script", help="CircuitPython script, e.g. macropad_keyscan.py")
+    parser.add_argument(
+        "--module",
+        choices=["macropad", "numpad", "matrix", "keyboard", "white_keyboard"],
+        help="Simulated input module, guessed from the script name by default",
+    )
+    parser.add_argument("--duration-ms", type=float, default=1000)
+    parser.add_argument(
+        "--press",
+        action="append",
+        default=[],
+        metavar="COL,ROW,START_MS,END_MS",
+        help="Press a key, can be given multiple times",
+    )
+    parser.add_argument(
+        "--bounce-ms", type=float, default=0, help="Contact chatter on every press"
+    )
+    parser.add_argument(
+        "--adc-noise",
+        type=int,
+        default=0,
+        help="Standard deviation of the ADC noise in raw 16-bit units",
+    )
+    parser.add_argument(
+        "--sleep",
+        metavar="START_MS,END_MS",
+        help="Host is asleep (SLEEP# low) in this time range",
+    )
+    parser.add_argument(
+        "--serial",
+        action="append",
+        default=[],
+        metavar="TIME_MS,DATA",
+        help="Host sends DATA on the USB CDC data channel, e.g. 1000,s for stats",
+    )
+    args = parser.parse_args()
+
+    hw = reset(args.module or module_for(args.script))
+    hw.adc_noise = args.adc_noise
+    for press in args.press:
+        (col, row, start_ms, end_ms) = press.split(",")
+        hw.press(
+            int(col),
+            int(row),
+            float(start_ms),
+            float(end_ms),
+            bounce_ms=args.bounce_ms,
+        )
+    if args.sleep:
+        (start_ms, end_ms) = (float(t) for t in args.sleep.split(","))
+        hw.schedule_input("GP0", start_ms, False)
+        hw.schedule_input("GP0", end_ms, True)
+
+    for serial in args.serial:
+        (t_ms, data) = serial.split(",", 1)
+        hw.schedule_serial(float(t_ms), data.encode())
+
+    run(args.script, args.duration_ms)
+    print(summary(hw))
+
+
+if __name__ == "__main__":
+    main()
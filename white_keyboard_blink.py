@@ -8,27 +8,38 @@ import time
 import board
 import digitalio
 import pwmio
+from animation import Animator, Blink, DigitalTarget, PwmTarget
+from power import PowerManager
 
 capslock = digitalio.DigitalInOut(board.GP24)
 capslock.direction = digitalio.Direction.OUTPUT
 
-# SLEEP# pin. Low if the host is sleeping
-sleep_pin = digitalio.DigitalInOut(board.GP0)
-sleep_pin.direction = digitalio.Direction.INPUT
-
 backlight = pwmio.PWMOut(board.GP25, frequency=5000, duty_cycle=0)
 
-# Blink capslock LED and backlight
-while True:
-    sleeping = not sleep_pin.value
-    if sleeping:
-        # If the host is asleep, stop blinking
-        time.sleep(0.1)
-        continue
-    capslock.value = True
-    backlight.duty_cycle = int(65535 / 2)  # 50% brightness
-    time.sleep(1)
+# Blink capslock LED and backlight, both follow the same clock
+backlight_target = PwmTarget(backlight)
+capslock_target = DigitalTarget(capslock)
+backlight_animator = Animator(backlight_target, Blink(1000, 0x80))  # 50% brightness
+capslock_animator = Animator(capslock_target, Blink(1000))
 
-    capslock.value = False
+
+def lights_off():
     backlight.duty_cycle = 0
-    time.sleep(1)
+    capslock.value = False
+
+
+def lights_on():
+    backlight_target.restore()
+    capslock_target.restore()
+
+
+# If the host is asleep, stop blinking and light sleep until it wakes up
+power = PowerManager(board.GP0, on_sleep=lights_off, on_wake=lights_on)
+
+while True:
+    power.poll()
+
+    # Doesn't block, other work could go in this loop
+    backlight_animator.tick()
+    capslock_animator.tick()
+    time.sleep(min(backlight_animator.wait_ms(), capslock_animator.wait_ms()) / 1000)